@@ -1,14 +1,15 @@
 import json
 from datetime import datetime
 
-from google import genai
 from google.genai import types
 
 from api.agents.http_tools import check_security_headers, http_request
 from api.config import settings
 from api.models.agent_log import AgentLog
 from api.models.finding import Finding
+from api.services import llm, telemetry
 from api.services.supermemory_service import SupermemoryService
+from api.utils.fingerprint import finding_fingerprint
 from api.utils.id_generator import generate_id
 
 AGENT_TOOLS = [
@@ -115,6 +116,7 @@ class BaseAgent:
         depth: str,
         db_session,
         coverage_context: dict | None = None,
+        transport=None,
     ):
         self.assessment_id = assessment_id
         self.target_url = target_url.rstrip("/")
@@ -128,7 +130,8 @@ class BaseAgent:
         self.http_request_count = 0
         self.path_attempts: dict[str, int] = {}
         self.coverage_context = coverage_context or {}
-        self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        self.transport = transport
+        self.usage = llm.LLMUsage()
         self.model = settings.GEMINI_MODEL or "gemini-2.5-flash"
         self.max_model_body_preview = {"quick": 600, "standard": 900, "deep": 1200}.get(depth, 900)
 
@@ -149,31 +152,28 @@ class BaseAgent:
 
         contents = [types.Content(role="user", parts=[types.Part(text=initial_message)])]
 
+        config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            tools=AGENT_TOOLS,
+            temperature=0.2,
+        )
+        caller = f"agent.{self.name}"
+
         while self.step_count < self.max_steps:
             self._compact_contents(contents)
             try:
-                response = await self.client.aio.models.generate_content(
-                    model=self.model,
-                    contents=contents,
-                    config=types.GenerateContentConfig(
-                        system_instruction=system_prompt,
-                        tools=AGENT_TOOLS,
-                        temperature=0.2,
-                    ),
+                response = await llm.generate(
+                    caller, contents, config=config, model=self.model, usage=self.usage,
+                    key=self.assessment_id,
                 )
             except Exception as e:
                 # Retry once with aggressively compacted history for context/token overflows.
                 message = str(e).lower()
                 if any(k in message for k in ["token", "context", "too large", "request too large"]):
                     self._compact_contents(contents, aggressive=True)
-                    response = await self.client.aio.models.generate_content(
-                        model=self.model,
-                        contents=contents,
-                        config=types.GenerateContentConfig(
-                            system_instruction=system_prompt,
-                            tools=AGENT_TOOLS,
-                            temperature=0.2,
-                        ),
+                    response = await llm.generate(
+                        caller, contents, config=config, model=self.model, usage=self.usage,
+                        key=self.assessment_id,
                     )
                 else:
                     raise RuntimeError(f"[{self.name}] Gemini generate_content failed: {e}") from e
@@ -241,8 +241,11 @@ class BaseAgent:
 
             self.path_attempts[path_key] = prior_attempts + 1
             self.http_request_count += 1
+            telemetry.AGENT_HTTP_PROBES.labels(self.name).inc()
 
-            result = await http_request(self.target_url, method, path, headers, body)
+            result = await http_request(
+                self.target_url, method, path, headers, body, transport=self.transport
+            )
             model_result = dict(result)
             body_preview = model_result.get("body_preview")
             if isinstance(body_preview, str):
@@ -260,7 +263,10 @@ class BaseAgent:
 
         elif name == "check_headers":
             path = args.get("path", "/")
-            result = await check_security_headers(self.target_url, path)
+            telemetry.AGENT_HTTP_PROBES.labels(self.name).inc()
+            result = await check_security_headers(
+                self.target_url, path, transport=self.transport
+            )
             await self._log_step(
                 action=f"Check security headers on {path}",
                 target=path,
@@ -334,6 +340,9 @@ class BaseAgent:
             evidence=evidence,
             remediation=data.get("remediation", ""),
             agent=self.name,
+            fingerprint=finding_fingerprint(
+                data.get("category", "unknown"), data.get("title"), location, evidence
+            ),
             created_at=datetime.utcnow(),
         )
         self.db.add(finding)
@@ -352,6 +361,7 @@ class BaseAgent:
                 "description": finding.description,
                 "location": finding.location,
                 "remediation": finding.remediation,
+                "fingerprint": finding.fingerprint,
             },
         )
 
@@ -1,5 +1,123 @@
 import httpx
 
+from api.services.tunnel_manager import tunnel_manager
+from api.utils.errors import VibeCheckError
+
+BODY_PREVIEW_LIMIT = 2000
+
+
+class DirectTransport:
+    """
+    Sends probes straight to the target over a pooled httpx client.
+    One instance is shared by every probe of a scan so connections are reused.
+    """
+
+    def __init__(self, max_connections: int = 20):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                verify=False, follow_redirects=True, limits=self._limits
+            )
+        return self._client
+
+    async def request(
+        self,
+        target_url: str,
+        method: str,
+        path: str,
+        headers: dict | None,
+        body: str | None,
+        timeout: float,
+    ) -> dict:
+        url = f"{target_url.rstrip('/')}{path}"
+        try:
+            response = await self._get_client().request(
+                method=method,
+                url=url,
+                headers=headers,
+                content=body,
+                timeout=timeout,
+            )
+            return {
+                "status_code": response.status_code,
+                "headers": dict(response.headers),
+                "body_preview": response.text[:BODY_PREVIEW_LIMIT],
+                "url": url,
+            }
+        except httpx.TimeoutException:
+            return {"error": "timeout", "url": url, "message": f"Timed out after {timeout}s"}
+        except httpx.ConnectError:
+            return {"error": "connection_failed", "url": url, "message": f"Could not connect to {url}"}
+        except Exception as e:
+            return {"error": "request_failed", "url": url, "message": str(e)}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class TunnelTransport:
+    """
+    Sends probes through a connected `vibecheck connect` WebSocket tunnel.
+    target_url is only used to build the reported `url`; the tunnel client
+    resolves the path against its own local port.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+
+    async def request(
+        self,
+        target_url: str,
+        method: str,
+        path: str,
+        headers: dict | None,
+        body: str | None,
+        timeout: float,
+    ) -> dict:
+        url = f"{target_url.rstrip('/')}{path}"
+        try:
+            response = await tunnel_manager.proxy_request(
+                self.session_id, method, path, headers=headers, body=body
+            )
+        except VibeCheckError as e:
+            error = {
+                "TUNNEL_NOT_CONNECTED": "connection_failed",
+                "TUNNEL_BUSY": "tunnel_busy",
+            }.get(e.code, "timeout")
+            return {"error": error, "url": url, "message": e.message}
+        except Exception as e:
+            return {"error": "request_failed", "url": url, "message": str(e)}
+
+        body_preview = response.get("body") or ""
+        if isinstance(body_preview, bytes):
+            # Binary tunnel frames carry raw bytes; only decode what the preview keeps.
+            body_preview = body_preview[: BODY_PREVIEW_LIMIT * 4].decode("utf-8", errors="replace")
+
+        return {
+            "status_code": response.get("status_code"),
+            "headers": response.get("headers") or {},
+            "body_preview": body_preview[:BODY_PREVIEW_LIMIT],
+            "url": url,
+        }
+
+    async def aclose(self):
+        return None
+
+
+def make_transport(tunnel_session_id: str | None = None) -> DirectTransport | TunnelTransport:
+    """Pick the transport for a scan: the tunnel when bound to a session, else direct."""
+    if tunnel_session_id:
+        return TunnelTransport(tunnel_session_id)
+    return DirectTransport()
+
 
 async def http_request(
     target_url: str,
@@ -8,43 +126,34 @@ async def http_request(
     headers: dict | None = None,
     body: str | None = None,
     timeout: float = 10.0,
+    transport: DirectTransport | TunnelTransport | None = None,
 ) -> dict:
     """
     Make an HTTP request to target_url + path.
     Returns status_code, headers, body_preview (truncated).
     On error returns an error dict instead of raising.
+    Without a transport a one-off direct connection is used.
     """
-    url = f"{target_url.rstrip('/')}{path}"
+    if transport is not None:
+        return await transport.request(target_url, method, path, headers, body, timeout)
+
+    one_off = DirectTransport(max_connections=1)
     try:
-        async with httpx.AsyncClient(
-            verify=False, follow_redirects=True, timeout=timeout
-        ) as client:
-            response = await client.request(
-                method=method,
-                url=url,
-                headers=headers,
-                content=body,
-            )
-            return {
-                "status_code": response.status_code,
-                "headers": dict(response.headers),
-                "body_preview": response.text[:2000],
-                "url": url,
-            }
-    except httpx.TimeoutException:
-        return {"error": "timeout", "url": url, "message": f"Timed out after {timeout}s"}
-    except httpx.ConnectError:
-        return {"error": "connection_failed", "url": url, "message": f"Could not connect to {url}"}
-    except Exception as e:
-        return {"error": "request_failed", "url": url, "message": str(e)}
+        return await one_off.request(target_url, method, path, headers, body, timeout)
+    finally:
+        await one_off.aclose()
 
 
-async def check_security_headers(target_url: str, path: str = "/") -> dict:
+async def check_security_headers(
+    target_url: str,
+    path: str = "/",
+    transport: DirectTransport | TunnelTransport | None = None,
+) -> dict:
     """
     HEAD request to analyze security headers.
     Returns headers present, missing, and issues found.
     """
-    result = await http_request(target_url, "HEAD", path)
+    result = await http_request(target_url, "HEAD", path, transport=transport)
     if "error" in result:
         return result
 
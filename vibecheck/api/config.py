@@ -16,10 +16,34 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///./vibecheck.db"
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-2.5-flash"
+    GEMINI_MAX_CONCURRENT_CHUNKS: int = 4
+    LLM_PROVIDER: str = "gemini"
+    LLM_MAX_CONCURRENT: int = 8
+    LLM_REQUESTS_PER_MINUTE: int = 0
+    LLM_TOKENS_PER_MINUTE: int = 0
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_SECONDS: float = 1.0
+    LLM_RETRY_MAX_SECONDS: float = 30.0
     SUPERMEMORY_API_KEY: str = ""
     SUPERMEMORY_BASE_URL: str = "https://api.supermemory.ai"
     SUPERMEMORY_TIMEOUT_SECONDS: float = 10.0
     CLONE_DIR: str = "/tmp/vibecheck-repos"
+    INGEST_READ_WORKERS: int = 8
+    UPLOAD_MAX_BYTES: int = 256 * 1024 * 1024
+    BLOB_DIR: str = "./vibecheck-blobs"
+    ADVISORY_DB_PATH: str = ""
+    RULE_PACK_DIRS: str = ""
+    TUNNEL_MAX_IN_FLIGHT: int = 16
+    TUNNEL_MAX_QUEUED: int = 256
+    TUNNEL_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    TUNNEL_REQUEST_TIMEOUT_SECONDS: float = 15.0
+    TUNNEL_PING_INTERVAL_SECONDS: float = 15.0
+    TUNNEL_PING_TIMEOUT_SECONDS: float = 45.0
+    TUNNEL_HEARTBEAT_FLUSH_SECONDS: float = 30.0
+    TUNNEL_REGISTRY: str = "sql"
+    NODE_ID: str = ""
+    NODE_URL: str = ""
+    NODE_SHARED_SECRET: str = ""
     DEBUG: bool = False
 
 
@@ -3,6 +3,7 @@ from sqlalchemy.orm import declarative_base
 from sqlalchemy.pool import NullPool
 
 from api.config import settings
+from api.services.telemetry import DB_SESSION_SECONDS
 
 engine_kwargs = {
     "echo": settings.DEBUG,
@@ -33,15 +34,16 @@ Base = declarative_base()
 
 
 async def get_db():
-    async with async_sessionmaker_factory() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+    with DB_SESSION_SECONDS.time():
+        async with async_sessionmaker_factory() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                await session.close()
 
 
 async def create_tables():
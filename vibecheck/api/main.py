@@ -8,7 +8,9 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 
 from api.database import create_tables
-from api.routers import health, assessments, findings, logs, agents, tunnel, memory
+from api.routers import health, assessments, findings, logs, agents, tunnel, memory, internal
+from api.services import llm, telemetry
+from api.services.tunnel_manager import tunnel_manager
 from api.utils.errors import VibeCheckError
 
 app = FastAPI(
@@ -23,6 +25,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(telemetry.MetricsMiddleware)
+telemetry.track_tunnels(tunnel_manager)
 
 
 @app.middleware("http")
@@ -69,6 +73,7 @@ app.include_router(logs.router)
 app.include_router(agents.router)
 app.include_router(tunnel.router)
 app.include_router(memory.router)
+app.include_router(internal.router)
 
 
 @app.on_event("startup")
@@ -76,6 +81,12 @@ async def startup():
     await create_tables()
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    await tunnel_manager.shutdown()
+    await llm.aclose()
+
+
 # Serve frontend dashboard from the same deployment when available.
 _frontend_dir = Path(__file__).resolve().parents[2] / "frontend"
 if _frontend_dir.exists():
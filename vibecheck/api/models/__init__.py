@@ -1,6 +1,8 @@
 from api.models.assessment import Assessment
 from api.models.finding import Finding
+from api.models.finding_analysis import FindingAnalysis
 from api.models.agent_log import AgentLog
 from api.models.tunnel_session import TunnelSession
+from api.models.uploaded_file import UploadedFile
 
-__all__ = ["Assessment", "Finding", "AgentLog", "TunnelSession"]
+__all__ = ["Assessment", "Finding", "FindingAnalysis", "AgentLog", "TunnelSession", "UploadedFile"]
@@ -35,6 +35,10 @@ class Assessment(Base):
         },
         nullable=False,
     )
+    # Run statistics, e.g. {"ingestion": {"files_read", "skipped", ...}}.
+    stats: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Stage timings of the last run (api.services.scan_metrics).
+    metrics: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     error_type: Mapped[str | None] = mapped_column(String, nullable=True)
     error_message: Mapped[str | None] = mapped_column(String, nullable=True)
     created_at: Mapped[object] = mapped_column(
@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, ForeignKey, Integer, JSON, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, JSON, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from api.database import Base
@@ -7,6 +7,10 @@ from api.utils.id_generator import generate_id
 
 class Finding(Base):
     __tablename__ = "findings"
+    # Diffs between assessments look up (assessment_id, fingerprint) only.
+    __table_args__ = (
+        Index("ix_findings_assessment_fingerprint", "assessment_id", "fingerprint"),
+    )
 
     id: Mapped[str] = mapped_column(
         String,
@@ -24,6 +28,8 @@ class Finding(Base):
     evidence: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     remediation: Mapped[str] = mapped_column(Text, nullable=False)
     agent: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Stable identity across runs (api.utils.fingerprint), set at insert.
+    fingerprint: Mapped[str | None] = mapped_column(String(20), nullable=True)
     created_at: Mapped[object] = mapped_column(
         DateTime, server_default=func.now()
     )
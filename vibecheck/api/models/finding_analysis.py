@@ -0,0 +1,32 @@
+from sqlalchemy import DateTime, ForeignKey, JSON, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from api.database import Base
+from api.utils.id_generator import generate_id
+
+
+class FindingAnalysis(Base):
+    """A stored /analyze result, reused for the same finding, focus and model."""
+
+    __tablename__ = "finding_analyses"
+    __table_args__ = (UniqueConstraint("finding_id", "focus_hash", "model"),)
+
+    id: Mapped[str] = mapped_column(
+        String,
+        primary_key=True,
+        default=lambda: generate_id("fan"),
+    )
+    assessment_id: Mapped[str] = mapped_column(
+        String, ForeignKey("assessments.id"), index=True, nullable=False
+    )
+    finding_id: Mapped[str] = mapped_column(
+        String, ForeignKey("findings.id"), nullable=False
+    )
+    # sha256 of the normalized focus text ("" when none was given).
+    focus_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Provider and model that produced it, e.g. "gemini/gemini-2.5-flash".
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    result: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[object] = mapped_column(
+        DateTime, server_default=func.now()
+    )
@@ -15,6 +15,9 @@ class TunnelSession(Base):
     )
     target_port: Mapped[int] = mapped_column(Integer, nullable=False)
     status: Mapped[str] = mapped_column(String, default="connected", nullable=False)
+    # API node holding the WebSocket, and the URL other nodes forward probes to.
+    node_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    node_url: Mapped[str | None] = mapped_column(String, nullable=True)
     created_at: Mapped[object] = mapped_column(
         DateTime, server_default=func.now()
     )
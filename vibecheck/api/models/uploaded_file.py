@@ -0,0 +1,26 @@
+from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from api.database import Base
+from api.utils.id_generator import generate_id
+
+
+class UploadedFile(Base):
+    """A file of an uploaded (not cloned) assessment; contents live in the blob store."""
+
+    __tablename__ = "uploaded_files"
+
+    id: Mapped[str] = mapped_column(
+        String,
+        primary_key=True,
+        default=lambda: generate_id("upf"),
+    )
+    assessment_id: Mapped[str] = mapped_column(
+        String, ForeignKey("assessments.id"), index=True, nullable=False
+    )
+    path: Mapped[str] = mapped_column(String, nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Lockfiles from an archive are restored to disk for the dependency graph
+    # rather than loaded into the scanned file list.
+    lockfile: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
@@ -1,6 +1,6 @@
 import asyncio
 
-from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, UploadFile
 from fastapi import WebSocket, WebSocketDisconnect
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,16 +8,25 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from api.database import get_db
 from api.models.assessment import Assessment
 from api.models.finding import Finding
+from api.models.finding_analysis import FindingAnalysis
 from api.models.agent_log import AgentLog
+from api.services import telemetry
 from api.schemas.assessment import (
     CreateAssessmentRequest,
     RerunAssessmentRequest,
     AssessmentResponse,
+    AssessmentMetricsResponse,
     AssessmentListResponse,
 )
 from api.schemas.pagination import PaginationMeta
-from api.services.lightweight_scanner import run_lightweight_scan
+from api.services.lightweight_scanner import (
+    delete_uploaded_files,
+    remove_orphaned_blobs,
+    run_lightweight_scan,
+    store_upload,
+)
 from api.services.robust_scanner import run_robust_scan
+from api.services.tunnel_manager import tunnel_manager
 from api.utils.errors import VibeCheckError
 from api.utils.pagination import paginate
 
@@ -36,6 +45,9 @@ async def create_assessment(
 ):
     from api.database import async_sessionmaker_factory
 
+    if body.tunnel_session_id and not await tunnel_manager.is_reachable(body.tunnel_session_id):
+        raise VibeCheckError.tunnel_not_connected()
+
     if body.idempotency_key:
         q = select(Assessment).where(
             Assessment.idempotency_key == body.idempotency_key
@@ -77,8 +89,61 @@ async def create_assessment(
             agent_names=body.agents,
             depth=body.depth,
             db_factory=async_sessionmaker_factory,
+            tunnel_session_id=body.tunnel_session_id,
         )
 
+    telemetry.scan_queued(body.mode)
+    return AssessmentResponse.model_validate(assessment)
+
+
+@router.post(
+    "/v1/assessments/upload",
+    status_code=202,
+    response_model=AssessmentResponse,
+)
+async def upload_assessment(
+    background_tasks: BackgroundTasks,
+    archive: UploadFile = File(..., description="Repository as .tar.gz, .tar or .zip"),
+    idempotency_key: str | None = Form(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Lightweight scan of an uploaded archive. The archive is copied to disk
+    and read member by member in the background, so the request body is
+    never held in memory as file contents.
+    """
+    from api.database import async_sessionmaker_factory
+
+    if idempotency_key:
+        result = await db.execute(
+            select(Assessment).where(Assessment.idempotency_key == idempotency_key)
+        )
+        existing = result.scalar_one_or_none()
+        if existing:
+            if existing.mode != "lightweight":
+                raise VibeCheckError.duplicate_idempotency_key()
+            return AssessmentResponse.model_validate(existing)
+
+    archive_path = await asyncio.to_thread(store_upload, archive.file)
+
+    assessment = Assessment(
+        mode="lightweight",
+        status="queued",
+        idempotency_key=idempotency_key,
+    )
+    db.add(assessment)
+    await db.commit()
+    await db.refresh(assessment)
+
+    background_tasks.add_task(
+        run_lightweight_scan,
+        assessment_id=assessment.id,
+        repo_url=None,
+        files=None,
+        db_factory=async_sessionmaker_factory,
+        archive_path=archive_path,
+    )
+    telemetry.scan_queued("lightweight")
     return AssessmentResponse.model_validate(assessment)
 
 
@@ -127,6 +192,21 @@ async def get_assessment(
     return AssessmentResponse.model_validate(assessment)
 
 
+@router.get(
+    "/v1/assessments/{assessment_id}/metrics",
+    response_model=AssessmentMetricsResponse,
+)
+async def get_assessment_metrics(
+    assessment_id: str,
+    db: AsyncSession = Depends(get_db),
+):
+    """Per-stage timings, counts and peak memory of the assessment's last run."""
+    assessment = await db.get(Assessment, assessment_id)
+    if not assessment:
+        raise VibeCheckError.not_found("Assessment", assessment_id)
+    return AssessmentMetricsResponse.model_validate(assessment)
+
+
 @router.websocket("/v1/assessments/{assessment_id}/ws")
 async def assessment_status_websocket(
     ws: WebSocket,
@@ -203,10 +283,14 @@ async def delete_assessment(
     assessment = await db.get(Assessment, assessment_id)
     if not assessment:
         raise VibeCheckError.not_found("Assessment", assessment_id)
+    await db.execute(delete(FindingAnalysis).where(FindingAnalysis.assessment_id == assessment_id))
     await db.execute(delete(Finding).where(Finding.assessment_id == assessment_id))
     await db.execute(delete(AgentLog).where(AgentLog.assessment_id == assessment_id))
+    orphaned_blobs = await delete_uploaded_files(db, assessment_id)
     await db.delete(assessment)
     await db.commit()
+    if orphaned_blobs:
+        await remove_orphaned_blobs(db, orphaned_blobs)
 
 
 @router.post(
@@ -237,6 +321,8 @@ async def rerun_assessment(
         "info": 0,
         "total": 0,
     }
+    assessment.stats = None
+    assessment.metrics = None
     assessment.completed_at = None
     if body:
         if body.agents is not None:
@@ -244,6 +330,7 @@ async def rerun_assessment(
         if body.idempotency_key is not None:
             assessment.idempotency_key = body.idempotency_key
 
+    await db.execute(delete(FindingAnalysis).where(FindingAnalysis.assessment_id == assessment_id))
     await db.execute(delete(Finding).where(Finding.assessment_id == assessment_id))
     await db.execute(delete(AgentLog).where(AgentLog.assessment_id == assessment_id))
 
@@ -266,6 +353,8 @@ async def rerun_assessment(
             agent_names=assessment.agents or ["recon", "auth", "injection", "config"],
             depth=assessment.depth,
             db_factory=async_sessionmaker_factory,
+            tunnel_session_id=assessment.tunnel_session_id,
         )
 
+    telemetry.scan_queued(assessment.mode)
     return AssessmentResponse.model_validate(assessment)
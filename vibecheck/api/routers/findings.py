@@ -1,4 +1,8 @@
+import json
+from typing import Literal
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy import case, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,10 +12,12 @@ from api.models.finding import Finding
 from api.schemas.finding import (
     FindingResponse,
     FindingListResponse,
+    FindingDiffCounts,
+    FindingDiffResponse,
     AnalyzeFindingRequest,
     AnalyzeFindingResponse,
 )
-from api.services.finding_analyzer import analyze_finding
+from api.services.finding_analyzer import analyze_finding_cached
 from api.utils.errors import VibeCheckError
 from api.utils.pagination import paginate
 
@@ -33,6 +39,54 @@ async def _get_assessment_or_404(db: AsyncSession, assessment_id: str) -> Assess
     return assessment
 
 
+# Rows fetched per round trip when streaming a diff.
+DIFF_STREAM_BATCH = 500
+
+
+def _diff_queries(base_id: str, head_id: str) -> dict:
+    """
+    Finding queries for each side of the diff. The fingerprint sets are
+    computed in the database with EXCEPT / INTERSECT over the
+    (assessment_id, fingerprint) index; only the resulting rows are loaded.
+    Findings without a fingerprint (stored before fingerprints existed) are
+    not part of any set.
+    """
+    base = select(Finding.fingerprint).where(Finding.assessment_id == base_id)
+    head = select(Finding.fingerprint).where(Finding.assessment_id == head_id)
+
+    def rows(assessment_id: str, fingerprints):
+        return (
+            select(Finding)
+            .where(
+                Finding.assessment_id == assessment_id,
+                Finding.fingerprint.in_(fingerprints),
+            )
+            .order_by(SEVERITY_ORDER.asc(), Finding.created_at.asc())
+        )
+
+    return {
+        "added": rows(head_id, head.except_(base)),
+        "resolved": rows(base_id, base.except_(head)),
+        "unchanged": rows(head_id, head.intersect(base)),
+    }
+
+
+async def _stream_diff(base_id: str, head_id: str):
+    # The request session is closed once the response starts; the stream
+    # reads through its own.
+    from api.database import async_sessionmaker_factory
+
+    async with async_sessionmaker_factory() as db:
+        for change, query in _diff_queries(base_id, head_id).items():
+            result = await db.stream(query.execution_options(yield_per=DIFF_STREAM_BATCH))
+            async for finding in result.scalars():
+                line = {
+                    "change": change,
+                    "finding": FindingResponse.model_validate(finding).model_dump(mode="json"),
+                }
+                yield json.dumps(line) + "\n"
+
+
 router = APIRouter(tags=["Findings"])
 
 
@@ -95,6 +149,34 @@ async def get_finding(
     return FindingResponse.model_validate(finding)
 
 
+@router.get(
+    "/v1/assessments/{base_id}/diff/{head_id}",
+    response_model=FindingDiffResponse,
+)
+async def diff_assessments(
+    base_id: str,
+    head_id: str,
+    db: AsyncSession = Depends(get_db),
+    format: Literal["json", "ndjson"] = "json",
+):
+    await _get_assessment_or_404(db, base_id)
+    await _get_assessment_or_404(db, head_id)
+
+    if format == "ndjson":
+        return StreamingResponse(_stream_diff(base_id, head_id), media_type="application/x-ndjson")
+
+    changes = {}
+    for change, query in _diff_queries(base_id, head_id).items():
+        result = await db.execute(query)
+        changes[change] = [FindingResponse.model_validate(f) for f in result.scalars().all()]
+    return FindingDiffResponse(
+        base_assessment_id=base_id,
+        head_assessment_id=head_id,
+        counts=FindingDiffCounts(**{change: len(items) for change, items in changes.items()}),
+        **changes,
+    )
+
+
 @router.post(
     "/v1/assessments/{assessment_id}/findings/{finding_id}/analyze",
     response_model=AnalyzeFindingResponse,
@@ -116,38 +198,14 @@ async def analyze_finding_endpoint(
     if not finding:
         raise VibeCheckError.not_found("Finding", finding_id)
 
-    similar_result = await db.execute(
-        select(Finding)
-        .where(
-            Finding.category == finding.category,
-            Finding.id != finding.id,
-        )
-        .order_by(Finding.created_at.desc())
-        .limit(10)
-    )
-    local_similar = [
-        {
-            "id": f.id,
-            "assessment_id": f.assessment_id,
-            "severity": f.severity,
-            "category": f.category,
-            "title": f.title,
-            "agent": f.agent,
-            "created_at": f.created_at.isoformat() if f.created_at else None,
-            "metadata": {
-                "title": f.title,
-                "severity": f.severity,
-                "category": f.category,
-            },
-        }
-        for f in similar_result.scalars().all()
-    ]
-
-    analysis = await analyze_finding(
-        assessment=assessment,
-        finding=finding,
-        local_similar_findings=local_similar,
+    from api.database import async_sessionmaker_factory
+
+    analysis, cached = await analyze_finding_cached(
+        db,
+        assessment,
+        finding,
         focus=body.focus if body else None,
+        db_factory=async_sessionmaker_factory,
     )
     return AnalyzeFindingResponse(
         finding_id=finding.id,
@@ -163,4 +221,5 @@ async def analyze_finding_endpoint(
         memory_similar_results_count=analysis.get("memory_similar_results_count", 0),
         memory_similar_results=analysis.get("memory_similar_results", []),
         error=analysis.get("error"),
+        cached=cached,
     )
@@ -1,5 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 
+from api.services import telemetry
+from api.services.rules import get_registry
 from api.services.tunnel_manager import tunnel_manager
 
 router = APIRouter(tags=["Health"])
@@ -11,5 +14,13 @@ async def health():
         "status": "healthy",
         "version": "1.0.0",
         "active_tunnels": len(tunnel_manager.active_connections),
+        "node_id": tunnel_manager.node_id,
         "agents_available": True,
+        "ruleset_hash": get_registry().ruleset_hash,
     }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of the in-process registry (api.services.telemetry)."""
+    return PlainTextResponse(telemetry.render(), media_type=telemetry.CONTENT_TYPE)
@@ -0,0 +1,47 @@
+import hmac
+
+from fastapi import APIRouter, Header
+from pydantic import BaseModel
+
+from api.config import settings
+from api.services.tunnel_manager import tunnel_manager
+from api.utils.errors import VibeCheckError
+
+router = APIRouter(tags=["Internal"], include_in_schema=False)
+
+
+class ForwardedProbe(BaseModel):
+    method: str
+    path: str
+    headers: dict = {}
+    body: str | None = None
+
+
+@router.post("/internal/tunnel/sessions/{session_id}/proxy")
+async def proxy_forwarded_probe(
+    session_id: str,
+    probe: ForwardedProbe,
+    x_vibecheck_node_secret: str = Header(default=""),
+):
+    """
+    Called by other API nodes for tunnels connected to this node.
+    Only serves local sessions so a stale registry entry can never loop.
+    Fails closed: without NODE_SHARED_SECRET every request is rejected,
+    since this endpoint reaches into users' machines.
+    """
+    if not settings.NODE_SHARED_SECRET or not hmac.compare_digest(
+        x_vibecheck_node_secret, settings.NODE_SHARED_SECRET
+    ):
+        raise VibeCheckError.invalid_node_secret()
+
+    response = await tunnel_manager.proxy_local(
+        session_id, probe.method, probe.path, probe.headers, probe.body
+    )
+    body = response.get("body") or ""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    return {
+        "status_code": response.get("status_code"),
+        "headers": response.get("headers") or {},
+        "body": body,
+    }
@@ -6,6 +6,7 @@ from api.database import get_db
 from api.models.tunnel_session import TunnelSession
 from api.schemas.tunnel import TunnelSessionResponse, TunnelSessionListResponse
 from api.services.tunnel_manager import tunnel_manager
+from api.services.tunnel_protocol import TunnelProtocolError, negotiate, receive_message
 from api.utils.errors import VibeCheckError
 
 router = APIRouter(tags=["Tunnel"])
@@ -24,15 +25,20 @@ async def tunnel_websocket(
             await ws.close(code=1008, reason="Expected connect message with target_port")
             return
 
-        session_id = await tunnel_manager.register(ws, data["target_port"], db)
-        await ws.send_json({"type": "session_created", "session_id": session_id})
+        codec = negotiate(data)
+        session_id = await tunnel_manager.register(ws, data["target_port"], db, codec)
+        await ws.send_json(
+            {"type": "session_created", "session_id": session_id, **codec.describe()}
+        )
 
         while True:
-            msg = await ws.receive_json()
-            await tunnel_manager.handle_message(session_id, msg, db)
+            msg = await receive_message(ws)
+            await tunnel_manager.handle_message(session_id, msg)
 
     except WebSocketDisconnect:
         pass
+    except TunnelProtocolError as e:
+        await ws.close(code=1003, reason=str(e)[:120])
     finally:
         if session_id:
             await tunnel_manager.unregister(session_id, db)
@@ -71,6 +71,7 @@ class AssessmentResponse(BaseModel):
                         "self": "/v1/assessments/asm_a1b2c3d4e5f6",
                         "findings": "/v1/assessments/asm_a1b2c3d4e5f6/findings",
                         "logs": "/v1/assessments/asm_a1b2c3d4e5f6/logs",
+                        "metrics": "/v1/assessments/asm_a1b2c3d4e5f6/metrics",
                     },
                 }
             ]
@@ -86,6 +87,7 @@ class AssessmentResponse(BaseModel):
     agents: list[str] | None = None
     depth: str
     finding_counts: dict
+    stats: dict | None = None
     idempotency_key: str | None = None
     error_type: str | None = None
     error_message: str | None = None
@@ -100,6 +102,7 @@ class AssessmentResponse(BaseModel):
             "self": f"/v1/assessments/{self.id}",
             "findings": f"/v1/assessments/{self.id}/findings",
             "logs": f"/v1/assessments/{self.id}/logs",
+            "metrics": f"/v1/assessments/{self.id}/metrics",
         }
         return self
 
@@ -109,6 +112,35 @@ class AssessmentListResponse(BaseModel):
     pagination: PaginationMeta
 
 
+class AssessmentMetricsResponse(BaseModel):
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "examples": [
+                {
+                    "id": "asm_a1b2c3d4e5f6",
+                    "mode": "lightweight",
+                    "status": "complete",
+                    "metrics": {
+                        "total_ms": 5321.4,
+                        "stages": [
+                            {"name": "clone", "offset_ms": 12.1, "duration_ms": 2210.5},
+                            {"name": "read", "offset_ms": 2222.8, "duration_ms": 480.2, "files": 812, "bytes": 4120333, "skipped": 37},
+                            {"name": "scanner.pattern", "offset_ms": 2950.0, "duration_ms": 910.7, "findings": 14},
+                        ],
+                        "peak_rss_mb": 212.4,
+                    },
+                }
+            ]
+        },
+    )
+
+    id: str
+    mode: str
+    status: str
+    metrics: dict | None = None
+
+
 class RerunAssessmentRequest(BaseModel):
     agents: list[str] | None = None
     idempotency_key: str | None = None
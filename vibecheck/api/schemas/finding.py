@@ -18,6 +18,7 @@ class FindingResponse(BaseModel):
     evidence: dict | None = None
     remediation: str
     agent: str | None = None
+    fingerprint: str | None = None
     created_at: datetime
 
 
@@ -26,6 +27,24 @@ class FindingListResponse(BaseModel):
     pagination: PaginationMeta
 
 
+class FindingDiffCounts(BaseModel):
+    added: int
+    resolved: int
+    unchanged: int
+
+
+class FindingDiffResponse(BaseModel):
+    base_assessment_id: str
+    head_assessment_id: str
+    counts: FindingDiffCounts
+    # In head, not in base.
+    added: list[FindingResponse]
+    # In base, not in head.
+    resolved: list[FindingResponse]
+    # In both; the head's findings.
+    unchanged: list[FindingResponse]
+
+
 class AnalyzeFindingRequest(BaseModel):
     focus: str | None = None
 
@@ -44,3 +63,5 @@ class AnalyzeFindingResponse(BaseModel):
     memory_similar_results_count: int = 0
     memory_similar_results: list[dict] = []
     error: str | None = None
+    # True when served from the stored analysis instead of a new model call.
+    cached: bool = False
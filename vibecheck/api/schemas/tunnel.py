@@ -9,6 +9,7 @@ class TunnelSessionResponse(BaseModel):
     id: str
     target_port: int
     status: str
+    node_id: str | None = None
     created_at: datetime
     last_heartbeat: datetime
 
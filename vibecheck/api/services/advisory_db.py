@@ -0,0 +1,358 @@
+"""
+Offline vulnerability advisory database.
+
+OSV-format advisories (https://ossf.github.io/osv-schema/) are imported into a
+small SQLite file indexed by (ecosystem, package). At scan time each package's
+affected ranges are loaded once into an interval tree and kept in an LRU cache,
+so a lookup is one indexed query on first use and a tree walk afterwards.
+
+Import a directory, zip (e.g. OSV's per-ecosystem all.zip) or single JSON file:
+
+    python -m api.services.advisory_db import ./osv/npm.zip ./osv/PyPI.zip
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import zipfile
+from collections import OrderedDict
+from typing import Iterator
+
+from api.config import settings
+from api.utils.versions import MAX_VERSION, MIN_VERSION, normalize_package_name, parse_version
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS advisories (
+    id TEXT PRIMARY KEY,
+    cve TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS advisory_ranges (
+    ecosystem TEXT NOT NULL,
+    package TEXT NOT NULL,
+    advisory_id TEXT NOT NULL,
+    introduced TEXT NOT NULL,
+    fixed TEXT,
+    last_affected TEXT
+);
+CREATE TABLE IF NOT EXISTS advisory_versions (
+    ecosystem TEXT NOT NULL,
+    package TEXT NOT NULL,
+    advisory_id TEXT NOT NULL,
+    version TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_advisory_ranges_pkg ON advisory_ranges (ecosystem, package);
+CREATE INDEX IF NOT EXISTS ix_advisory_ranges_id ON advisory_ranges (advisory_id);
+CREATE INDEX IF NOT EXISTS ix_advisory_versions_pkg ON advisory_versions (ecosystem, package);
+CREATE INDEX IF NOT EXISTS ix_advisory_versions_id ON advisory_versions (advisory_id);
+"""
+
+_SEVERITY_MAP = {
+    "CRITICAL": "critical",
+    "HIGH": "high",
+    "MODERATE": "medium",
+    "MEDIUM": "medium",
+    "LOW": "low",
+}
+
+
+class IntervalTree:
+    """
+    Centered interval tree over version ranges. Each interval is
+    (low, high, high_inclusive, payload) with an inclusive low bound.
+    """
+
+    __slots__ = ("center", "by_low", "by_high", "left", "right")
+
+    def __init__(self, intervals: list[tuple]):
+        intervals = [iv for iv in intervals if iv[0] < iv[1] or (iv[2] and iv[0] == iv[1])]
+        # Centering on a low bound guarantees at least one interval stays at
+        # this node, so the recursion always shrinks.
+        lows = sorted(iv[0] for iv in intervals)
+        self.center = lows[len(lows) // 2] if lows else None
+        left, right, here = [], [], []
+        for iv in intervals:
+            low, high, inclusive = iv[0], iv[1], iv[2]
+            if high < self.center or (high == self.center and not inclusive):
+                left.append(iv)
+            elif low > self.center:
+                right.append(iv)
+            else:
+                here.append(iv)
+        self.by_low = sorted(here, key=lambda iv: iv[0])
+        self.by_high = sorted(here, key=lambda iv: (iv[1], iv[2]), reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def query(self, point) -> list:
+        """Payloads of every interval containing `point`."""
+        found = []
+        node = self
+        while node is not None and node.center is not None:
+            if point < node.center:
+                for low, _, _, payload in node.by_low:
+                    if low > point:
+                        break
+                    found.append(payload)
+                node = node.left
+            elif point > node.center:
+                for _, high, inclusive, payload in node.by_high:
+                    if high < point or (high == point and not inclusive):
+                        break
+                    found.append(payload)
+                node = node.right
+            else:
+                found.extend(iv[3] for iv in node.by_low)
+                break
+        return found
+
+
+class AdvisoryDatabase:
+    """Read/write access to one advisory SQLite file."""
+
+    def __init__(self, path: str, cache_size: int = 4096):
+        self.path = path
+        self.cache_size = cache_size
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._packages: OrderedDict[tuple[str, str], tuple] = OrderedDict()
+        self._advisories: dict[str, dict] = {}
+
+    def close(self):
+        self._conn.close()
+
+    def match(self, ecosystem: str, package: str, version: str) -> list[dict]:
+        """Advisories affecting `package==version`, each with the matched range."""
+        key = parse_version(ecosystem, version)
+        if key is None:
+            return []
+        tree, exact = self._load(ecosystem, normalize_package_name(ecosystem, package))
+        hits = tree.query(key) if tree else []
+        hits.extend(exact.get(key, ()))
+
+        matches, seen = [], set()
+        for advisory_id, introduced, fixed, last_affected in hits:
+            if advisory_id in seen:
+                continue
+            seen.add(advisory_id)
+            advisory = self._advisory(advisory_id)
+            if advisory:
+                matches.append({
+                    **advisory,
+                    "introduced": introduced,
+                    "fixed": fixed,
+                    "last_affected": last_affected,
+                })
+        return matches
+
+    def advisory_count(self, ecosystem: str, package: str) -> int:
+        """Number of advisories recorded for a package, regardless of version."""
+        tree, exact = self._load(ecosystem, normalize_package_name(ecosystem, package))
+        ids = {payload[0] for payloads in exact.values() for payload in payloads}
+        if tree:
+            stack = [tree]
+            while stack:
+                node = stack.pop()
+                ids.update(iv[3][0] for iv in node.by_low)
+                stack.extend(child for child in (node.left, node.right) if child)
+        return len(ids)
+
+    def _load(self, ecosystem: str, package: str) -> tuple:
+        cache_key = (ecosystem, package)
+        cached = self._packages.get(cache_key)
+        if cached is not None:
+            self._packages.move_to_end(cache_key)
+            return cached
+
+        intervals = []
+        for advisory_id, introduced, fixed, last_affected in self._conn.execute(
+            "SELECT advisory_id, introduced, fixed, last_affected FROM advisory_ranges "
+            "WHERE ecosystem = ? AND package = ?",
+            (ecosystem, package),
+        ):
+            low = MIN_VERSION if introduced == "0" else parse_version(ecosystem, introduced)
+            if last_affected:
+                high, inclusive = parse_version(ecosystem, last_affected), True
+            elif fixed:
+                high, inclusive = parse_version(ecosystem, fixed), False
+            else:
+                high, inclusive = MAX_VERSION, True
+            if low is None or high is None:
+                continue
+            intervals.append(
+                (low, high, inclusive, (advisory_id, introduced, fixed, last_affected))
+            )
+
+        exact: dict = {}
+        for advisory_id, version in self._conn.execute(
+            "SELECT advisory_id, version FROM advisory_versions WHERE ecosystem = ? AND package = ?",
+            (ecosystem, package),
+        ):
+            key = parse_version(ecosystem, version)
+            if key is not None:
+                exact.setdefault(key, []).append((advisory_id, version, None, version))
+
+        entry = (IntervalTree(intervals) if intervals else None, exact)
+        self._packages[cache_key] = entry
+        if len(self._packages) > self.cache_size:
+            self._packages.popitem(last=False)
+        return entry
+
+    def _advisory(self, advisory_id: str) -> dict | None:
+        advisory = self._advisories.get(advisory_id)
+        if advisory is None:
+            row = self._conn.execute(
+                "SELECT id, cve, severity, summary FROM advisories WHERE id = ?",
+                (advisory_id,),
+            ).fetchone()
+            if not row:
+                return None
+            advisory = {"id": row[0], "cve": row[1], "severity": row[2], "summary": row[3]}
+            self._advisories[advisory_id] = advisory
+        return advisory
+
+    def import_osv(self, sources: list[str]) -> int:
+        """Import OSV records from JSON files, directories or zips. Returns the record count."""
+        count = 0
+        with self._conn:
+            for record in _iter_osv_records(sources):
+                self._import_record(record)
+                count += 1
+        self._packages.clear()
+        self._advisories.clear()
+        return count
+
+    def _import_record(self, record: dict):
+        advisory_id = record.get("id")
+        if not advisory_id:
+            return
+        self._conn.execute("DELETE FROM advisories WHERE id = ?", (advisory_id,))
+        self._conn.execute("DELETE FROM advisory_ranges WHERE advisory_id = ?", (advisory_id,))
+        self._conn.execute("DELETE FROM advisory_versions WHERE advisory_id = ?", (advisory_id,))
+        if record.get("withdrawn"):
+            return
+
+        ranges, versions = [], []
+        for affected in record.get("affected") or []:
+            pkg = affected.get("package") or {}
+            ecosystem, name = pkg.get("ecosystem"), pkg.get("name")
+            if not ecosystem or not name:
+                continue
+            name = normalize_package_name(ecosystem, name)
+            for rng in affected.get("ranges") or []:
+                if rng.get("type") not in ("SEMVER", "ECOSYSTEM"):
+                    continue
+                for introduced, fixed, last_affected in _range_events(rng.get("events") or []):
+                    ranges.append((ecosystem, name, advisory_id, introduced, fixed, last_affected))
+            for version in affected.get("versions") or []:
+                versions.append((ecosystem, name, advisory_id, version))
+
+        if not ranges and not versions:
+            return
+        self._conn.execute(
+            "INSERT INTO advisories (id, cve, severity, summary) VALUES (?, ?, ?, ?)",
+            (advisory_id, _cve(record), _severity(record), _summary(record)),
+        )
+        self._conn.executemany(
+            "INSERT INTO advisory_ranges VALUES (?, ?, ?, ?, ?, ?)", ranges
+        )
+        self._conn.executemany(
+            "INSERT INTO advisory_versions VALUES (?, ?, ?, ?)", versions
+        )
+
+
+def _range_events(events: list[dict]) -> Iterator[tuple[str, str | None, str | None]]:
+    """Turn OSV introduced/fixed/last_affected events into (introduced, fixed, last_affected)."""
+    introduced = None
+    for event in events:
+        if "introduced" in event:
+            introduced = event["introduced"]
+        elif introduced is not None and "fixed" in event:
+            yield introduced, event["fixed"], None
+            introduced = None
+        elif introduced is not None and "last_affected" in event:
+            yield introduced, None, event["last_affected"]
+            introduced = None
+    if introduced is not None:
+        yield introduced, None, None
+
+
+def _cve(record: dict) -> str:
+    for alias in [record["id"], *(record.get("aliases") or [])]:
+        if alias.startswith("CVE-"):
+            return alias
+    return record["id"]
+
+
+def _severity(record: dict) -> str:
+    label = (record.get("database_specific") or {}).get("severity")
+    if not label:
+        for affected in record.get("affected") or []:
+            label = (affected.get("ecosystem_specific") or {}).get("severity")
+            if label:
+                break
+    return _SEVERITY_MAP.get(str(label).upper(), "medium")
+
+
+def _summary(record: dict) -> str:
+    text = record.get("summary") or (record.get("details") or "").strip().split("\n", 1)[0]
+    return text[:300] or record["id"]
+
+
+def _iter_osv_records(sources: list[str]) -> Iterator[dict]:
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, filenames in os.walk(source):
+                for filename in sorted(filenames):
+                    if filename.endswith(".json"):
+                        with open(os.path.join(root, filename), "rb") as fh:
+                            yield from _records_from(json.load(fh))
+        elif source.endswith(".zip"):
+            with zipfile.ZipFile(source) as archive:
+                for member in archive.namelist():
+                    if member.endswith(".json"):
+                        yield from _records_from(json.loads(archive.read(member)))
+        else:
+            with open(source, "rb") as fh:
+                yield from _records_from(json.load(fh))
+
+
+def _records_from(data) -> Iterator[dict]:
+    if isinstance(data, list):
+        yield from (item for item in data if isinstance(item, dict))
+    elif isinstance(data, dict):
+        yield data
+
+
+_default_db: AdvisoryDatabase | None = None
+
+
+def get_advisory_db() -> AdvisoryDatabase | None:
+    """The database at ADVISORY_DB_PATH, or None when not configured / not imported yet."""
+    global _default_db
+    path = settings.ADVISORY_DB_PATH
+    if not path or not os.path.exists(path):
+        return None
+    if _default_db is None or _default_db.path != path:
+        _default_db = AdvisoryDatabase(path)
+    return _default_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the offline advisory database.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import OSV JSON files, directories or zips.")
+    imp.add_argument("sources", nargs="+")
+    imp.add_argument("--db", default=settings.ADVISORY_DB_PATH or "advisories.db")
+    args = parser.parse_args()
+
+    db = AdvisoryDatabase(args.db)
+    count = db.import_osv(args.sources)
+    db.close()
+    print(f"Imported {count} advisories into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Content-addressed storage for uploaded file contents.
+
+Each blob is stored once under BLOB_DIR, named by the sha256 of its
+uncompressed bytes and zlib-compressed on disk, so identical files uploaded to
+different assessments share one copy and storage grows with unique content
+only. Which assessment uses which blob is recorded in the `uploaded_files`
+table (api.models.uploaded_file); blobs that no row references any more are
+removed when an assessment is deleted.
+
+Deleting races with uploads of the same content, so it is done in steps
+(api.services.lightweight_scanner.remove_orphaned_blobs): `retire` renames
+the blob aside, the caller re-checks the database, then `finish_delete`
+restores blobs that gained a reference and purges the rest. Uploads always
+re-publish their blobs and check they still exist once their rows commit.
+"""
+
+import hashlib
+import os
+import tempfile
+import uuid
+import zlib
+
+from api.config import settings
+
+CHUNK_BYTES = 1 << 20
+COMPRESSION_LEVEL = 6
+
+
+class BlobStore:
+    __slots__ = ("root",)
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def put(self, data: bytes) -> str:
+        """Store `data`; returns its sha256."""
+        digest = hashlib.sha256(data).hexdigest()
+        self._write(digest, zlib.compress(data, COMPRESSION_LEVEL))
+        return digest
+
+    def put_file(self, source: str) -> tuple[str, int]:
+        """Stream a file into the store; returns (sha256, uncompressed size)."""
+        hasher = hashlib.sha256()
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+        size = 0
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".put-")
+        try:
+            with os.fdopen(fd, "wb") as out, open(source, "rb") as src:
+                while chunk := src.read(CHUNK_BYTES):
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    out.write(compressor.compress(chunk))
+                out.write(compressor.flush())
+            digest = hasher.hexdigest()
+            self._publish(tmp, digest)
+        except BaseException:
+            _unlink(tmp)
+            raise
+        return digest, size
+
+    def get(self, digest: str) -> bytes:
+        with open(self.path(digest), "rb") as fh:
+            return zlib.decompress(fh.read())
+
+    def copy_to(self, digest: str, target: str):
+        """Decompress a blob to `target` without holding it in memory."""
+        decompressor = zlib.decompressobj()
+        with open(self.path(digest), "rb") as src, open(target, "wb") as out:
+            while chunk := src.read(CHUNK_BYTES):
+                out.write(decompressor.decompress(chunk))
+            out.write(decompressor.flush())
+
+    def retire(self, digests) -> dict[str, str]:
+        """Rename blobs aside; returns {digest: tombstone} for those that existed."""
+        tombstones = {}
+        for digest in digests:
+            tombstone = f"{self.path(digest)}.del-{uuid.uuid4().hex}"
+            try:
+                os.replace(self.path(digest), tombstone)
+            except FileNotFoundError:
+                continue
+            tombstones[digest] = tombstone
+        return tombstones
+
+    def finish_delete(self, tombstones: dict[str, str], referenced: set[str]):
+        """Restore retired blobs that are `referenced` again; purge the rest."""
+        for digest, tombstone in tombstones.items():
+            if digest in referenced and not self.exists(digest):
+                os.replace(tombstone, self.path(digest))
+            else:
+                _unlink(tombstone)
+
+    def _write(self, digest: str, compressed: bytes):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".put-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(compressed)
+            self._publish(tmp, digest)
+        except BaseException:
+            _unlink(tmp)
+            raise
+
+    def _publish(self, tmp: str, digest: str):
+        # Written to a temp file and renamed into place, so a reader never
+        # sees a partial blob and concurrent writers of the same content race
+        # harmlessly. Always replaced, never skipped when present: the
+        # existing copy may be about to be retired by a delete.
+        target = self.path(digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp, target)
+
+
+def _unlink(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+blob_store = BlobStore(settings.BLOB_DIR)
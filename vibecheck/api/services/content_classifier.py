@@ -0,0 +1,143 @@
+"""
+Cheap ingestion-time classification of files that are not worth scanning:
+binary blobs, minified bundles and generated code. Decisions are made from
+the first HEAD_BYTES of a file, so the rest of a skipped file is never read.
+"""
+
+import fnmatch
+import re
+
+HEAD_BYTES = 8192
+
+# A line this long only occurs in minified or machine-written output.
+MAX_LINE_LENGTH = 1000
+MAX_AVERAGE_LINE_LENGTH = 300
+
+_GENERATED_MARKERS = re.compile(
+    rb"@generated"
+    rb"|DO NOT EDIT"
+    rb"|auto-?generated (?:file|code|by)"
+    rb"|This file (?:was|is) (?:automatically|auto-?) ?generated"
+    rb"|-- (?:MySQL|MariaDB) dump"
+    rb"|-- PostgreSQL database dump",
+    re.IGNORECASE,
+)
+_MINIFIED_NAME = re.compile(r"[.-]min\.(?:js|css|mjs)$|\.bundle\.js$|\.chunk\.js$")
+# Line-length heuristics only apply to code; a compact one-line package.json
+# or tsconfig is still a manifest worth reading.
+_MINIFIABLE_EXTENSIONS = {
+    ".js", ".mjs", ".cjs", ".jsx", ".ts", ".tsx", ".css", ".html", ".vue", ".svelte", ".sql",
+}
+
+
+class GitAttributes:
+    """`linguist-generated` patterns from the repo's .gitattributes files."""
+
+    __slots__ = ("_rules",)
+
+    def __init__(self):
+        # (directory, pattern, generated) in file order; the last match wins.
+        self._rules: list[tuple[str, str, bool]] = []
+
+    def add(self, content: str, directory: str = ""):
+        for line in content.splitlines():
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            for attr in parts[1:]:
+                if attr in ("linguist-generated", "linguist-generated=true"):
+                    self._rules.append((directory, parts[0], True))
+                elif attr in ("-linguist-generated", "linguist-generated=false", "!linguist-generated"):
+                    self._rules.append((directory, parts[0], False))
+
+    def is_generated(self, path: str) -> bool:
+        generated = False
+        for directory, pattern, value in self._rules:
+            if directory:
+                if not path.startswith(directory + "/"):
+                    continue
+                relative = path[len(directory) + 1:]
+            else:
+                relative = path
+            if _gitattributes_match(pattern, relative):
+                generated = value
+        return generated
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+
+def _gitattributes_match(pattern: str, path: str) -> bool:
+    """gitignore-style match: no slash matches the basename at any depth."""
+    if pattern.endswith("/**"):
+        return path.startswith(pattern[:-3].lstrip("/") + "/")
+    if "/" not in pattern.rstrip("/"):
+        return fnmatch.fnmatchcase(path.rsplit("/", 1)[-1], pattern)
+    pattern = pattern.lstrip("/")
+    if pattern.startswith("**/"):
+        return fnmatch.fnmatchcase(path, pattern[3:]) or fnmatch.fnmatchcase(path, pattern)
+    return fnmatch.fnmatchcase(path, pattern)
+
+
+def classify(path: str, head: bytes, attributes: GitAttributes | None = None) -> str | None:
+    """
+    Skip reason for a file from its path and first HEAD_BYTES bytes, or None
+    if it should be scanned. Reasons: binary, generated, minified.
+    """
+    if b"\x00" in head:
+        return "binary"
+    if attributes and attributes.is_generated(path):
+        return "generated"
+    if _GENERATED_MARKERS.search(head, 0, 1024):
+        return "generated"
+    if _MINIFIED_NAME.search(path):
+        return "minified"
+    if "." + path.rsplit(".", 1)[-1] not in _MINIFIABLE_EXTENSIONS:
+        return None
+
+    lines = head.split(b"\n")
+    # The last line of a truncated head is partial, so it is left out of the
+    # average (but still counts towards the longest line).
+    complete = lines[:-1] if len(head) >= HEAD_BYTES and len(lines) > 1 else lines
+    if max(map(len, lines)) > MAX_LINE_LENGTH:
+        return "minified"
+    if sum(map(len, complete)) / len(complete) > MAX_AVERAGE_LINE_LENGTH:
+        return "minified"
+    return None
+
+
+def classify_text(path: str, content: str, attributes: GitAttributes | None = None) -> str | None:
+    """`classify` for content that is already in memory (pasted files)."""
+    return classify(path, content[:HEAD_BYTES].encode("utf-8", "surrogatepass")[:HEAD_BYTES], attributes)
+
+
+class IngestStats:
+    """What ingestion read and skipped, stored on Assessment.stats["ingestion"]."""
+
+    __slots__ = ("files_read", "bytes_read", "skipped", "skipped_files")
+
+    MAX_LISTED = 100
+
+    def __init__(self):
+        self.files_read = 0
+        self.bytes_read = 0
+        self.skipped: dict[str, int] = {}
+        self.skipped_files: list[dict] = []
+
+    def read(self, size: int):
+        self.files_read += 1
+        self.bytes_read += size
+
+    def skip(self, path: str, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+        if len(self.skipped_files) < self.MAX_LISTED:
+            self.skipped_files.append({"path": path, "reason": reason})
+
+    def as_dict(self) -> dict:
+        return {
+            "files_read": self.files_read,
+            "bytes_read": self.bytes_read,
+            "files_skipped": sum(self.skipped.values()),
+            "skipped": dict(self.skipped),
+            "skipped_files": list(self.skipped_files),
+        }
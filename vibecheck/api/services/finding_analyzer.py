@@ -1,12 +1,22 @@
+import asyncio
+import hashlib
 import json
 import re
 from typing import Any
 
-from google import genai
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 from api.config import settings
+from api.models.finding import Finding
+from api.models.finding_analysis import FindingAnalysis
+from api.services import llm
 from api.services.supermemory_service import SupermemoryService
 
+# Analyses being computed, by cache key; concurrent requests for the same key
+# await the same task instead of each calling the model.
+_inflight: dict[tuple[str, str, str], asyncio.Task] = {}
+
 
 def _safe_json(data: Any) -> str:
     try:
@@ -96,7 +106,7 @@ async def analyze_finding(
     memory_results = memory.get("results", []) if isinstance(memory, dict) else []
     local_similar_findings = local_similar_findings or []
 
-    if not settings.GEMINI_API_KEY:
+    if not llm.enabled():
         return _fallback_analysis(
             assessment,
             finding,
@@ -145,12 +155,8 @@ Requirements:
 """
 
     try:
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        async with client.aio as aclient:
-            resp = await aclient.models.generate_content(
-                model=settings.GEMINI_MODEL,
-                contents=prompt,
-            )
+        # Someone is waiting on /analyze: served ahead of background scans.
+        resp = await llm.generate("finding_analysis", prompt, key=assessment.id, interactive=True)
         text = (resp.text or "").strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1]
@@ -162,7 +168,7 @@ Requirements:
             raise ValueError("Model output is not an object")
 
         return {
-            "analysis_source": "gemini",
+            "analysis_source": getattr(llm.get_provider(), "name", "llm"),
             "summary": data.get("summary", ""),
             "impact": data.get("impact", ""),
             "possible_root_cause": data.get("possible_root_cause", ""),
@@ -180,3 +186,136 @@ Requirements:
             local_similar_findings=local_similar_findings,
             error=str(e),
         )
+
+
+async def analyze_finding_cached(
+    db,
+    assessment: Any,
+    finding: Any,
+    focus: str | None,
+    db_factory,
+) -> tuple[dict[str, Any], bool]:
+    """
+    The analysis for (finding, focus, model), from the finding_analyses table
+    when stored, else computed once and stored. Returns (analysis, cached).
+
+    The computation runs as a task with its own session from `db_factory`,
+    shielded from the request: a client that disconnects does not cancel it
+    for others waiting on the same key. Fallback analyses (no model, or a
+    failed call) are returned but not stored, so the next request retries.
+    Stored analyses are deleted when the assessment is rerun or deleted.
+    """
+    focus_hash = _focus_hash(focus)
+    model = _model_id()
+    stored = await db.scalar(
+        select(FindingAnalysis.result).where(
+            FindingAnalysis.finding_id == finding.id,
+            FindingAnalysis.focus_hash == focus_hash,
+            FindingAnalysis.model == model,
+        )
+    )
+    if stored is not None:
+        return stored, True
+
+    key = (finding.id, focus_hash, model)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _analyze_and_store(assessment, finding, focus, focus_hash, model, db_factory)
+        )
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task), False
+
+
+async def _analyze_and_store(
+    assessment: Any,
+    finding: Any,
+    focus: str | None,
+    focus_hash: str,
+    model: str,
+    db_factory,
+) -> dict[str, Any]:
+    async with db_factory() as db:
+        local_similar = await find_local_similar(db, finding)
+        analysis = await analyze_finding(
+            assessment=assessment,
+            finding=finding,
+            local_similar_findings=local_similar,
+            focus=focus,
+        )
+        if analysis.get("analysis_source") == "fallback":
+            return analysis
+        # The task outlives the request: the assessment may have been rerun
+        # or deleted during the model call, taking the finding with it.
+        if not await _finding_exists(db, finding.id):
+            return analysis
+
+        db.add(
+            FindingAnalysis(
+                assessment_id=assessment.id,
+                finding_id=finding.id,
+                focus_hash=focus_hash,
+                model=model,
+                result=analysis,
+            )
+        )
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            stored = await db.scalar(
+                select(FindingAnalysis.id).where(
+                    FindingAnalysis.finding_id == finding.id,
+                    FindingAnalysis.focus_hash == focus_hash,
+                    FindingAnalysis.model == model,
+                )
+            )
+            # Stored concurrently by another worker process, or the finding
+            # was deleted since the check above; anything else is a real error.
+            if stored is None and await _finding_exists(db, finding.id):
+                raise
+    return analysis
+
+
+async def _finding_exists(db, finding_id: str) -> bool:
+    return await db.scalar(select(Finding.id).where(Finding.id == finding_id)) is not None
+
+
+async def find_local_similar(db, finding: Any) -> list[dict[str, Any]]:
+    """The ten most recent findings of the same category, in any assessment."""
+    result = await db.execute(
+        select(Finding)
+        .where(
+            Finding.category == finding.category,
+            Finding.id != finding.id,
+        )
+        .order_by(Finding.created_at.desc())
+        .limit(10)
+    )
+    return [
+        {
+            "id": f.id,
+            "assessment_id": f.assessment_id,
+            "severity": f.severity,
+            "category": f.category,
+            "title": f.title,
+            "agent": f.agent,
+            "created_at": f.created_at.isoformat() if f.created_at else None,
+            "metadata": {
+                "title": f.title,
+                "severity": f.severity,
+                "category": f.category,
+            },
+        }
+        for f in result.scalars().all()
+    ]
+
+
+def _focus_hash(focus: str | None) -> str:
+    normalized = " ".join((focus or "").split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _model_id() -> str:
+    return f"{llm.provider_name()}/{settings.GEMINI_MODEL}"
@@ -1,13 +1,33 @@
+import asyncio
 import json
 import os
+import posixpath
 import shutil
+import stat
 import subprocess
+import tarfile
 import time
+import uuid
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from sqlalchemy import delete, select
+
 from api.config import settings
 from api.models.assessment import Assessment
 from api.models.finding import Finding
+from api.models.uploaded_file import UploadedFile
+from api.services.blob_store import blob_store
+from api.services.content_classifier import (
+    HEAD_BYTES,
+    GitAttributes,
+    IngestStats,
+    classify,
+    classify_text,
+)
+from api.services.lockfiles import LOCKFILE_PARSERS, build_dependency_graph, find_lockfiles
 from api.services.scanners import (
     config_scanner,
     claude_scanner,
@@ -15,8 +35,13 @@ from api.services.scanners import (
     pattern_scanner,
     secret_scanner,
 )
+from api.services.scanners.file_context import as_contexts
+from api.services import llm, telemetry
+from api.services.scan_metrics import ScanMetrics
 from api.services.supermemory_service import SupermemoryService
+from api.services.workspace import build_workspace
 from api.utils.errors import VibeCheckError
+from api.utils.fingerprint import finding_fingerprint
 
 LOG_PATH = r"c:\Users\Azeem\Workshop\API Project\debug-3e1901.log"
 
@@ -45,52 +70,126 @@ async def run_lightweight_scan(
     repo_url: str | None,
     files: list[dict] | None,
     db_factory,
+    archive_path: str | None = None,
 ):
     """
     Main lightweight scan orchestrator.
     db_factory is the async sessionmaker (not a session) since background tasks
-    need to create their own sessions.
+    need to create their own sessions. `archive_path` is an uploaded
+    .tar.gz/.zip on disk (see read_archive); it is deleted when the scan ends.
+    Uploaded files (archive or `files`) are kept in the blob store, and a
+    run with neither `repo_url`, `archive_path` nor `files` (a rerun) scans
+    the stored copy.
     """
+    with telemetry.scan_running("lightweight") as outcome:
+        outcome["status"] = await _run_lightweight_scan(
+            assessment_id, repo_url, files, db_factory, archive_path
+        )
+
+
+async def _run_lightweight_scan(
+    assessment_id: str,
+    repo_url: str | None,
+    files: list[dict] | None,
+    db_factory,
+    archive_path: str | None,
+) -> str:
     async with db_factory() as db:
         assessment = await db.get(Assessment, assessment_id)
         if not assessment:
-            return
+            return "missing"
 
         all_findings: list[dict] = []
+        ingest = IngestStats()
+        metrics = ScanMetrics("lightweight")
 
         try:
             if repo_url:
                 assessment.status = "cloning"
                 await db.commit()
-                project_files = await clone_and_read_repo(repo_url, assessment_id)
+                with metrics.span("clone"):
+                    clone_dir = await clone_repo(repo_url, assessment_id)
+                with metrics.span("read") as stage:
+                    project_files = await asyncio.to_thread(read_tree, clone_dir, ingest)
+                lockfile_root = clone_dir
+            elif archive_path:
+                with metrics.span("read") as stage:
+                    project_files, lockfile_root = await asyncio.to_thread(
+                        read_archive,
+                        archive_path,
+                        os.path.join(settings.CLONE_DIR, assessment_id),
+                        ingest,
+                    )
+                with metrics.span("store_uploads"):
+                    await save_uploaded_files(db, assessment_id, project_files, lockfile_root)
+            elif files is not None:
+                with metrics.span("read") as stage:
+                    project_files = read_uploaded_files(files, ingest)
+                lockfile_root = None
+                with metrics.span("store_uploads"):
+                    await save_uploaded_files(db, assessment_id, project_files)
             else:
-                project_files = [
-                    {"path": f["path"], "content": f["content"]}
-                    for f in (files or [])
-                ]
+                with metrics.span("read") as stage:
+                    project_files, lockfile_root = await load_uploaded_files(db, assessment_id, ingest)
+            stage["files"] = ingest.files_read
+            stage["bytes"] = ingest.bytes_read
+            stage["skipped"] = sum(ingest.skipped.values())
 
             assessment.status = "analyzing"
+            assessment.stats = {"ingestion": ingest.as_dict()}
             await db.commit()
 
-            project_info = detect_project_info(project_files)
+            with metrics.span("detect") as stage:
+                # Split lines, extensions and offsets are computed once per
+                # file and shared by every scanner.
+                project_files = as_contexts(project_files)
+                project_info = detect_project_info(project_files)
+                stage["projects"] = len(project_info.get("projects", []))
+
+            with metrics.span("dependency_graph") as stage:
+                # Lockfiles are streamed from the clone (or the lockfiles
+                # extracted from an upload) on disk; they are usually too
+                # large to be among the files read into memory.
+                dependency_graph = await asyncio.to_thread(
+                    build_dependency_graph,
+                    project_files,
+                    lockfile_root,
+                    SKIP_DIRS,
+                )
+                for ecosystem, deps in project_info["ecosystem_dependencies"].items():
+                    for name in deps:
+                        dependency_graph.mark_direct(ecosystem, name)
+                project_info["dependency_graph"] = dependency_graph
 
             # Dependency scanner findings
-            for f in dependency_scanner.scan(project_files, project_info):
+            with metrics.span("scanner.dependency") as stage:
+                findings = dependency_scanner.scan(project_files, project_info)
+                stage["findings"] = len(findings)
+            for f in findings:
                 f.setdefault("agent", "dependency_scanner")
                 all_findings.append(f)
 
             # Pattern scanner findings
-            for f in pattern_scanner.scan(project_files):
+            with metrics.span("scanner.pattern") as stage:
+                findings = pattern_scanner.scan(project_files)
+                stage["findings"] = len(findings)
+            for f in findings:
                 f.setdefault("agent", "pattern_scanner")
                 all_findings.append(f)
 
             # Secret scanner findings
-            for f in secret_scanner.scan(project_files):
+            with metrics.span("scanner.secret") as stage:
+                findings = secret_scanner.scan(project_files)
+                stage["findings"] = len(findings)
+            for f in findings:
                 f.setdefault("agent", "secret_scanner")
                 all_findings.append(f)
 
             # Config scanner findings
-            for f in config_scanner.scan(project_files, project_info):
+            with metrics.span("scanner.config") as stage:
+                findings = config_scanner.scan(project_files, project_info)
+                stage["findings"] = len(findings)
+            for f in findings:
                 f.setdefault("agent", "config_scanner")
                 all_findings.append(f)
 
@@ -107,10 +206,14 @@ async def run_lightweight_scan(
             )
             # #endregion
 
-            if settings.GEMINI_API_KEY:
-                claude_findings = await claude_scanner.scan(
-                    project_files, project_info
-                )
+            if llm.enabled():
+                with metrics.span("llm") as stage:
+                    usage = llm.LLMUsage()
+                    claude_findings = await claude_scanner.scan(
+                        project_files, project_info, usage, assessment_id
+                    )
+                    stage["findings"] = len(claude_findings)
+                    stage.update(usage.as_dict())
 
                 # #region agent log
                 _agent_log(
@@ -125,61 +228,76 @@ async def run_lightweight_scan(
                     f.setdefault("agent", "gemini_llm")
                     all_findings.append(f)
 
-            finding_counts = {
-                "critical": 0, "high": 0, "medium": 0,
-                "low": 0, "info": 0, "total": 0,
-            }
-            for f in all_findings:
-                finding = Finding(
-                    assessment_id=assessment_id,
-                    severity=f["severity"],
-                    category=f["category"],
-                    title=f["title"],
-                    description=f["description"],
-                    location=f.get("location"),
-                    evidence=f.get("evidence"),
-                    remediation=f["remediation"],
-                    agent=f.get("agent", "static_analyzer"),
-                )
-                db.add(finding)
-                finding_counts[f["severity"]] += 1
-                finding_counts["total"] += 1
-
-                await SupermemoryService.ingest_finding(
-                    assessment_id=assessment_id,
-                    mode="lightweight",
-                    repo_url=repo_url,
-                    target_url=None,
-                    finding={
-                        "severity": f["severity"],
-                        "category": f["category"],
-                        "title": f["title"],
-                        "description": f["description"],
-                        "location": f.get("location"),
-                        "remediation": f["remediation"],
-                    },
-                )
+            with metrics.span("persist", findings=len(all_findings)):
+                finding_counts = {
+                    "critical": 0, "high": 0, "medium": 0,
+                    "low": 0, "info": 0, "total": 0,
+                }
+                for f in all_findings:
+                    finding = Finding(
+                        assessment_id=assessment_id,
+                        severity=f["severity"],
+                        category=f["category"],
+                        title=f["title"],
+                        description=f["description"],
+                        location=f.get("location"),
+                        evidence=f.get("evidence"),
+                        remediation=f["remediation"],
+                        agent=f.get("agent", "static_analyzer"),
+                        fingerprint=finding_fingerprint(
+                            f["category"], f["title"], f.get("location"), f.get("evidence")
+                        ),
+                    )
+                    db.add(finding)
+                    finding_counts[f["severity"]] += 1
+                    finding_counts["total"] += 1
+
+                    await SupermemoryService.ingest_finding(
+                        assessment_id=assessment_id,
+                        mode="lightweight",
+                        repo_url=repo_url,
+                        target_url=None,
+                        finding={
+                            "severity": f["severity"],
+                            "category": f["category"],
+                            "title": f["title"],
+                            "description": f["description"],
+                            "location": f.get("location"),
+                            "remediation": f["remediation"],
+                            "fingerprint": finding.fingerprint,
+                        },
+                    )
+                await db.flush()
 
             assessment.finding_counts = finding_counts
             assessment.status = "complete"
             assessment.completed_at = datetime.utcnow()
+            assessment.metrics = metrics.as_dict()
             await db.commit()
 
         except VibeCheckError as e:
             assessment.status = "failed"
             assessment.error_type = e.code
             assessment.error_message = e.message[:500]
+            assessment.metrics = metrics.as_dict()
             await db.commit()
 
         except Exception as e:
             assessment.status = "failed"
             assessment.error_type = "SCAN_ERROR"
             assessment.error_message = str(e)[:500]
+            assessment.metrics = metrics.as_dict()
             await db.commit()
 
         finally:
-            if repo_url:
-                cleanup_clone(assessment_id)
+            cleanup_clone(assessment_id)
+            if archive_path:
+                try:
+                    os.remove(archive_path)
+                except OSError:
+                    pass
+
+        return assessment.status
 
 
 CODE_EXTENSIONS = {
@@ -204,13 +322,31 @@ SKIP_DIRS = {
     "dist", "build", "venv", ".venv", "vendor", "target",
 }
 ALLOWED_EXTENSIONS = CODE_EXTENSIONS | CONFIG_EXTENSIONS
+MAX_FILE_BYTES = 100_000
 
 
-async def clone_and_read_repo(repo_url: str, assessment_id: str) -> list[dict]:
-    """Clone a public GitHub repo and read its files into memory."""
+async def clone_and_read_repo(
+    repo_url: str,
+    assessment_id: str,
+    ingest: IngestStats | None = None,
+) -> list[dict]:
+    """
+    Clone a public GitHub repo and read its files into memory. The clone and
+    the read both run in worker threads so the event loop is never blocked.
+    """
+    clone_dir = await clone_repo(repo_url, assessment_id)
+    return await asyncio.to_thread(read_tree, clone_dir, ingest)
+
+
+async def clone_repo(repo_url: str, assessment_id: str) -> str:
+    """Shallow-clone into CLONE_DIR/<assessment_id> off the event loop; returns the path."""
     clone_dir = os.path.join(settings.CLONE_DIR, assessment_id)
     os.makedirs(clone_dir, exist_ok=True)
+    await asyncio.to_thread(_git_clone, repo_url, clone_dir)
+    return clone_dir
+
 
+def _git_clone(repo_url: str, clone_dir: str):
     try:
         result = subprocess.run(
             ["git", "clone", "--depth", "1", repo_url, clone_dir],
@@ -223,129 +359,431 @@ async def clone_and_read_repo(repo_url: str, assessment_id: str) -> list[dict]:
     except subprocess.TimeoutExpired:
         raise VibeCheckError.clone_failed(repo_url, "Clone timed out after 60 seconds")
 
+
+READ_BATCH_SIZE = 32
+
+
+def read_tree(root: str, ingest: IngestStats | None = None, workers: int | None = None) -> list[dict]:
+    """
+    Read the scannable files under `root`. One thread walks the tree with
+    os.scandir and applies every check that needs only the path and size;
+    batches of the remaining files are read by a pool of INGEST_READ_WORKERS
+    threads, which overlaps I/O on slow or network-backed volumes. Binary,
+    minified and generated files are recognised from their first bytes and
+    skipped without reading the rest; lockfiles are skipped because the
+    dependency graph streams them from disk. Results are merged in walk
+    order, so the output does not depend on thread timing.
+    """
+    ingest = ingest if ingest is not None else IngestStats()
+    workers = max(1, workers or settings.INGEST_READ_WORKERS)
     files: list[dict] = []
-    for root, dirs, filenames in os.walk(clone_dir):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-        for filename in filenames:
-            filepath = os.path.join(root, filename)
-            ext = os.path.splitext(filename)[1]
-            if ext in ALLOWED_EXTENSIONS or filename in CONFIG_FILENAMES:
-                try:
-                    with open(filepath, "r", encoding="utf-8", errors="ignore") as fh:
-                        content = fh.read()
-                    if len(content) > 100_000:
-                        continue
-                    rel_path = os.path.relpath(filepath, clone_dir)
-                    files.append({"path": rel_path, "content": content})
-                except Exception:
-                    continue
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+        futures = []
+        batch: list[tuple[str, str]] = []
+        for rel_path, path in _iter_candidates(root, ingest):
+            batch.append((rel_path, path))
+            if len(batch) == READ_BATCH_SIZE:
+                futures.append(pool.submit(_read_batch, batch))
+                batch = []
+        if batch:
+            futures.append(pool.submit(_read_batch, batch))
+
+        for future in futures:
+            for rel_path, data, reason in future.result():
+                if reason:
+                    ingest.skip(rel_path, reason)
+                elif data is not None:
+                    ingest.read(len(data))
+                    files.append({"path": rel_path, "content": data.decode("utf-8", errors="ignore")})
 
     return files
 
 
-def cleanup_clone(assessment_id: str):
-    clone_dir = os.path.join(settings.CLONE_DIR, assessment_id)
-    shutil.rmtree(clone_dir, ignore_errors=True)
+def _iter_candidates(root: str, ingest: IngestStats):
+    """
+    Depth-first scandir walk in os.walk order, yielding (rel_path, path) for
+    files that pass the name, size and .gitattributes checks. A directory's
+    .gitattributes is loaded before any file it can apply to.
+    """
+    attributes = GitAttributes()
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            if entry.name == ".gitattributes" and entry.is_file(follow_symlinks=False):
+                try:
+                    with open(entry.path, encoding="utf-8", errors="ignore") as fh:
+                        attributes.add(fh.read(), rel_dir)
+                except OSError:
+                    pass
+
+        for entry in entries:
+            name = entry.name
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if entry.is_dir(follow_symlinks=False):
+                if name not in SKIP_DIRS:
+                    subdirs.append(rel_path)
+                continue
+            ext = os.path.splitext(name)[1]
+            if ext not in ALLOWED_EXTENSIONS and name not in CONFIG_FILENAMES:
+                continue
+            if entry.is_symlink():
+                # A symlink in a cloned repo can point anywhere on the host.
+                ingest.skip(rel_path, "symlink")
+                continue
+            if name in LOCKFILE_PARSERS:
+                ingest.skip(rel_path, "lockfile")
+                continue
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+            if size > MAX_FILE_BYTES:
+                ingest.skip(rel_path, "too_large")
+            elif attributes.is_generated(rel_path):
+                ingest.skip(rel_path, "generated")
+            else:
+                yield rel_path, entry.path
 
+        stack.extend(reversed(subdirs))
+
+
+def _read_batch(batch: list[tuple[str, str]]) -> list[tuple[str, bytes | None, str | None]]:
+    """Worker: (rel_path, data, skip reason) per file, reading only the head of skipped files."""
+    results = []
+    for rel_path, path in batch:
+        try:
+            with open(path, "rb") as fh:
+                head = fh.read(HEAD_BYTES)
+                reason = classify(rel_path, head)
+                data = None if reason else head + fh.read()
+        except OSError:
+            results.append((rel_path, None, None))
+            continue
+        results.append((rel_path, data, reason))
+    return results
+
+
+# Lockfiles are copied out of an archive rather than read into memory; this
+# bounds the copy for entries whose header understates their size.
+MAX_LOCKFILE_BYTES = 50_000_000
+
+
+def read_archive(
+    archive_path: str,
+    dest: str,
+    ingest: IngestStats | None = None,
+) -> tuple[list[dict], str]:
+    """
+    Read the scannable files of an uploaded .tar(.gz/.bz2/.xz) or .zip
+    member by member, without extracting the archive. The tar is read as a
+    forward-only stream; each member's size comes from its header, so an
+    oversized file is skipped without decompressing it into memory, and at
+    most MAX_FILE_BYTES of any member is ever held. The same extension,
+    SKIP_DIRS, size and content filters as a clone apply. Lockfiles are
+    copied to `dest` so the dependency graph can stream them.
+
+    A single top-level directory shared by every member (GitHub's
+    `repo-<sha>/` archives) is stripped from paths. Returns the files and the
+    directory to pass to build_dependency_graph.
+    """
+    ingest = ingest if ingest is not None else IngestStats()
+    os.makedirs(dest, exist_ok=True)
+    try:
+        entries, gitattributes, top_levels = _read_members(archive_path, dest)
+    except (tarfile.TarError, zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError) as e:
+        raise VibeCheckError.invalid_archive(str(e) or type(e).__name__)
+
+    prefix = ""
+    if len(top_levels) == 1 and "" not in top_levels:
+        prefix = top_levels.pop() + "/"
+
+    # .gitattributes can come after the files it covers in the archive, so
+    # linguist-generated is applied once everything has been seen.
+    attributes = GitAttributes()
+    for path, content in gitattributes:
+        attributes.add(content, posixpath.dirname(path[len(prefix):]))
+
+    files = []
+    for path, content, size, reason in entries:
+        path = path[len(prefix):]
+        if not reason and attributes.is_generated(path):
+            reason = "generated"
+        if reason:
+            ingest.skip(path, reason)
+        else:
+            ingest.read(size)
+            files.append({"path": path, "content": content})
+    return files, os.path.join(dest, prefix)
+
+
+def _read_members(archive_path: str, dest: str):
+    """
+    One pass over the archive. Returns (path, content, size, skip reason)
+    per candidate file, decoded as it is read so only one copy is held; the
+    .gitattributes contents; and the top-level names seen ("" for a file at
+    the root).
+    """
+    entries: list[tuple[str, str | None, int, str | None]] = []
+    gitattributes: list[tuple[str, str]] = []
+    top_levels: set[str] = set()
+
+    members = _zip_members(archive_path) if zipfile.is_zipfile(archive_path) else _tar_members(archive_path)
+    for name, size, kind, opener in members:
+        rel_path = posixpath.normpath(name.replace("\\", "/").lstrip("/"))
+        if rel_path in (".", "..") or rel_path.startswith("../"):
+            continue
+        parts = rel_path.split("/")
+        top_levels.add(parts[0] if len(parts) > 1 or kind == "dir" else "")
+        if kind == "dir" or any(part in SKIP_DIRS for part in parts[:-1]):
+            continue
+
+        filename = parts[-1]
+        if os.path.splitext(filename)[1] not in ALLOWED_EXTENSIONS and filename not in CONFIG_FILENAMES:
+            if filename == ".gitattributes" and kind == "file" and size <= MAX_FILE_BYTES:
+                with opener() as fh:
+                    gitattributes.append((rel_path, fh.read(MAX_FILE_BYTES).decode("utf-8", errors="ignore")))
+            continue
+
+        if kind == "symlink":
+            entries.append((rel_path, None, 0, "symlink"))
+        elif kind != "file":
+            continue
+        elif filename in LOCKFILE_PARSERS:
+            reason = "too_large" if size > MAX_LOCKFILE_BYTES else _extract_lockfile(opener, dest, rel_path)
+            entries.append((rel_path, None, size, reason or "lockfile"))
+        elif size > MAX_FILE_BYTES:
+            entries.append((rel_path, None, size, "too_large"))
+        else:
+            with opener() as fh:
+                head = fh.read(HEAD_BYTES)
+                reason = classify(rel_path, head)
+                # The header size of a zip entry is not trusted.
+                data = None if reason else head + fh.read(MAX_FILE_BYTES + 1 - len(head))
+            if data is not None and len(data) > MAX_FILE_BYTES:
+                data, reason = None, "too_large"
+            content = data.decode("utf-8", errors="ignore") if data is not None else None
+            entries.append((rel_path, content, len(data) if data is not None else size, reason))
+
+    return entries, gitattributes, top_levels
+
+
+def _tar_members(archive_path: str):
+    """(name, size, kind, opener) per member of a tar, read as a stream."""
+    with tarfile.open(archive_path, "r|*") as tar:
+        for member in tar:
+            if member.isfile():
+                kind = "file"
+            elif member.isdir():
+                kind = "dir"
+            elif member.issym() or member.islnk():
+                kind = "symlink"
+            else:
+                kind = "other"
+            yield member.name, member.size, kind, lambda member=member: tar.extractfile(member)
+
+
+def _zip_members(archive_path: str):
+    """(name, size, kind, opener) per member of a zip."""
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                kind = "dir"
+            elif stat.S_ISLNK(info.external_attr >> 16):
+                kind = "symlink"
+            else:
+                kind = "file"
+            yield info.filename, info.file_size, kind, lambda info=info: archive.open(info)
 
-def detect_project_info(files: list[dict]) -> dict:
-    """Detect framework, language, and dependency info from project files."""
-    info: dict = {
-        "language": None,
-        "framework": None,
-        "dependencies": {},
-        "has_gitignore": False,
-        "gitignore_entries": [],
-    }
 
+def store_upload(src) -> str:
+    """
+    Copy an uploaded archive (a binary file object) to CLONE_DIR in 1 MB
+    chunks and check that it is a tar or zip. Returns the path handed to
+    run_lightweight_scan, which deletes it when the scan ends.
+    """
+    os.makedirs(settings.CLONE_DIR, exist_ok=True)
+    path = os.path.join(settings.CLONE_DIR, f"upload-{uuid.uuid4().hex}")
+    try:
+        written = 0
+        with open(path, "wb") as out:
+            while chunk := src.read(1 << 20):
+                written += len(chunk)
+                if written > settings.UPLOAD_MAX_BYTES:
+                    raise VibeCheckError.upload_too_large(settings.UPLOAD_MAX_BYTES)
+                out.write(chunk)
+        if not zipfile.is_zipfile(path) and not tarfile.is_tarfile(path):
+            raise VibeCheckError.invalid_archive("unrecognised format")
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _extract_lockfile(opener, dest: str, rel_path: str) -> str | None:
+    """Copy a lockfile member under `dest`; returns a skip reason if it is too large."""
+    target = os.path.join(dest, *rel_path.split("/"))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    written = 0
+    with opener() as src, open(target, "wb") as out:
+        while chunk := src.read(1 << 16):
+            written += len(chunk)
+            if written > MAX_LOCKFILE_BYTES:
+                break
+            out.write(chunk)
+    if written > MAX_LOCKFILE_BYTES:
+        os.remove(target)
+        return "too_large"
+    return None
+
+
+def read_uploaded_files(files: list[dict], ingest: IngestStats | None = None) -> list[dict]:
+    """Apply the same binary/minified/generated filter to files sent in the request body."""
+    ingest = ingest if ingest is not None else IngestStats()
+    attributes = GitAttributes()
     for f in files:
-        path = f["path"]
-        content = f["content"]
+        directory, _, name = f["path"].rpartition("/")
+        if name == ".gitattributes":
+            attributes.add(f["content"], directory)
+
+    kept = []
+    for f in files:
+        reason = classify_text(f["path"], f["content"], attributes)
+        if reason:
+            ingest.skip(f["path"], reason)
+            continue
+        ingest.read(len(f["content"]))
+        kept.append({"path": f["path"], "content": f["content"]})
+    return kept
+
+
+async def save_uploaded_files(
+    db,
+    assessment_id: str,
+    files: list[dict],
+    lockfile_root: str | None = None,
+):
+    """
+    Keep the ingested files of an upload so reruns can scan them without a
+    re-upload: contents go to the blob store (deduplicated by sha256), and
+    one UploadedFile row per path records which blobs the assessment uses.
+    Lockfiles extracted under `lockfile_root` are streamed into the store.
+    """
+    rows = await asyncio.to_thread(_put_blobs, files, lockfile_root)
+    db.add_all(UploadedFile(assessment_id=assessment_id, **row) for row in rows)
+    await db.commit()
+    # A delete that found these digests unreferenced before the commit may
+    # have retired them since; store them again (remove_orphaned_blobs).
+    if not all(await asyncio.to_thread(lambda: [blob_store.exists(row["sha256"]) for row in rows])):
+        await asyncio.to_thread(_put_blobs, files, lockfile_root)
+
+
+def _put_blobs(files: list[dict], lockfile_root: str | None) -> list[dict]:
+    rows = []
+    for f in files:
+        data = f["content"].encode("utf-8", "surrogatepass")
+        rows.append({"path": f["path"], "sha256": blob_store.put(data), "size": len(data)})
+    if lockfile_root:
+        for rel_path in find_lockfiles(lockfile_root, SKIP_DIRS):
+            digest, size = blob_store.put_file(os.path.join(lockfile_root, rel_path))
+            rows.append({"path": rel_path.replace(os.sep, "/"), "sha256": digest, "size": size, "lockfile": True})
+    return rows
 
-        if path == "package.json" or path.endswith("/package.json"):
-            try:
-                pkg = json.loads(content)
-                info["language"] = "javascript"
-                deps = {**pkg.get("dependencies", {}), **pkg.get("devDependencies", {})}
-                info["dependencies"].update(deps)
-                if "next" in deps:
-                    info["framework"] = "nextjs"
-                elif "express" in deps:
-                    info["framework"] = "express"
-                elif "react" in deps:
-                    info["framework"] = "react"
-                elif "vue" in deps:
-                    info["framework"] = "vue"
-                elif "@angular/core" in deps:
-                    info["framework"] = "angular"
-                elif "svelte" in deps:
-                    info["framework"] = "svelte"
-                elif "fastify" in deps:
-                    info["framework"] = "fastify"
-                elif "hono" in deps:
-                    info["framework"] = "hono"
-            except json.JSONDecodeError:
-                pass
-
-        elif path == "requirements.txt" or path.endswith("/requirements.txt"):
-            info["language"] = "python"
-            for line in content.splitlines():
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    for sep in ["==", ">=", "<=", "~=", "!="]:
-                        if sep in line:
-                            name, ver = line.split(sep, 1)
-                            info["dependencies"][name.strip()] = ver.strip()
-                            break
-                    else:
-                        info["dependencies"][line] = "*"
-
-            deps = info["dependencies"]
-            if "flask" in deps or "Flask" in deps:
-                info["framework"] = "flask"
-            elif "django" in deps or "Django" in deps:
-                info["framework"] = "django"
-            elif "fastapi" in deps:
-                info["framework"] = "fastapi"
-
-        elif path == "pyproject.toml" or path.endswith("/pyproject.toml"):
-            info["language"] = info["language"] or "python"
-            for line in content.splitlines():
-                line = line.strip()
-                if "=" in line and not line.startswith("[") and not line.startswith("#"):
-                    parts = line.split("=", 1)
-                    if len(parts) == 2:
-                        key = parts[0].strip().strip('"')
-                        val = parts[1].strip().strip('"').strip("'")
-                        if any(c in val for c in "0123456789.><=~^"):
-                            info["dependencies"][key] = val
-
-        elif path == "go.mod" or path.endswith("/go.mod"):
-            info["language"] = "go"
-            info["framework"] = "go"
-
-        elif path == "Cargo.toml" or path.endswith("/Cargo.toml"):
-            info["language"] = "rust"
-
-        elif path == ".gitignore" or path.endswith("/.gitignore"):
-            info["has_gitignore"] = True
-            info["gitignore_entries"] = [
-                line.strip()
-                for line in content.splitlines()
-                if line.strip() and not line.startswith("#")
-            ]
-
-    if not info["language"]:
-        ext_counts: dict[str, int] = {}
-        for f in files:
-            ext = os.path.splitext(f["path"])[1]
-            ext_counts[ext] = ext_counts.get(ext, 0) + 1
-        ext_map = {
-            ".py": "python", ".js": "javascript", ".ts": "typescript",
-            ".go": "go", ".rs": "rust", ".rb": "ruby", ".php": "php", ".java": "java",
-        }
-        if ext_counts:
-            top_ext = max(ext_counts, key=ext_counts.get)
-            info["language"] = ext_map.get(top_ext, "unknown")
 
-    return info
+async def load_uploaded_files(
+    db,
+    assessment_id: str,
+    ingest: IngestStats | None = None,
+) -> tuple[list[dict], str | None]:
+    """
+    The files saved by save_uploaded_files. Stored lockfiles are written back
+    under CLONE_DIR/<assessment_id>, whose path is returned for the
+    dependency graph (None if there are none).
+    """
+    result = await db.execute(
+        select(UploadedFile)
+        .where(UploadedFile.assessment_id == assessment_id)
+        .order_by(UploadedFile.path)
+    )
+    rows = [(row.path, row.sha256, row.size, row.lockfile) for row in result.scalars()]
+    root = os.path.join(settings.CLONE_DIR, assessment_id)
+    return await asyncio.to_thread(_get_blobs, rows, root, ingest if ingest is not None else IngestStats())
+
+
+def _get_blobs(rows: list[tuple], root: str, ingest: IngestStats) -> tuple[list[dict], str | None]:
+    files = []
+    has_lockfiles = False
+    for path, digest, size, lockfile in rows:
+        try:
+            if lockfile:
+                target = os.path.join(root, *path.split("/"))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                blob_store.copy_to(digest, target)
+                has_lockfiles = True
+            else:
+                content = blob_store.get(digest).decode("utf-8", "surrogatepass")
+                ingest.read(size)
+                files.append({"path": path, "content": content})
+        except FileNotFoundError:
+            print(f"[lightweight_scanner] Blob {digest} for {path} is missing; skipping")
+            ingest.skip(path, "missing_blob")
+    return files, root if has_lockfiles else None
+
+
+async def delete_uploaded_files(db, assessment_id: str) -> set[str]:
+    """
+    Delete an assessment's UploadedFile rows and return the digests no other
+    assessment references. Remove those from the blob store only after the
+    transaction commits (remove_orphaned_blobs).
+    """
+    result = await db.execute(
+        select(UploadedFile.sha256).where(UploadedFile.assessment_id == assessment_id)
+    )
+    digests = set(result.scalars())
+    if not digests:
+        return set()
+    await db.execute(delete(UploadedFile).where(UploadedFile.assessment_id == assessment_id))
+    result = await db.execute(
+        select(UploadedFile.sha256).where(UploadedFile.sha256.in_(digests)).distinct()
+    )
+    return digests - set(result.scalars())
+
+
+async def remove_orphaned_blobs(db, digests: set[str]):
+    """
+    Remove blobs found unreferenced by delete_uploaded_files, after its
+    transaction committed. An upload of the same content may have committed
+    a new reference in between, so each blob is first renamed aside, then
+    the references are checked again: blobs referenced by then are put back,
+    the rest are deleted. An upload committing after the check finds its
+    blob gone and stores it again (save_uploaded_files).
+    """
+    tombstones = await asyncio.to_thread(blob_store.retire, digests)
+    if not tombstones:
+        return
+    result = await db.execute(
+        select(UploadedFile.sha256).where(UploadedFile.sha256.in_(list(tombstones))).distinct()
+    )
+    await asyncio.to_thread(blob_store.finish_delete, tombstones, set(result.scalars()))
+
+
+def cleanup_clone(assessment_id: str):
+    clone_dir = os.path.join(settings.CLONE_DIR, assessment_id)
+    shutil.rmtree(clone_dir, ignore_errors=True)
+
+
+def detect_project_info(files: list[dict]) -> dict:
+    """
+    Detect framework, language, and dependency info from project files.
+    Each manifest becomes its own sub-project (see api.services.workspace);
+    the returned dict is the merged view plus `projects` and `workspace`.
+    """
+    return build_workspace(files).project_info(files)
@@ -0,0 +1,257 @@
+"""
+Shared LLM provider used by every model call site (agents, the lightweight
+LLM scanner and finding analysis).
+
+Callers go through `generate()` instead of building their own client:
+
+    response = await llm.generate("finding_analysis", prompt, usage=usage)
+
+- One provider per process, chosen by LLM_PROVIDER: "gemini" keeps a single
+  `genai.Client` (and its connection pool) for the life of the process;
+  "fake" answers locally without a key, for tests and offline runs.
+  `set_provider()` swaps in any object with the same `generate_content`
+  and `aclose` methods.
+- Every call first waits for budget from the shared rate limiter
+  (LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE, api.services.rate_limiter).
+  `key` (the assessment id) gets a fair share of it, and `interactive` calls
+  go ahead of scans. At most LLM_MAX_CONCURRENT calls are in flight.
+- 429s, 5xx and transport errors are retried up to LLM_MAX_RETRIES times
+  with full-jitter exponential backoff, honouring Retry-After when the
+  provider sends one. A 429 also throttles the limiter for everyone.
+- Latency, tokens and retries are recorded on /metrics by caller, and added
+  to the caller's `LLMUsage` when one is passed.
+"""
+
+import asyncio
+import inspect
+import random
+import time
+
+import httpx
+from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types
+
+from api.config import settings
+from api.services import telemetry
+from api.services.rate_limiter import RateLimiter
+
+# Rough allowance for the response when estimating a call's token cost; the
+# limiter is corrected with the reported usage afterwards.
+COMPLETION_TOKEN_ESTIMATE = 512
+
+
+class LLMUsage:
+    """Running totals for one consumer, e.g. an agent or a scan."""
+
+    __slots__ = ("calls", "retries", "prompt_tokens", "completion_tokens")
+
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "llm_calls": self.calls,
+            "llm_retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+class GeminiProvider:
+    name = "gemini"
+
+    def __init__(self, api_key: str):
+        self._client = genai.Client(api_key=api_key)
+
+    async def generate_content(self, caller: str, model: str, contents, config):
+        return await self._client.aio.models.generate_content(model=model, contents=contents, config=config)
+
+    async def aclose(self):
+        await self._client.aio.aclose()
+
+
+class FakeProvider:
+    """
+    Answers from `respond(caller, contents, config)` instead of the network.
+    It may return a response, a string (wrapped as the response text), or an
+    awaitable of either. The default answers "[]": no LLM findings, agents
+    stop on their first turn and finding analysis falls back.
+    """
+
+    name = "fake"
+
+    def __init__(self, respond=None):
+        self._respond = respond or (lambda caller, contents, config: "[]")
+
+    async def generate_content(self, caller: str, model: str, contents, config):
+        result = self._respond(caller, contents, config)
+        if inspect.isawaitable(result):
+            result = await result
+        return text_response(result) if isinstance(result, str) else result
+
+    async def aclose(self):
+        return None
+
+
+def text_response(text: str) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))]
+    )
+
+
+_provider = None
+_semaphore = asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENT))
+limiter = RateLimiter(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE)
+
+
+def create_provider(kind: str) -> GeminiProvider | FakeProvider:
+    if kind == "gemini":
+        return GeminiProvider(settings.GEMINI_API_KEY)
+    if kind == "fake":
+        return FakeProvider()
+    raise ValueError(f"Unknown LLM_PROVIDER '{kind}'. Expected 'gemini' or 'fake'.")
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        _provider = create_provider(settings.LLM_PROVIDER)
+    return _provider
+
+
+def set_provider(provider):
+    """Replace the process-wide provider (tests, benchmarks); returns the previous one."""
+    global _provider
+    previous, _provider = _provider, provider
+    return previous
+
+
+def provider_name() -> str:
+    """Name of the configured provider, without creating it."""
+    return getattr(_provider, "name", None) or settings.LLM_PROVIDER
+
+
+def enabled() -> bool:
+    """Whether LLM calls can be made: a key for Gemini, always for other providers."""
+    if _provider is not None:
+        return True
+    return settings.LLM_PROVIDER != "gemini" or bool(settings.GEMINI_API_KEY)
+
+
+async def generate(
+    caller: str,
+    contents,
+    *,
+    config: types.GenerateContentConfig | None = None,
+    model: str | None = None,
+    usage: LLMUsage | None = None,
+    key: str | None = None,
+    interactive: bool = False,
+) -> types.GenerateContentResponse:
+    provider = get_provider()
+    model = model or settings.GEMINI_MODEL
+    estimate = estimate_tokens(contents, config) + COMPLETION_TOKEN_ESTIMATE
+    attempt = 0
+    while True:
+        await limiter.acquire(key or caller, estimate, interactive)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            async with _semaphore:
+                response = await provider.generate_content(caller, model, contents, config)
+            outcome = "ok"
+            break
+        except Exception as e:
+            reason = _retry_reason(e)
+            if reason is None or attempt >= settings.LLM_MAX_RETRIES:
+                raise
+            outcome = reason
+            delay = _backoff(attempt, e)
+            if reason == "rate_limited":
+                limiter.throttle()
+        finally:
+            telemetry.LLM_REQUEST_SECONDS.labels(caller, outcome).observe(time.perf_counter() - start)
+
+        attempt += 1
+        telemetry.LLM_RETRIES.labels(caller, reason).inc()
+        if usage is not None:
+            usage.retries += 1
+        print(f"[llm] {caller}: {reason}, retry {attempt}/{settings.LLM_MAX_RETRIES} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    actual = _record_usage(caller, response, usage)
+    if actual:
+        limiter.settle(estimate, actual)
+    return response
+
+
+async def aclose():
+    global _provider
+    if _provider is not None:
+        await _provider.aclose()
+        _provider = None
+
+
+def _retry_reason(exc: Exception) -> str | None:
+    if isinstance(exc, genai_errors.APIError):
+        if exc.code == 429:
+            return "rate_limited"
+        if exc.code and exc.code >= 500:
+            return "server_error"
+        return None
+    if isinstance(exc, httpx.TransportError):
+        return "transport_error"
+    return None
+
+
+def _backoff(attempt: int, exc: Exception) -> float:
+    retry_after = _retry_after(exc)
+    if retry_after is not None:
+        return min(retry_after, settings.LLM_RETRY_MAX_SECONDS)
+    ceiling = min(settings.LLM_RETRY_MAX_SECONDS, settings.LLM_RETRY_BASE_SECONDS * 2**attempt)
+    # Full jitter: concurrent callers that failed together spread out
+    # instead of retrying in lockstep.
+    return random.uniform(0, ceiling)
+
+
+def _retry_after(exc: Exception) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(contents, config: types.GenerateContentConfig | None = None) -> int:
+    """About four characters per token over the prompt, history and system instruction."""
+    chars = len(str(config.system_instruction or "")) if config is not None else 0
+    if isinstance(contents, str):
+        return (chars + len(contents)) // 4
+    for content in contents:
+        for part in getattr(content, "parts", None) or []:
+            if part.text:
+                chars += len(part.text)
+            elif part.function_call:
+                chars += len(str(part.function_call.args or ""))
+            elif part.function_response:
+                chars += len(str(part.function_response.response or ""))
+    return chars // 4
+
+
+def _record_usage(caller: str, response, usage: LLMUsage | None) -> int:
+    metadata = getattr(response, "usage_metadata", None)
+    prompt = (getattr(metadata, "prompt_token_count", None) or 0) if metadata else 0
+    completion = (getattr(metadata, "candidates_token_count", None) or 0) if metadata else 0
+    telemetry.LLM_TOKENS.labels(caller, "prompt").inc(prompt)
+    telemetry.LLM_TOKENS.labels(caller, "completion").inc(completion)
+    if usage is not None:
+        usage.calls += 1
+        usage.prompt_tokens += prompt
+        usage.completion_tokens += completion
+    return prompt + completion
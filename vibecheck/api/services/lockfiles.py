@@ -0,0 +1,381 @@
+"""
+Streaming lockfile parsers.
+
+Each parser reads a lockfile incrementally (line by line, or in fixed-size
+chunks for package-lock.json) and adds the resolved packages to a
+DependencyGraph, so multi-megabyte lockfiles never have to be loaded or
+decoded as a whole.
+"""
+
+import io
+import json
+import os
+import re
+from collections import deque
+from typing import Iterator, TextIO
+
+from api.utils.versions import normalize_package_name
+
+JSON_CHUNK_SIZE = 1 << 16
+
+_JSON_STRING, _JSON_PUNCT, _JSON_SCALAR = 1, 2, 3
+_JSON_TOKEN_RE = re.compile(
+    r'[\s,:]*(?:("[^"\\]*(?:\\.[^"\\]*)*")|([{}\[\]])|([^\s,:{}\[\]"]+))'
+)
+_JSON_LITERALS = {"true": True, "false": False, "null": None}
+
+_NPM_DEP_KEYS = {"dependencies", "optionalDependencies", "devDependencies", "peerDependencies"}
+_NON_REGISTRY_YARN = ("@workspace:", "@link:", "@portal:", "@file:")
+_NON_REGISTRY_POETRY = {"git", "directory", "file", "url"}
+
+
+class DependencyGraph:
+    """
+    Resolved packages per ecosystem, deduplicated on (normalized name, version),
+    with name-level dependency edges and the direct dependencies where the
+    lockfile or manifest records them.
+    """
+
+    def __init__(self):
+        self.nodes: dict[str, dict[tuple[str, str], tuple[str, str]]] = {}
+        self.edges: dict[str, dict[str, set[str]]] = {}
+        self.direct: dict[str, set[str]] = {}
+        self._reverse: dict[str, dict[str, set[str]]] = {}
+
+    def add(self, ecosystem: str, name: str, version: str, source: str):
+        key = (normalize_package_name(ecosystem, name), version)
+        self.nodes.setdefault(ecosystem, {}).setdefault(key, (name, source))
+
+    def add_edge(self, ecosystem: str, parent: str, child: str):
+        parent = normalize_package_name(ecosystem, parent)
+        child = normalize_package_name(ecosystem, child)
+        self.edges.setdefault(ecosystem, {}).setdefault(parent, set()).add(child)
+        self._reverse.pop(ecosystem, None)
+
+    def mark_direct(self, ecosystem: str, name: str):
+        self.direct.setdefault(ecosystem, set()).add(normalize_package_name(ecosystem, name))
+
+    def __iter__(self) -> Iterator[tuple[str, str, str, str]]:
+        """(ecosystem, name, version, lockfile path) for every resolved package."""
+        for ecosystem, nodes in self.nodes.items():
+            for (_, version), (name, source) in nodes.items():
+                yield ecosystem, name, version, source
+
+    def __len__(self) -> int:
+        return sum(len(nodes) for nodes in self.nodes.values())
+
+    def names(self, ecosystem: str) -> set[str]:
+        return {name for name, _ in self.nodes.get(ecosystem, {})}
+
+    def is_direct(self, ecosystem: str, name: str) -> bool | None:
+        """None when nothing is known about the ecosystem's direct dependencies."""
+        direct = self.direct.get(ecosystem)
+        if not direct:
+            return None
+        return normalize_package_name(ecosystem, name) in direct
+
+    def introduced_by(self, ecosystem: str, name: str, limit: int = 5) -> list[str]:
+        """Direct dependencies that pull `name` in, found by walking edges backwards."""
+        direct = self.direct.get(ecosystem) or set()
+        reverse = self._reverse.get(ecosystem)
+        if reverse is None:
+            reverse = {}
+            for parent, children in self.edges.get(ecosystem, {}).items():
+                for child in children:
+                    reverse.setdefault(child, set()).add(parent)
+            self._reverse[ecosystem] = reverse
+
+        start = normalize_package_name(ecosystem, name)
+        found, seen, queue = [], {start}, deque([start])
+        while queue and len(found) < limit:
+            for parent in sorted(reverse.get(queue.popleft(), ())):
+                if parent in seen:
+                    continue
+                seen.add(parent)
+                if parent in direct:
+                    found.append(parent)
+                    if len(found) >= limit:
+                        break
+                queue.append(parent)
+        return found
+
+
+def iter_json_leaves(fh: TextIO, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[tuple[list, object]]:
+    """
+    Yield (path, value) for every scalar in a JSON document, reading `fh` in
+    chunks. `path` holds the object keys from the root (None for array
+    positions) and is reused between yields, so copy it to keep it.
+    """
+    path: list = []
+    containers: list[str] = []
+    expect_key = False
+
+    for kind, token in _iter_json_tokens(fh, chunk_size):
+        if expect_key:
+            expect_key = False
+            if token == "}":
+                containers.pop()
+            else:
+                path.append(_decode_json_string(token))
+                continue
+        elif token == "{" and kind == _JSON_PUNCT:
+            containers.append("{")
+            expect_key = True
+            continue
+        elif token == "[" and kind == _JSON_PUNCT:
+            containers.append("[")
+            path.append(None)
+            continue
+        elif token == "]" and kind == _JSON_PUNCT:
+            containers.pop()
+            path.pop()
+        elif kind == _JSON_STRING:
+            yield path, _decode_json_string(token)
+        else:
+            yield path, _JSON_LITERALS[token] if token in _JSON_LITERALS else json.loads(token)
+
+        # A value just finished; inside an object the next token is a key.
+        if containers and containers[-1] == "{":
+            path.pop()
+            expect_key = True
+
+
+def _iter_json_tokens(fh: TextIO, chunk_size: int) -> Iterator[tuple[int, str]]:
+    buf, pos, eof = "", 0, False
+    while True:
+        match = _JSON_TOKEN_RE.match(buf, pos)
+        # A token touching the end of the buffer may continue in the next chunk.
+        if match is None or (not eof and match.end() == len(buf)):
+            if eof:
+                if buf[pos:].strip(" \t\r\n,:"):
+                    raise ValueError(f"Malformed JSON near offset {pos}")
+                return
+            chunk = fh.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        pos = match.end()
+        kind = match.lastindex
+        yield kind, match.group(kind)
+
+
+def _decode_json_string(token: str) -> str:
+    return json.loads(token) if "\\" in token else token[1:-1]
+
+
+def parse_package_lock(fh: TextIO, graph: DependencyGraph, source: str):
+    """package-lock.json / npm-shrinkwrap.json, lockfileVersion 1, 2 or 3."""
+    for path, value in iter_json_leaves(fh):
+        depth = len(path)
+        if depth < 3:
+            continue
+        if path[0] == "packages":
+            # v2/v3: "packages": {"node_modules/a/node_modules/b": {"version": ...}}
+            if depth == 3 and path[2] == "version" and isinstance(value, str):
+                name = _npm_name_from_install_path(path[1])
+                if name:
+                    graph.add("npm", name, value, source)
+            elif depth == 4 and path[2] in _NPM_DEP_KEYS:
+                if path[1] == "":
+                    graph.mark_direct("npm", path[3])
+                else:
+                    parent = _npm_name_from_install_path(path[1])
+                    if parent:
+                        graph.add_edge("npm", parent, path[3])
+        elif path[0] == "dependencies":
+            # v1: nested "dependencies": {"a": {"version": ..., "requires": {...}}}
+            if depth % 2 == 1 and path[-1] == "version" and path[-3] == "dependencies":
+                if isinstance(value, str) and not value.startswith(("file:", "git", "http")):
+                    graph.add("npm", path[-2], value, source)
+            elif depth % 2 == 0 and path[-2] == "requires":
+                graph.add_edge("npm", path[-3], path[-1])
+
+
+def _npm_name_from_install_path(install_path: str) -> str | None:
+    idx = install_path.rfind("node_modules/")
+    if idx < 0:
+        return None  # workspace package source directory, not an installed dependency
+    return install_path[idx + len("node_modules/"):]
+
+
+def parse_yarn_lock(fh: TextIO, graph: DependencyGraph, source: str):
+    """yarn.lock, both the classic v1 format and Berry's YAML flavour."""
+    names: list[str] = []
+    in_deps = False
+    for raw in fh:
+        line = raw.rstrip("\r\n")
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        indent = len(line) - len(line.lstrip())
+
+        if indent == 0:
+            names = _yarn_entry_names(stripped)
+            in_deps = False
+        elif indent == 2 and names:
+            key = stripped.split(" ", 1)[0].rstrip(":")
+            in_deps = key in _NPM_DEP_KEYS and stripped.endswith(":")
+            if key == "version":
+                version = stripped[len("version"):].lstrip(": ").strip('"')
+                for name in names:
+                    graph.add("npm", name, version, source)
+        elif indent >= 4 and in_deps and names:
+            dep = stripped.split(" ", 1)[0].rstrip(":").strip('"')
+            for name in names:
+                graph.add_edge("npm", name, dep)
+
+
+def _yarn_entry_names(header: str) -> list[str]:
+    names = []
+    for spec in header.rstrip(":").split(","):
+        spec = spec.strip().strip('"')
+        if not spec or spec == "__metadata" or any(tag in spec for tag in _NON_REGISTRY_YARN):
+            continue
+        at = spec.rfind("@")
+        name = spec[:at] if at > 0 else spec
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def _iter_toml_packages(fh: TextIO) -> Iterator[dict]:
+    """
+    Yield the simple fields of each [[package]] table in a poetry.lock or
+    Cargo.lock. Only string values, string arrays, [package.dependencies]
+    keys and [package.source] fields are kept.
+    """
+    entry: dict | None = None
+    subtable: str | None = None
+    array_key: str | None = None
+
+    for raw in fh:
+        line = raw.strip()
+        if array_key is not None:
+            if line.startswith("]"):
+                array_key = None
+            elif line and entry is not None:
+                entry[array_key].append(line.rstrip(",").strip('"'))
+            continue
+        if not line or line.startswith("#"):
+            continue
+        if line == "[[package]]":
+            if entry is not None:
+                yield entry
+            entry, subtable = {}, None
+            continue
+        if line.startswith("["):
+            subtable = line.strip("[]").strip()
+            if entry is not None and not subtable.startswith("package."):
+                yield entry
+                entry = None
+            continue
+        if entry is None or "=" not in line:
+            continue
+
+        key, value = (part.strip() for part in line.split("=", 1))
+        key = key.strip('"')
+        if subtable is None:
+            if value.startswith("["):
+                if value.endswith("]"):
+                    entry[key] = [v.strip().strip('"') for v in value[1:-1].split(",") if v.strip()]
+                else:
+                    entry[key] = []
+                    array_key = key
+            else:
+                entry[key] = value.strip('"')
+        elif subtable == "package.dependencies":
+            entry.setdefault("dependencies", []).append(key)
+        elif subtable == "package.source":
+            entry[f"source.{key}"] = value.strip('"')
+
+    if entry is not None:
+        yield entry
+
+
+def parse_poetry_lock(fh: TextIO, graph: DependencyGraph, source: str):
+    for package in _iter_toml_packages(fh):
+        name, version = package.get("name"), package.get("version")
+        if not name or not version or package.get("source.type") in _NON_REGISTRY_POETRY:
+            continue
+        graph.add("PyPI", name, version, source)
+        for dep in package.get("dependencies", []):
+            graph.add_edge("PyPI", name, dep)
+
+
+def parse_cargo_lock(fh: TextIO, graph: DependencyGraph, source: str):
+    for package in _iter_toml_packages(fh):
+        name, version = package.get("name"), package.get("version")
+        if not name or not version:
+            continue
+        # Dependencies entries look like "serde", "serde 1.0.1" or "serde 1.0.1 (registry+...)".
+        deps = [dep.split(" ", 1)[0] for dep in package.get("dependencies", [])]
+        if "source" not in package:
+            # Workspace member: what it depends on is a direct dependency.
+            for dep in deps:
+                graph.mark_direct("crates.io", dep)
+            continue
+        if package["source"].startswith("registry+"):
+            graph.add("crates.io", name, version, source)
+        for dep in deps:
+            graph.add_edge("crates.io", name, dep)
+
+
+def parse_go_sum(fh: TextIO, graph: DependencyGraph, source: str):
+    for line in fh:
+        parts = line.split()
+        if len(parts) >= 2:
+            graph.add("Go", parts[0], parts[1].removesuffix("/go.mod"), source)
+
+
+LOCKFILE_PARSERS = {
+    "package-lock.json": parse_package_lock,
+    "npm-shrinkwrap.json": parse_package_lock,
+    "yarn.lock": parse_yarn_lock,
+    "poetry.lock": parse_poetry_lock,
+    "Cargo.lock": parse_cargo_lock,
+    "go.sum": parse_go_sum,
+}
+
+
+def find_lockfiles(root: str, skip_dirs: set[str] = frozenset()) -> list[str]:
+    """Lockfile paths under `root`, relative to it."""
+    found = []
+    for dirpath, dirs, filenames in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in skip_dirs]
+        for filename in filenames:
+            if filename in LOCKFILE_PARSERS:
+                found.append(os.path.relpath(os.path.join(dirpath, filename), root))
+    return sorted(found)
+
+
+def build_dependency_graph(
+    files: list,
+    root: str | None = None,
+    skip_dirs: set[str] = frozenset(),
+) -> DependencyGraph:
+    """
+    Parse every lockfile in the project. With `root` (a cloned repo) the
+    lockfiles are streamed from disk, which also covers ones too large to be
+    read into `files`; otherwise the in-memory file contents are used.
+    """
+    graph = DependencyGraph()
+    if root:
+        sources = (
+            (path, lambda path=path: open(os.path.join(root, path), encoding="utf-8", errors="replace"))
+            for path in find_lockfiles(root, skip_dirs)
+        )
+    else:
+        sources = (
+            (f["path"], lambda f=f: io.StringIO(f["content"]))
+            for f in files
+            if f["path"].rsplit("/", 1)[-1] in LOCKFILE_PARSERS
+        )
+
+    for path, opener in sources:
+        parser = LOCKFILE_PARSERS[path.replace(os.sep, "/").rsplit("/", 1)[-1]]
+        try:
+            with opener() as fh:
+                parser(fh, graph, path.replace(os.sep, "/"))
+        except (OSError, ValueError, IndexError, KeyError) as e:
+            print(f"[lockfiles] Skipping unparseable lockfile {path}: {e}")
+    return graph
@@ -0,0 +1,171 @@
+"""
+Async token-bucket limiter shared by every LLM call (api.services.llm).
+
+Two buckets are consulted for each call: requests per minute and tokens per
+minute. Either can be disabled with 0. A bucket holds BURST_SECONDS worth of
+its rate, so a quiet process can burst briefly but any minute stays close
+to the quota.
+
+Callers that cannot go immediately wait in a queue keyed by priority and by
+a fairness key (the assessment id). Interactive calls are always served
+before background ones. Within a priority, keys take turns one call at a
+time, so one scan with many agents cannot starve another scan queued
+behind it. The head of the queue waits for the budget it needs rather than
+being overtaken by smaller calls.
+
+Token costs are estimated before the call and corrected with `settle()` once
+the provider reports usage. `throttle()` empties the request bucket after a
+provider 429, so every waiter backs off, not only the caller that hit it.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+from api.services import telemetry
+
+BURST_SECONDS = 10.0
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "level", "updated")
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * BURST_SECONDS) if per_minute > 0 else 0.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def refill(self, now: float):
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def cost(self, amount: float) -> float:
+        # A call larger than the whole bucket would never fit; it waits for
+        # a full bucket instead.
+        return min(amount, self.capacity)
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` is available (after a refill)."""
+        if self.unlimited or self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        # `amount` is negative when settle() refunds an over-estimate; the
+        # refund never lifts the bucket above its capacity.
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level - amount)
+
+
+class _Waiter:
+    __slots__ = ("future", "tokens")
+
+    def __init__(self, future: asyncio.Future, tokens: float):
+        self.future = future
+        self.tokens = tokens
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._queues: dict[str, OrderedDict[str, deque[_Waiter]]] = {
+            INTERACTIVE: OrderedDict(),
+            BACKGROUND: OrderedDict(),
+        }
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def unlimited(self) -> bool:
+        return self.requests.unlimited and self.tokens.unlimited
+
+    async def acquire(self, key: str, tokens: float, interactive: bool = False) -> float:
+        """Wait for budget for one call of about `tokens` tokens; returns seconds waited."""
+        if self.unlimited:
+            return 0.0
+        priority = INTERACTIVE if interactive else BACKGROUND
+        start = time.monotonic()
+        if not self._waiting() and self._try_take(tokens, start):
+            telemetry.LLM_QUEUE_SECONDS.labels(priority).observe(0.0)
+            return 0.0
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens)
+        self._queues[priority].setdefault(key, deque()).append(waiter)
+        queued = telemetry.LLM_QUEUED.labels(priority)
+        queued.inc()
+        try:
+            self._dispatch()
+            await waiter.future
+        finally:
+            queued.dec()
+            if not waiter.future.done():
+                # Cancelled while queued; let the next waiter go.
+                waiter.future.cancel()
+                self._dispatch()
+        waited = time.monotonic() - start
+        telemetry.LLM_QUEUE_SECONDS.labels(priority).observe(waited)
+        return waited
+
+    def settle(self, estimated: float, actual: float):
+        """Correct the token bucket once the real usage of a call is known."""
+        self.tokens.take(self.tokens.cost(actual) - self.tokens.cost(estimated))
+
+    def throttle(self):
+        """The provider rejected a call for quota: stop granting until the bucket refills."""
+        self.requests.refill(time.monotonic())
+        self.requests.level = min(self.requests.level, 0.0)
+
+    def _waiting(self) -> bool:
+        return any(self._queues.values())
+
+    def _try_take(self, tokens: float, now: float) -> bool:
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        cost = self.tokens.cost(tokens)
+        if self.requests.delay(1) or self.tokens.delay(cost):
+            return False
+        self.requests.take(1)
+        self.tokens.take(cost)
+        return True
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while True:
+            head = self._head()
+            if head is None:
+                return
+            queue, key, waiter = head
+            now = time.monotonic()
+            if not self._try_take(waiter.tokens, now):
+                delay = max(self.requests.delay(1), self.tokens.delay(self.tokens.cost(waiter.tokens)))
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            queue[key].popleft()
+            if queue[key]:
+                queue.move_to_end(key)
+            else:
+                del queue[key]
+            waiter.future.set_result(None)
+
+    def _head(self) -> tuple[OrderedDict, str, _Waiter] | None:
+        for priority in (INTERACTIVE, BACKGROUND):
+            queue = self._queues[priority]
+            while queue:
+                key, waiters = next(iter(queue.items()))
+                while waiters and waiters[0].future.done():
+                    waiters.popleft()
+                if waiters:
+                    return queue, key, waiters[0]
+                del queue[key]
+        return None
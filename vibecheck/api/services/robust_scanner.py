@@ -6,10 +6,11 @@ from urllib.parse import urlsplit
 from sqlalchemy import func, select
 
 from api.agents import AGENT_MAP
-from api.agents.http_tools import http_request
-from api.config import settings
+from api.agents.http_tools import http_request, make_transport
 from api.models.assessment import Assessment
 from api.models.finding import Finding
+from api.services import llm, telemetry
+from api.services.scan_metrics import ScanMetrics
 
 
 DEPTH_DISCOVERY_LIMITS = {
@@ -95,7 +96,7 @@ def _extract_paths_from_body(body_preview: str) -> list[str]:
     return sorted(p for p in candidates if not p.lower().endswith(excluded_suffixes))
 
 
-async def _build_coverage_context(target_url: str, depth: str) -> dict:
+async def _build_coverage_context(target_url: str, depth: str, transport=None) -> dict:
     limits = DEPTH_DISCOVERY_LIMITS.get(depth, DEPTH_DISCOVERY_LIMITS["standard"])
     initial_queue = ROBUST_COMMON_PATHS[: limits["seed_paths"]]
 
@@ -120,8 +121,9 @@ async def _build_coverage_context(target_url: str, depth: str) -> dict:
     probed = 0
     while queue and probed < limits["max_requests"]:
         path = queue.pop(0)
-        result = await http_request(target_url, "GET", path)
+        result = await http_request(target_url, "GET", path, transport=transport)
         probed += 1
+        telemetry.AGENT_HTTP_PROBES.labels("crawler").inc()
 
         if "error" in result:
             continue
@@ -153,40 +155,66 @@ async def run_robust_scan(
     agent_names: list[str],
     depth: str,
     db_factory,
+    tunnel_session_id: str | None = None,
 ):
     """
     Main robust scan orchestrator. Runs as a FastAPI BackgroundTask.
     Creates its own DB session since background tasks outlive the request.
+    When tunnel_session_id is set, every probe goes through that tunnel.
     """
+    transport = make_transport(tunnel_session_id)
+    try:
+        with telemetry.scan_running("robust") as outcome:
+            outcome["status"] = await _run_robust_scan(
+                assessment_id, target_url, agent_names, depth, db_factory, transport
+            )
+    finally:
+        await transport.aclose()
+
+
+async def _run_robust_scan(
+    assessment_id: str,
+    target_url: str,
+    agent_names: list[str],
+    depth: str,
+    db_factory,
+    transport,
+) -> str:
     async with db_factory() as db:
         assessment = await db.get(Assessment, assessment_id)
         if not assessment:
-            return
+            return "missing"
 
+        metrics = ScanMetrics("robust")
         try:
-            if not settings.GEMINI_API_KEY:
+            if not llm.enabled():
                 assessment.status = "failed"
                 assessment.error_type = "GEMINI_API_KEY_MISSING"
                 assessment.error_message = (
                     "GEMINI_API_KEY is not configured. Robust mode requires Gemini credentials."
                 )
                 await db.commit()
-                return
+                return assessment.status
 
             assessment.status = "scanning"
             await db.commit()
 
-            health_check = await http_request(target_url, "GET", "/")
+            with metrics.span("health_check"):
+                health_check = await http_request(target_url, "GET", "/", transport=transport)
             if "error" in health_check:
                 assessment.status = "failed"
                 assessment.error_type = "TARGET_UNREACHABLE"
                 assessment.error_message = (
                     f"Cannot reach {target_url}: {health_check.get('message', health_check.get('error', 'request failed'))}"
                 )[:500]
+                assessment.metrics = metrics.as_dict()
                 await db.commit()
-                return
+                return assessment.status
 
-            coverage_context = await _build_coverage_context(target_url, depth)
+            with metrics.span("crawl") as stage:
+                coverage_context = await _build_coverage_context(target_url, depth, transport)
+                stage["requests"] = coverage_context["probed_count"]
+                stage["reachable"] = len(coverage_context["reachable_paths"])
 
             succeeded_agents = 0
             failed_agents: list[str] = []
@@ -197,16 +225,22 @@ async def run_robust_scan(
                     continue
 
                 try:
-                    agent = agent_class(
-                        assessment_id=assessment_id,
-                        target_url=target_url,
-                        depth=depth,
-                        db_session=db,
-                        coverage_context=coverage_context,
-                    )
-                    await agent.run()
-                    succeeded_agents += 1
-                    await db.commit()
+                    with metrics.span(f"agent.{agent_name}") as stage:
+                        agent = agent_class(
+                            assessment_id=assessment_id,
+                            target_url=target_url,
+                            depth=depth,
+                            db_session=db,
+                            coverage_context=coverage_context,
+                            transport=transport,
+                        )
+                        findings = await agent.run()
+                        stage["steps"] = agent.step_count
+                        stage["http_requests"] = agent.http_request_count
+                        stage["findings"] = len(findings)
+                        stage.update(agent.usage.as_dict())
+                        succeeded_agents += 1
+                        await db.commit()
                 except Exception as e:
                     print(f"[robust_scanner] Agent '{agent_name}' failed: {e}")
                     traceback.print_exc()
@@ -221,16 +255,18 @@ async def run_robust_scan(
                 assessment.error_message = (
                     f"All robust agents failed. Check GEMINI_MODEL/GEMINI_API_KEY and logs. Details: {details}"
                 )[:500]
+                assessment.metrics = metrics.as_dict()
                 await db.commit()
-                return
+                return assessment.status
 
-            count_query = (
-                select(Finding.severity, func.count(Finding.id))
-                .where(Finding.assessment_id == assessment_id)
-                .group_by(Finding.severity)
-            )
-            result = await db.execute(count_query)
-            severity_counts = dict(result.all())
+            with metrics.span("finalize"):
+                count_query = (
+                    select(Finding.severity, func.count(Finding.id))
+                    .where(Finding.assessment_id == assessment_id)
+                    .group_by(Finding.severity)
+                )
+                result = await db.execute(count_query)
+                severity_counts = dict(result.all())
 
             finding_counts = {
                 "critical": severity_counts.get("critical", 0),
@@ -244,10 +280,14 @@ async def run_robust_scan(
             assessment.finding_counts = finding_counts
             assessment.status = "complete"
             assessment.completed_at = datetime.utcnow()
+            assessment.metrics = metrics.as_dict()
             await db.commit()
 
         except Exception as e:
             assessment.status = "failed"
             assessment.error_type = "SCAN_ERROR"
             assessment.error_message = str(e)[:500]
+            assessment.metrics = metrics.as_dict()
             await db.commit()
+
+        return assessment.status
@@ -0,0 +1,46 @@
+"""
+Declarative rule packs for the static scanners.
+
+Rules live in JSON (or YAML, with PyYAML installed) packs: the built-in ones
+in `packs/`, plus any directories listed in RULE_PACK_DIRS, loaded in that
+order. The registry is compiled once per process.
+"""
+
+import os
+
+from api.config import settings
+from api.services.rules.registry import (
+    BUILTIN_PACK_DIR,
+    RULE_FORMAT_VERSION,
+    Rule,
+    RuleRegistry,
+    load_registry,
+)
+
+_registry: RuleRegistry | None = None
+
+
+def get_registry() -> RuleRegistry:
+    global _registry
+    if _registry is None:
+        extra = [d for d in settings.RULE_PACK_DIRS.split(os.pathsep) if d.strip()]
+        _registry = load_registry([BUILTIN_PACK_DIR, *extra])
+    return _registry
+
+
+def reload_registry() -> RuleRegistry:
+    """Drop the compiled registry so the next get_registry() re-reads the packs."""
+    global _registry
+    _registry = None
+    return get_registry()
+
+
+__all__ = [
+    "BUILTIN_PACK_DIR",
+    "RULE_FORMAT_VERSION",
+    "Rule",
+    "RuleRegistry",
+    "get_registry",
+    "load_registry",
+    "reload_registry",
+]
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import re
+
+try:
+    import yaml
+except ImportError:  # YAML packs are optional; JSON packs always work
+    yaml = None
+
+# Bumped whenever the meaning of a rule field changes, so cached results keyed
+# on the ruleset hash are invalidated even if the pack files are identical.
+RULE_FORMAT_VERSION = 1
+
+BUILTIN_PACK_DIR = os.path.join(os.path.dirname(__file__), "packs")
+
+_FLAGS = {
+    "IGNORECASE": re.IGNORECASE,
+    "MULTILINE": re.MULTILINE,
+    "DOTALL": re.DOTALL,
+}
+_SCOPES = {"line", "file"}
+_ENGINES = {"regex", "python_ast"}
+
+
+class Rule:
+    """One compiled rule. `spec` is the declarative source it was built from."""
+
+    __slots__ = (
+        "id", "scanner", "scope", "pattern", "absent", "severity", "category",
+        "title", "description", "remediation", "extensions", "filenames",
+        "path_regex", "engine", "check", "options", "pack", "order", "spec",
+    )
+
+    def __init__(self, spec: dict, pack: str, order: int):
+        self.spec = spec
+        self.id = spec["id"]
+        self.scanner = spec["scanner"]
+        self.scope = spec.get("scope", "line")
+        if self.scope not in _SCOPES:
+            raise ValueError(f"unknown scope '{self.scope}'")
+
+        flags = 0
+        for name in spec.get("flags", []):
+            flags |= _FLAGS[name]
+        self.pattern = re.compile(spec["pattern"], flags) if spec.get("pattern") else None
+        self.absent = re.compile(spec["absent"], flags) if spec.get("absent") else None
+        # python_ast rules run a named check from scanners/python_ast.py; their
+        # `pattern` is the line regex for .py files that do not parse and for
+        # the rule's other extensions.
+        self.engine = spec.get("engine", "regex")
+        if self.engine not in _ENGINES:
+            raise ValueError(f"unknown engine '{self.engine}'")
+        self.check = spec.get("check")
+        if self.engine == "python_ast":
+            if not self.check:
+                raise ValueError("python_ast rules need 'check'")
+            if self.scope != "line":
+                raise ValueError("python_ast rules must use scope 'line'")
+        elif self.pattern is None and (self.scope == "line" or self.absent is None):
+            raise ValueError("needs 'pattern' ('absent' alone is only valid with scope 'file')")
+
+        self.severity = spec.get("severity", "medium")
+        self.category = spec.get("category", "")
+        self.title = spec.get("title", "")
+        self.description = spec.get("description", "")
+        self.remediation = spec.get("remediation", "")
+        self.extensions = set(spec.get("extensions", []))
+        self.filenames = set(spec.get("filenames", []))
+        self.path_regex = re.compile(spec["path_regex"]) if spec.get("path_regex") else None
+        if not (self.extensions or self.filenames or self.path_regex):
+            raise ValueError("needs 'extensions', 'filenames' or 'path_regex'")
+        if self.engine == "python_ast" and self.pattern is None and (
+            self.extensions - {".py"} or self.filenames or self.path_regex
+        ):
+            raise ValueError("python_ast rules targeting non-.py files need 'pattern'")
+        # Scanner-specific extras (e.g. secret_type) are passed through untouched.
+        self.options = spec.get("options", {})
+        self.pack = pack
+        self.order = order
+
+    def matches_file(self, content: str) -> re.Match | bool:
+        """File-scope check: `pattern` found, or `absent` not found."""
+        if self.pattern is not None:
+            match = self.pattern.search(content)
+            if match:
+                return match
+        return self.absent is not None and not self.absent.search(content)
+
+
+class RuleRegistry:
+    """
+    Compiled rules with dispatch tables per scanner: by extension, by exact
+    filename and by path regex. `rules_for` never returns a rule whose target
+    does not cover the file, so e.g. Python-only rules are not evaluated
+    against .tsx files.
+    """
+
+    def __init__(self, rules: list[Rule], packs: list[dict]):
+        self.rules = rules
+        self.packs = packs
+        self._by_ext: dict[str, dict[str, list[Rule]]] = {}
+        self._by_name: dict[str, dict[str, list[Rule]]] = {}
+        self._wildcard: dict[str, list[Rule]] = {}
+        self._by_path: dict[str, list[Rule]] = {}
+        self._dispatch_cache: dict[tuple[str, str | None], tuple[Rule, ...]] = {}
+
+        for rule in rules:
+            if "*" in rule.extensions:
+                self._wildcard.setdefault(rule.scanner, []).append(rule)
+            for ext in rule.extensions - {"*"}:
+                self._by_ext.setdefault(rule.scanner, {}).setdefault(ext, []).append(rule)
+            for name in rule.filenames:
+                self._by_name.setdefault(rule.scanner, {}).setdefault(name, []).append(rule)
+            if rule.path_regex is not None:
+                self._by_path.setdefault(rule.scanner, []).append(rule)
+
+        canonical = json.dumps(
+            [RULE_FORMAT_VERSION, [rule.spec for rule in rules]],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        self.ruleset_hash = f"v{RULE_FORMAT_VERSION}-{hashlib.sha256(canonical.encode()).hexdigest()[:16]}"
+
+    def rules_for(self, scanner: str, path: str) -> tuple[Rule, ...]:
+        """Rules of `scanner` that apply to `path`, in pack definition order."""
+        name = path.rsplit("/", 1)[-1]
+        ext = "." + name.rsplit(".", 1)[-1] if "." in name else ""
+        by_ext = self._by_ext.get(scanner, {})
+        # Extensions no rule targets share one entry, so the cache is bounded
+        # by the rule packs, not by the files scanned.
+        key = (scanner, ext if ext in by_ext else None)
+        static = self._dispatch_cache.get(key)
+        if static is None:
+            found = {
+                rule.id: rule
+                for rule in (*self._wildcard.get(scanner, ()), *by_ext.get(ext, ()))
+            }
+            static = tuple(sorted(found.values(), key=lambda r: r.order))
+            self._dispatch_cache[key] = static
+
+        extra = [r for r in self._by_name.get(scanner, {}).get(name, ()) if r not in static]
+        for rule in self._by_path.get(scanner, ()):
+            if rule not in static and rule not in extra and rule.path_regex.search(path):
+                extra.append(rule)
+        if not extra:
+            return static
+        return tuple(sorted((*static, *extra), key=lambda r: r.order))
+
+    def get(self, rule_id: str) -> Rule | None:
+        for rule in self.rules:
+            if rule.id == rule_id:
+                return rule
+        return None
+
+
+def load_registry(pack_dirs: list[str]) -> RuleRegistry:
+    """
+    Load every .json (and, with PyYAML installed, .yaml/.yml) pack from
+    `pack_dirs` in order. A rule whose id was already loaded replaces the
+    earlier definition; `"enabled": false` removes it.
+    """
+    specs: dict[str, tuple[dict, str]] = {}
+    packs = []
+    for directory in pack_dirs:
+        if not os.path.isdir(directory):
+            print(f"[rules] Rule pack directory not found: {directory}")
+            continue
+        for filename in sorted(os.listdir(directory)):
+            pack = _read_pack(os.path.join(directory, filename))
+            if pack is None:
+                continue
+            pack_name = pack.get("pack", filename)
+            packs.append({"pack": pack_name, "version": str(pack.get("version", "0")), "path": directory})
+            for spec in pack.get("rules", []):
+                if spec.get("id") and spec.get("enabled", True) is False:
+                    specs.pop(spec["id"], None)
+                    continue
+                if not spec.get("id") or not spec.get("scanner"):
+                    print(f"[rules] Skipping rule without id/scanner in {filename}")
+                    continue
+                specs.pop(spec["id"], None)
+                specs[spec["id"]] = (spec, pack_name)
+
+    rules = []
+    for order, (spec, pack_name) in enumerate(specs.values()):
+        try:
+            rules.append(Rule(spec, pack_name, order))
+        except (KeyError, ValueError, re.error) as e:
+            print(f"[rules] Skipping invalid rule {spec['id']} from {pack_name}: {e}")
+    return RuleRegistry(rules, packs)
+
+
+def _read_pack(path: str) -> dict | None:
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            print(f"[rules] PyYAML not installed, skipping {path}")
+            return None
+        with open(path, encoding="utf-8") as fh:
+            return yaml.safe_load(fh)
+    return None
@@ -0,0 +1,79 @@
+"""
+Per-run stage timings for the scan pipelines.
+
+A ScanMetrics is created at the start of a run and each stage is wrapped in a
+span:
+
+    metrics = ScanMetrics("lightweight")
+    with metrics.span("scanner.pattern") as stage:
+        findings = pattern_scanner.scan(files)
+        stage["findings"] = len(findings)
+
+Spans are plain context managers, so they wrap awaits as well. Each records
+its start offset and duration in milliseconds plus whatever counts the caller
+puts on the yielded dict; a span left by an exception is marked "error". The
+result of `as_dict()` is stored on Assessment.metrics and served by
+GET /v1/assessments/{id}/metrics. Stage durations also feed the
+vibecheck_scan_stage_duration_seconds histogram on /metrics.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+from api.services.telemetry import SCAN_STAGE_SECONDS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class ScanMetrics:
+    __slots__ = ("mode", "stages", "_start")
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.stages: list[dict] = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, **counts):
+        start = time.perf_counter()
+        # Appended on entry so stages are listed in start order, with a
+        # nested span after the one enclosing it.
+        stage = {"name": name, "offset_ms": _ms(start - self._start), **counts}
+        self.stages.append(stage)
+        try:
+            yield stage
+        except BaseException:
+            stage["error"] = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stage["duration_ms"] = _ms(elapsed)
+            SCAN_STAGE_SECONDS.labels(self.mode, name).observe(elapsed)
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": _ms(time.perf_counter() - self._start),
+            "stages": [dict(stage) for stage in self.stages],
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def peak_rss_mb() -> float | None:
+    """
+    High-water mark of this process's resident memory. Scans share the API
+    process, so this is the peak across everything it has run so far, not
+    the current scan alone; None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
@@ -1,9 +1,10 @@
+import asyncio
 import json
+import os
 import time
 
-from google import genai
-
 from api.config import settings
+from api.services import llm
 
 LOG_PATH = r"c:\Users\Azeem\Workshop\API Project\debug-3e1901.log"
 
@@ -26,6 +27,11 @@ def _agent_log(hypothesis_id: str, location: str, message: str, data: dict):
         # Logging must never break the app
         pass
 
+CODE_EXTENSIONS = {
+    ".py", ".js", ".ts", ".jsx", ".tsx", ".mjs", ".cjs", ".java", ".go", ".rs",
+    ".rb", ".php", ".vue", ".svelte",
+}
+
 PRIORITY_KEYWORDS = [
     "route",
     "api",
@@ -40,9 +46,20 @@ PRIORITY_KEYWORDS = [
 ]
 
 
-async def scan(files: list[dict], project_info: dict) -> list[dict]:
-    """Use an LLM (Gemini) to perform contextual security analysis."""
-    if not settings.GEMINI_API_KEY:
+async def scan(
+    files: list[dict],
+    project_info: dict,
+    usage: llm.LLMUsage | None = None,
+    key: str | None = None,
+) -> list[dict]:
+    """
+    Use an LLM (Gemini) to perform contextual security analysis. In a
+    multi-project workspace each sub-project is sent as its own chunk, with
+    up to GEMINI_MAX_CONCURRENT_CHUNKS requests in flight. Calls go through
+    the shared provider (api.services.llm); token usage is added to `usage`
+    and `key` (the assessment id) is the rate limiter's fairness key.
+    """
+    if not llm.enabled():
         # #region agent log
         _agent_log(
             "A",
@@ -53,9 +70,63 @@ async def scan(files: list[dict], project_info: dict) -> list[dict]:
         # #endregion
         return []
 
+    chunks = _project_chunks(files, project_info)
+    if not chunks:
+        # #region agent log
+        _agent_log(
+            "B",
+            "claude_scanner.py:scan",
+            "No files selected for LLM scan",
+            {"total_files": len(files)},
+        )
+        # #endregion
+        return []
+
+    semaphore = asyncio.Semaphore(max(1, settings.GEMINI_MAX_CONCURRENT_CHUNKS))
+    results = await asyncio.gather(
+        *(_scan_chunk(semaphore, usage, key, *chunk) for chunk in chunks)
+    )
+
+    findings = [f for chunk_findings in results for f in chunk_findings]
+    # #region agent log
+    _agent_log(
+        "E",
+        "claude_scanner.py:scan",
+        "Parsed LLM findings",
+        {"count": len(findings), "chunks": len(chunks)},
+    )
+    # #endregion
+    return findings
+
+
+def _project_chunks(files: list[dict], project_info: dict) -> list[tuple[str, str, str, str]]:
+    """(codebase, language, framework, project path) per chunk to send."""
+    workspace = project_info.get("workspace")
+    if workspace and len(workspace.projects) > 1:
+        groups = [
+            (p.files, p.project_info(workspace))
+            for p in workspace.projects
+            if any(os.path.splitext(f["path"])[1] in CODE_EXTENSIONS for f in p.files)
+        ]
+    else:
+        groups = [(files, project_info)]
+
+    chunks = []
+    for group_files, info in groups:
+        codebase = _select_codebase(group_files)
+        if codebase:
+            chunks.append((
+                codebase,
+                info.get("language") or "unknown",
+                info.get("framework") or "unknown",
+                info.get("project_path", ""),
+            ))
+    return chunks
+
+
+def _select_codebase(files: list[dict], max_chars: int = 50_000) -> str:
     file_summaries: list[str] = []
     total_chars = 0
-    max_chars = 50_000
 
     sorted_files = sorted(
         files,
@@ -69,22 +140,25 @@ async def scan(files: list[dict], project_info: dict) -> list[dict]:
         file_summaries.append(entry)
         total_chars += len(entry)
 
-    if not file_summaries:
-        # #region agent log
-        _agent_log(
-            "B",
-            "claude_scanner.py:scan",
-            "No files selected for LLM scan",
-            {"total_files": len(files)},
-        )
-        # #endregion
-        return []
+    return "\n".join(file_summaries)
 
-    codebase = "\n".join(file_summaries)
-    language = project_info.get("language", "unknown")
-    framework = project_info.get("framework", "unknown")
 
-    prompt = f"""You are a senior application security engineer performing a code review. Analyze this {language}/{framework} codebase for security vulnerabilities that automated regex scanning would miss.
+async def _scan_chunk(
+    semaphore: asyncio.Semaphore,
+    usage: llm.LLMUsage | None,
+    key: str | None,
+    codebase: str,
+    language: str,
+    framework: str,
+    project_path: str,
+) -> list[dict]:
+    scope = (
+        f" This is the `{project_path}` package of a larger repository; file paths are repo-relative."
+        if project_path
+        else ""
+    )
+
+    prompt = f"""You are a senior application security engineer performing a code review. Analyze this {language}/{framework} codebase for security vulnerabilities that automated regex scanning would miss.{scope}
 
 Focus on:
 1. Business logic flaws - auth bypass through logic errors, race conditions, TOCTOU bugs
@@ -121,18 +195,14 @@ Codebase:
             {
                 "language": language,
                 "framework": framework,
-                "selected_files": len(file_summaries),
-                "total_files": len(files),
+                "project_path": project_path,
+                "prompt_chars": len(prompt),
             },
         )
         # #endregion
 
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        async with client.aio as aclient:
-            response = await aclient.models.generate_content(
-                model=settings.GEMINI_MODEL,
-                contents=prompt,
-            )
+        async with semaphore:
+            response = await llm.generate("lightweight_scan", prompt, usage=usage, key=key)
 
         text = (response.text or "").strip()
 
@@ -178,15 +248,6 @@ Codebase:
                 }
             )
 
-        # #region agent log
-        _agent_log(
-            "E",
-            "claude_scanner.py:scan",
-            "Parsed LLM findings",
-            {"count": len(findings)},
-        )
-        # #endregion
-
         return findings
 
     except Exception as e:
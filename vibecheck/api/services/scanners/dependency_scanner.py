@@ -1,3 +1,6 @@
+from api.services.advisory_db import get_advisory_db
+from api.utils.versions import normalize_package_name, parse_version
+
 VULN_DB = {
     # JavaScript / Node.js
     "express": [("<", "4.19.2", "high", "CVE-2024-29041", "Open redirect vulnerability in express")],
@@ -30,63 +33,189 @@ VULN_DB = {
 
 
 def scan(files: list[dict], project_info: dict) -> list[dict]:
-    """Check project dependencies against known vulnerable versions."""
+    """
+    Check project dependencies against known vulnerable versions. Uses the
+    offline advisory database when ADVISORY_DB_PATH points at an imported
+    index, otherwise the built-in VULN_DB table. Versions resolved from
+    lockfiles (project_info["dependency_graph"]) take precedence over the
+    ranges declared in manifests.
+    """
+    db = get_advisory_db()
+    graph = project_info.get("dependency_graph")
     findings = []
-    deps = project_info.get("dependencies", {})
+    for ecosystem, pkg_name, version_str, lockfile, project in _iter_dependencies(project_info):
+        if db is not None:
+            found = _check_advisories(db, ecosystem, pkg_name, version_str)
+        else:
+            found = _check_builtin(ecosystem, pkg_name, version_str)
+        for f in found:
+            if project is not None:
+                f["location"]["project"] = project
+            if lockfile:
+                _annotate_resolved(f, graph, ecosystem, pkg_name, lockfile)
+        findings.extend(found)
+    return findings
+
+
+def _iter_dependencies(project_info: dict):
+    """
+    (ecosystem, name, version, lockfile, project path) per dependency: every
+    resolved lockfile entry first, then each sub-project's manifest specs for
+    packages no lockfile in or above the sub-project resolved (lockfile is
+    None for those). Project path is None when project_info carries no
+    workspace.
+    """
+    workspace = project_info.get("workspace")
+    resolved: dict[tuple[str, str], set[str]] = {}
+    graph = project_info.get("dependency_graph")
+    if graph:
+        for ecosystem, pkg_name, version, lockfile in graph:
+            key = (ecosystem, normalize_package_name(ecosystem, pkg_name))
+            resolved.setdefault(key, set()).add(lockfile.rpartition("/")[0])
+            owner = workspace.owner(lockfile) if workspace else None
+            yield ecosystem, pkg_name, version, lockfile, owner.path if owner else None
+
+    if workspace:
+        manifests = [
+            (p.ecosystem, p.dependencies, p.path) for p in workspace.projects if p.ecosystem
+        ]
+    else:
+        by_ecosystem = project_info.get("ecosystem_dependencies")
+        if not by_ecosystem:
+            ecosystem = "PyPI" if project_info.get("language") == "python" else "npm"
+            by_ecosystem = {ecosystem: project_info.get("dependencies", {})}
+        manifests = [(ecosystem, deps, None) for ecosystem, deps in by_ecosystem.items()]
+
+    for ecosystem, deps, project in manifests:
+        for pkg_name, version_str in deps.items():
+            lock_dirs = resolved.get((ecosystem, normalize_package_name(ecosystem, pkg_name)))
+            if not lock_dirs or (project is not None and not _covered(project, lock_dirs)):
+                yield ecosystem, pkg_name, version_str, None, project
+
+
+def _covered(project_path: str, lock_dirs: set[str]) -> bool:
+    """True when a lockfile sits in the project's directory or one above it."""
+    return any(
+        d == "" or project_path == d or project_path.startswith(d + "/") for d in lock_dirs
+    )
+
+
+def _annotate_resolved(finding: dict, graph, ecosystem: str, pkg_name: str, lockfile: str):
+    finding["location"]["file"] = lockfile
+    direct = graph.is_direct(ecosystem, pkg_name)
+    if direct is None:
+        return
+    finding["evidence"]["transitive"] = not direct
+    if not direct:
+        introduced_by = graph.introduced_by(ecosystem, pkg_name)
+        finding["evidence"]["introduced_by"] = introduced_by
+        if introduced_by:
+            finding["description"] += f" Pulled in transitively by {', '.join(introduced_by)}."
 
-    for pkg_name, version_str in deps.items():
-        pkg_lower = pkg_name.lower().strip()
-        if pkg_lower not in VULN_DB:
+
+def _clean_version(version_str: str) -> str:
+    """Lower bound of a version spec: '^4.17.1' -> '4.17.1', '>=2.0,<3' -> '2.0'."""
+    return version_str.strip().lstrip("^~>=<! ").split(",", 1)[0].split(" ", 1)[0]
+
+
+def _check_builtin(ecosystem: str, pkg_name: str, version_str: str) -> list[dict]:
+    findings = []
+    pkg_lower = normalize_package_name(ecosystem, pkg_name)
+    for op, vuln_version, severity, cve, description in VULN_DB.get(pkg_lower, []):
+        clean_version = _clean_version(version_str)
+        if clean_version == "*" or not clean_version:
+            findings.append({
+                "severity": "info",
+                "category": "vulnerable_dependency",
+                "title": f"Unpinned dependency: {pkg_name}",
+                "description": (
+                    f"Package '{pkg_name}' has no pinned version. "
+                    f"Known vulnerability exists in versions {op} {vuln_version}: {description}"
+                ),
+                "location": {"type": "dependency", "package": pkg_name, "version": version_str},
+                "evidence": {"cve": cve, "vulnerable_below": vuln_version},
+                "remediation": f"Pin {pkg_name} to version {vuln_version} or later.",
+            })
             continue
 
-        for op, vuln_version, severity, cve, description in VULN_DB[pkg_lower]:
-            clean_version = version_str.lstrip("^~>=<! ")
-            if clean_version == "*" or not clean_version:
-                findings.append({
-                    "severity": "info",
-                    "category": "vulnerable_dependency",
-                    "title": f"Unpinned dependency: {pkg_name}",
-                    "description": (
-                        f"Package '{pkg_name}' has no pinned version. "
-                        f"Known vulnerability exists in versions {op} {vuln_version}: {description}"
-                    ),
-                    "location": {"type": "dependency", "package": pkg_name, "version": version_str},
-                    "evidence": {"cve": cve, "vulnerable_below": vuln_version},
-                    "remediation": f"Pin {pkg_name} to version {vuln_version} or later.",
-                })
-                continue
-
-            if _is_version_vulnerable(clean_version, op, vuln_version):
-                findings.append({
-                    "severity": severity,
-                    "category": "vulnerable_dependency",
-                    "title": f"Vulnerable dependency: {pkg_name}@{version_str}",
-                    "description": (
-                        f"{description}. Installed version {version_str} is vulnerable "
-                        f"(affects versions {op} {vuln_version})."
-                    ),
-                    "location": {"type": "dependency", "package": pkg_name, "version": version_str},
-                    "evidence": {"cve": cve, "vulnerable_below": vuln_version, "installed_version": version_str},
-                    "remediation": f"Upgrade {pkg_name} to version {vuln_version} or later.",
-                })
+        if _is_version_vulnerable(clean_version, op, vuln_version, ecosystem):
+            findings.append({
+                "severity": severity,
+                "category": "vulnerable_dependency",
+                "title": f"Vulnerable dependency: {pkg_name}@{version_str}",
+                "description": (
+                    f"{description}. Installed version {version_str} is vulnerable "
+                    f"(affects versions {op} {vuln_version})."
+                ),
+                "location": {"type": "dependency", "package": pkg_name, "version": version_str},
+                "evidence": {"cve": cve, "vulnerable_below": vuln_version, "installed_version": version_str},
+                "remediation": f"Upgrade {pkg_name} to version {vuln_version} or later.",
+            })
+    return findings
 
+
+def _check_advisories(db, ecosystem: str, pkg_name: str, version_str: str) -> list[dict]:
+    clean_version = _clean_version(version_str)
+    if clean_version == "*" or not clean_version:
+        count = db.advisory_count(ecosystem, pkg_name)
+        if not count:
+            return []
+        return [{
+            "severity": "info",
+            "category": "vulnerable_dependency",
+            "title": f"Unpinned dependency: {pkg_name}",
+            "description": (
+                f"Package '{pkg_name}' has no pinned version and {count} known "
+                f"{ecosystem} advisories affect some of its releases."
+            ),
+            "location": {"type": "dependency", "package": pkg_name, "version": version_str},
+            "evidence": {"ecosystem": ecosystem, "advisory_count": count},
+            "remediation": f"Pin {pkg_name} to a version with no known advisories.",
+        }]
+
+    findings = []
+    for advisory in db.match(ecosystem, pkg_name, clean_version):
+        fixed = advisory["fixed"]
+        affected = f">= {advisory['introduced']}"
+        if fixed:
+            affected += f", < {fixed}"
+        elif advisory["last_affected"]:
+            affected += f", <= {advisory['last_affected']}"
+        findings.append({
+            "severity": advisory["severity"],
+            "category": "vulnerable_dependency",
+            "title": f"Vulnerable dependency: {pkg_name}@{version_str}",
+            "description": (
+                f"{advisory['summary']}. Installed version {version_str} is vulnerable "
+                f"(affects versions {affected})."
+            ),
+            "location": {"type": "dependency", "package": pkg_name, "version": version_str},
+            "evidence": {
+                "cve": advisory["cve"],
+                "advisory_id": advisory["id"],
+                "ecosystem": ecosystem,
+                "vulnerable_below": fixed,
+                "installed_version": version_str,
+            },
+            "remediation": (
+                f"Upgrade {pkg_name} to version {fixed} or later."
+                if fixed
+                else f"No fixed release of {pkg_name} is known; consider replacing it."
+            ),
+        })
     return findings
 
 
-def _is_version_vulnerable(installed: str, operator: str, vuln_version: str) -> bool:
-    """Simple semver comparison for major.minor.patch format."""
-    try:
-        installed_parts = [int(x) for x in installed.split(".")[:3]]
-        vuln_parts = [int(x) for x in vuln_version.split(".")[:3]]
-        while len(installed_parts) < 3:
-            installed_parts.append(0)
-        while len(vuln_parts) < 3:
-            vuln_parts.append(0)
-
-        if operator == "<":
-            return installed_parts < vuln_parts
-        elif operator == "<=":
-            return installed_parts <= vuln_parts
-        return False
-    except (ValueError, AttributeError):
+def _is_version_vulnerable(
+    installed: str, operator: str, vuln_version: str, ecosystem: str = "npm"
+) -> bool:
+    """Compare versions with PEP 440 (PyPI) or semver precedence (everything else)."""
+    installed_key = parse_version(ecosystem, installed)
+    vuln_key = parse_version(ecosystem, vuln_version)
+    if installed_key is None or vuln_key is None:
         return False
+    if operator == "<":
+        return installed_key < vuln_key
+    elif operator == "<=":
+        return installed_key <= vuln_key
+    return False
@@ -0,0 +1,54 @@
+from bisect import bisect_right
+from itertools import accumulate
+
+
+class FileContext:
+    """
+    Per-file data computed once and shared by every scanner: extension, the
+    split lines and line start offsets. Supports `ctx["path"]` /
+    `ctx["content"]` so code written against the plain file dicts still works.
+    """
+
+    __slots__ = ("path", "content", "name", "ext", "_lines", "_line_starts")
+
+    def __init__(self, path: str, content: str):
+        self.path = path
+        self.content = content
+        self.name = path.rsplit("/", 1)[-1]
+        self.ext = "." + self.name.rsplit(".", 1)[-1] if "." in self.name else ""
+        self._lines: list[str] | None = None
+        self._line_starts: list[int] | None = None
+
+    @property
+    def lines(self) -> list[str]:
+        if self._lines is None:
+            self._lines = self.content.splitlines()
+        return self._lines
+
+    @property
+    def line_starts(self) -> list[int]:
+        """Offset of each line in `content`, using the same boundaries as splitlines()."""
+        if self._line_starts is None:
+            lengths = map(len, self.content.splitlines(keepends=True))
+            self._line_starts = [0, *accumulate(lengths)][: max(len(self.lines), 1)]
+        return self._line_starts
+
+    def line_number(self, offset: int) -> int:
+        """1-based line number containing a character offset into `content`."""
+        return bisect_right(self.line_starts, offset)
+
+    def __getitem__(self, key: str):
+        if key in ("path", "content"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in ("path", "content") else default
+
+
+def as_contexts(files: list) -> list[FileContext]:
+    """Wrap `{path, content}` dicts as FileContext, passing existing contexts through."""
+    return [
+        f if isinstance(f, FileContext) else FileContext(f["path"], f["content"])
+        for f in files
+    ]
@@ -0,0 +1,137 @@
+"""
+Comment/string masking for JavaScript and TypeScript.
+
+`mask(source)` returns a copy of the source in which comments are blanked and
+the contents of string, template and regex literals are replaced by spaces
+(quotes, `${...}` expressions and slashes are kept). Length and line breaks
+are preserved, so an offset or line number in the masked text is the same in
+the original. Rules with `"options": {"view": "masked"}` are matched against
+this view, so `innerHTML`, `eval(` or `new Function(` inside a comment or a
+string no longer produce findings.
+
+This is a tokenizer, not a parser: a `/` is treated as a regex literal when
+the previous significant character cannot end an expression, and an
+apostrophe in JSX text masks the rest of that line.
+"""
+
+import re
+
+JS_EXTENSIONS = {".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs"}
+
+# Everything except the characters str.splitlines() breaks on, so masked lines
+# line up one-to-one with the original.
+_BREAKS = r"\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+_BLANK_RE = re.compile(f"[^{_BREAKS}]")
+
+# One alternation per token kind, dispatched on match.lastgroup. Line comments
+# and quoted strings cannot contain a raw line break, so they are blanked with
+# " " * n; braces only matter inside `${...}` and are otherwise not tokens.
+_TOKENS = (
+    f"(?P<line>//[^{_BREAKS}]*)"
+    r"|(?P<block>/\*.*?(?:\*/|\Z))"
+    f"|(?P<sq>'(?P<sq_body>(?:[^'\\\\{_BREAKS}]|\\\\.)*)'?)"
+    f'|(?P<dq>"(?P<dq_body>(?:[^"\\\\{_BREAKS}]|\\\\.)*)"?)'
+    r"|(?P<template>`)"
+    r"|(?P<slash>/)"
+)
+# The leading lookahead lets the regex engine skip ahead by character set
+# instead of trying every alternative at every position.
+_TOKEN_RE = re.compile(f"(?=[/'\"`])(?:{_TOKENS})", re.DOTALL)
+_TOKEN_IN_TEMPLATE_RE = re.compile(f"(?=[/'\"`{{}}])(?:{_TOKENS}|(?P<brace>[{{}}]))", re.DOTALL)
+_TEMPLATE_CHUNK_RE = re.compile(r"(?:[^`\\$]|\\.|\$(?!\{))*", re.DOTALL)
+_REGEX_RE = re.compile(
+    f"/((?:[^/\\\\\\[{_BREAKS}]|\\\\[^{_BREAKS}]|\\[(?:[^\\]\\\\{_BREAKS}]|\\\\[^{_BREAKS}])*\\])+)/[A-Za-z]*"
+)
+_WORD_BEFORE_RE = re.compile(r"([A-Za-z_$][\w$]*)\s*$")
+
+# A `/` after one of these starts a regex literal rather than a division.
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void",
+    "throw", "case", "do", "else", "yield", "await",
+}
+
+
+def _blank(text: str) -> str:
+    return _BLANK_RE.sub(" ", text)
+
+
+def mask(source: str) -> str:
+    """Blank comments and literal contents; see the module docstring."""
+    out: list[str] = []
+    pos = 0
+    depth = 0
+    # Brace depth at which each open `${` expression closes.
+    template_depths: list[int] = []
+
+    while True:
+        match = (_TOKEN_IN_TEMPLATE_RE if template_depths else _TOKEN_RE).search(source, pos)
+        if match is None:
+            out.append(source[pos:])
+            break
+        start, end = match.span()
+        kind = match.lastgroup
+        out.append(source[pos:start])
+        pos = end
+
+        if kind == "line":
+            out.append(" " * (end - start))
+        elif kind == "sq" or kind == "dq":
+            body_start, body_end = match.span(kind + "_body")
+            body = source[body_start:body_end]
+            out.append(source[start])
+            # An escaped line break (line continuation) must survive masking.
+            out.append(_blank(body) if "\\" in body else " " * len(body))
+            out.append(source[body_end:end])
+        elif kind == "block":
+            out.append(_blank(source[start:end]))
+        elif kind == "template":
+            out.append("`")
+            pos = _template(source, end, out, template_depths, depth)
+        elif kind == "brace":
+            out.append(source[start])
+            if source[start] == "{":
+                depth += 1
+            elif template_depths[-1] == depth:
+                template_depths.pop()
+                pos = _template(source, end, out, template_depths, depth)
+            else:
+                depth -= 1
+        else:  # "/": regex literal or division
+            literal = _REGEX_RE.match(source, start) if _regex_allowed(source, start) else None
+            if literal is None:
+                out.append("/")
+            else:
+                body_start, body_end = literal.span(1)
+                out.append("/")
+                out.append(" " * (body_end - body_start))
+                out.append(source[body_end:literal.end()])
+                pos = literal.end()
+
+    return "".join(out)
+
+
+def _template(source: str, pos: int, out: list[str], template_depths: list[int], depth: int) -> int:
+    """Mask template text from `pos` up to the closing backtick or the next `${`."""
+    end = _TEMPLATE_CHUNK_RE.match(source, pos).end()
+    out.append(_blank(source[pos:end]))
+    if source.startswith("${", end):
+        out.append("${")
+        template_depths.append(depth)
+        return end + 2
+    if end < len(source):
+        out.append("`")
+        return end + 1
+    return end
+
+
+def _regex_allowed(source: str, slash: int) -> bool:
+    i = slash - 1
+    while i >= 0 and source[i] in " \t\r\n":
+        i -= 1
+    if i < 0:
+        return True
+    if source[i] in _REGEX_PRECEDERS:
+        return True
+    word = _WORD_BEFORE_RE.search(source, max(0, i - 15), i + 1)
+    return word is not None and word.group(1) in _REGEX_KEYWORDS
@@ -0,0 +1,371 @@
+"""
+AST analysis for `engine: python_ast` rules.
+
+Each rule names a check below. All checks that apply to a file run in a single
+`ast.walk` over the module, dispatched by node type, so multi-line calls are
+seen as one expression and string literals/comments that merely mention
+`eval(` or `SELECT` are not flagged. Files that fail to parse fall back to the
+rule's line regex.
+
+Parsed trees are kept in a small LRU keyed by content digest, and per-file
+results in a larger one keyed by (digest, ruleset hash, rule ids), so rescans
+of an unchanged repo skip parsing entirely.
+"""
+
+import ast
+import hashlib
+import re
+from collections import OrderedDict
+from collections.abc import Callable
+
+TREE_CACHE_SIZE = 64
+RESULT_CACHE_SIZE = 20_000
+
+_SQL_RE = re.compile(
+    r"\b(?:select\b.+?\bfrom|insert\s+into|update\s+\w+\s+set|delete\s+from)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+_SQL_CALLS = {"execute", "executemany", "raw", "query", "exec_driver_sql"}
+_SUBPROCESS_CALLS = {
+    "subprocess.call", "subprocess.run", "subprocess.Popen", "subprocess.check_call",
+    "subprocess.check_output", "subprocess.getoutput", "subprocess.getstatusoutput",
+}
+_PICKLE_CALLS = {
+    f"{module}.{fn}" for module in ("pickle", "cPickle", "_pickle", "dill") for fn in ("load", "loads")
+}
+_SAFE_YAML_LOADERS = {"SafeLoader", "CSafeLoader", "BaseLoader"}
+
+
+class _Module:
+    """Per-file traversal state shared by the checks: import aliases and SQL-valued names."""
+
+    __slots__ = ("aliases", "sql_names")
+
+    def __init__(self):
+        self.aliases: dict[str, str] = {}
+        self.sql_names: set[str] = set()
+
+    def qualname(self, node: ast.AST) -> str | None:
+        """Dotted name of a call target with import aliases resolved (`sp.run` -> `subprocess.run`)."""
+        if isinstance(node, ast.Name):
+            return self.aliases.get(node.id, node.id)
+        if isinstance(node, ast.Attribute):
+            base = self.qualname(node.value)
+            return f"{base}.{node.attr}" if base else None
+        return None
+
+
+Check = Callable[[ast.AST, _Module], bool]
+
+# check name -> (node type, hints, predicate). Hints are groups of substrings:
+# a check only runs when every group has a member in the raw content, and a
+# file is only parsed when at least one check runs, so most modules (no sink
+# at all) skip ast.parse. Plain substring tests keep this prefilter cheap.
+CHECKS: dict[str, tuple[type, tuple[tuple[str, ...], ...], Check]] = {}
+
+_SQL_HINT = ("SELECT", "select", "INSERT", "insert", "UPDATE", "update", "DELETE", "delete")
+
+
+def _check(name: str, node_type: type, *hints: str | tuple[str, ...]):
+    def register(fn: Check) -> Check:
+        groups = tuple((h,) if isinstance(h, str) else h for h in hints)
+        CHECKS[name] = (node_type, groups, fn)
+        return fn
+    return register
+
+
+def _hints_match(groups: tuple[tuple[str, ...], ...], content: str) -> bool:
+    return all(any(h in content for h in group) for group in groups)
+
+
+def _static_text(node: ast.AST) -> str | None:
+    """Literal text of a str constant or f-string, with placeholders blanked."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        return "".join(
+            v.value if isinstance(v, ast.Constant) and isinstance(v.value, str) else " x "
+            for v in node.values
+        )
+    return None
+
+
+def _is_dynamic_string(node: ast.AST) -> bool:
+    """f-string with placeholders, `"..." + x`, `"..." % x` or `"...".format(x)`."""
+    if isinstance(node, ast.JoinedStr):
+        return any(isinstance(v, ast.FormattedValue) for v in node.values)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Mod)):
+        return _has_str(node.left) or _has_str(node.right)
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "format"
+        and _has_str(node.func.value)
+    )
+
+
+def _operands(node: ast.AST):
+    """Leaves of a `+` / `%` chain, left to right. Iterative: a generated
+    file can concatenate thousands of terms, deeper than the recursion limit."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.BinOp):
+            stack.append(node.right)
+            stack.append(node.left)
+        else:
+            yield node
+
+
+def _has_str(node: ast.AST) -> bool:
+    return any(_static_text(leaf) is not None for leaf in _operands(node))
+
+
+def _sql_text(node: ast.AST) -> str:
+    """All literal text of a (possibly concatenated or formatted) string expression."""
+    parts = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.BinOp):
+            stack.append(node.right)
+            stack.append(node.left)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            stack.append(node.func.value)
+        else:
+            parts.append(_static_text(node) or "")
+    return " x ".join(parts)
+
+
+def _is_dynamic_sql(node: ast.AST, module: _Module) -> bool:
+    if isinstance(node, ast.Name):
+        return node.id in module.sql_names
+    return _is_dynamic_string(node) and bool(_SQL_RE.search(_sql_text(node)))
+
+
+def _first_arg(node: ast.Call) -> ast.AST | None:
+    return node.args[0] if node.args else None
+
+
+def _keyword(node: ast.Call, name: str) -> ast.AST | None:
+    for kw in node.keywords:
+        if kw.arg == name:
+            return kw.value
+    return None
+
+
+@_check("sql_fstring", ast.JoinedStr, _SQL_HINT)
+def _sql_fstring(node: ast.JoinedStr, module: _Module) -> bool:
+    return _is_dynamic_string(node) and bool(_SQL_RE.search(_sql_text(node)))
+
+
+@_check("sql_dynamic_query", ast.Call, _SQL_HINT, ("execute", "raw", "query", "exec_driver_sql"))
+def _sql_dynamic_query(node: ast.Call, module: _Module) -> bool:
+    if not (isinstance(node.func, ast.Attribute) and node.func.attr in _SQL_CALLS):
+        return False
+    arg = _first_arg(node)
+    if arg is None:
+        return False
+    if isinstance(node.args[0], ast.JoinedStr):
+        return False  # Reported by sql_fstring
+    return _is_dynamic_sql(arg, module)
+
+
+@_check("eval_call", ast.Call, "eval")
+def _eval_call(node: ast.Call, module: _Module) -> bool:
+    return _is_code_call(node, module, "eval")
+
+
+@_check("exec_call", ast.Call, "exec")
+def _exec_call(node: ast.Call, module: _Module) -> bool:
+    return _is_code_call(node, module, "exec")
+
+
+def _is_code_call(node: ast.Call, module: _Module, builtin: str) -> bool:
+    if module.qualname(node.func) not in (builtin, f"builtins.{builtin}"):
+        return False
+    arg = _first_arg(node)
+    return not (isinstance(arg, ast.Constant) and len(node.args) == 1)
+
+
+@_check(
+    "subprocess_dynamic", ast.Call,
+    "subprocess", ("call(", "run(", "Popen(", "check_output(", "getoutput(", "getstatusoutput("),
+)
+def _subprocess_dynamic(node: ast.Call, module: _Module) -> bool:
+    if module.qualname(node.func) not in _SUBPROCESS_CALLS:
+        return False
+    arg = _first_arg(node) or _keyword(node, "args")
+    if arg is None:
+        return False
+    if _is_dynamic_string(arg):
+        return True
+    if isinstance(arg, (ast.List, ast.Tuple)) and any(_is_dynamic_string(e) for e in arg.elts):
+        return True
+    shell = _keyword(node, "shell")
+    return (
+        isinstance(shell, ast.Constant)
+        and shell.value is True
+        and not isinstance(arg, ast.Constant)
+    )
+
+
+@_check("os_system", ast.Call, "system")
+def _os_system(node: ast.Call, module: _Module) -> bool:
+    return module.qualname(node.func) == "os.system"
+
+
+@_check("pickle_load", ast.Call, ("pickle", "dill"), "load")
+def _pickle_load(node: ast.Call, module: _Module) -> bool:
+    return module.qualname(node.func) in _PICKLE_CALLS
+
+
+@_check("yaml_unsafe_load", ast.Call, "yaml", "load")
+def _yaml_unsafe_load(node: ast.Call, module: _Module) -> bool:
+    name = module.qualname(node.func)
+    if name == "yaml.unsafe_load":
+        return True
+    if name not in ("yaml.load", "yaml.load_all"):
+        return False
+    loader = _keyword(node, "Loader") or (node.args[1] if len(node.args) > 1 else None)
+    if loader is None:
+        return True
+    loader_name = module.qualname(loader) or ""
+    return loader_name.rsplit(".", 1)[-1] not in _SAFE_YAML_LOADERS
+
+
+@_check("flask_debug", ast.Call, ("debug=True", "debug = True"))
+def _flask_debug(node: ast.Call, module: _Module) -> bool:
+    if not (isinstance(node.func, ast.Attribute) and node.func.attr == "run"):
+        return False
+    debug = _keyword(node, "debug")
+    return isinstance(debug, ast.Constant) and debug.value is True
+
+
+_tree_cache: OrderedDict[str, ast.Module | None] = OrderedDict()
+_result_cache: OrderedDict[tuple, dict[str, int]] = OrderedDict()
+_warned_checks: set[str] = set()
+
+
+def analyze(ctx, rules: list, ruleset_hash: str = "") -> dict[str, int]:
+    """
+    Run `python_ast` rules over one FileContext. Returns {rule_id: line} for
+    the first match of each rule, like the line-regex rules.
+    """
+    digest = hashlib.blake2b(ctx.content.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    key = (digest, ruleset_hash, tuple(rule.id for rule in rules))
+    cached = _result_cache.get(key)
+    if cached is not None:
+        _result_cache.move_to_end(key)
+        return cached
+
+    active = []
+    fallback = []
+    for rule in rules:
+        check = CHECKS.get(rule.check)
+        if check is None:
+            if rule.check not in _warned_checks:
+                _warned_checks.add(rule.check)
+                print(f"[python_ast] Unknown check '{rule.check}' in rule {rule.id}, using its regex")
+            fallback.append(rule)
+        elif _hints_match(check[1], ctx.content):
+            active.append((rule, check))
+
+    hits: dict[str, int] = {}
+    if active:
+        tree = _parse(digest, ctx.content)
+        if tree is None:
+            fallback.extend(rule for rule, _ in active)
+        else:
+            try:
+                hits.update(_walk(tree, active))
+            except RecursionError:
+                # A check met a tree too deep for it; treat the file like one
+                # that does not parse.
+                fallback.extend(rule for rule, _ in active)
+    for rule in fallback:
+        line = _regex_line(ctx, rule)
+        if line is not None:
+            hits[rule.id] = line
+
+    _result_cache[key] = hits
+    if len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+    return hits
+
+
+def _parse(digest: str, content: str) -> ast.Module | None:
+    if digest in _tree_cache:
+        _tree_cache.move_to_end(digest)
+        return _tree_cache[digest]
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        tree = None
+    _tree_cache[digest] = tree
+    if len(_tree_cache) > TREE_CACHE_SIZE:
+        _tree_cache.popitem(last=False)
+    return tree
+
+
+def _walk(tree: ast.Module, active: list) -> dict[str, int]:
+    """One pass in source order; import aliases and SQL assignments are recorded as they are met."""
+    dispatch: dict[type, list] = {}
+    for rule, (node_type, _, predicate) in active:
+        dispatch.setdefault(node_type, []).append((rule.id, predicate))
+    track_sql = any(rule.check == "sql_dynamic_query" for rule, _ in active)
+
+    module = _Module()
+    hits: dict[str, int] = {}
+    for node in _iter_nodes(tree):
+        node_type = type(node)
+        if node_type is ast.Import:
+            for alias in node.names:
+                module.aliases[alias.asname or alias.name.split(".")[0]] = (
+                    alias.name if alias.asname else alias.name.split(".")[0]
+                )
+            continue
+        if node_type is ast.ImportFrom:
+            if node.module and not node.level:
+                for alias in node.names:
+                    module.aliases[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+            continue
+        if track_sql and node_type is ast.Assign and _is_dynamic_sql(node.value, module):
+            module.sql_names.update(t.id for t in node.targets if isinstance(t, ast.Name))
+            continue
+
+        handlers = dispatch.get(node_type)
+        if not handlers:
+            continue
+        for rule_id, predicate in handlers:
+            if rule_id not in hits and predicate(node, module):
+                hits[rule_id] = node.lineno
+        if len(hits) == len(active):
+            break
+    return hits
+
+
+def _iter_nodes(tree: ast.AST):
+    """Pre-order walk (source order), cheaper than ast.walk's generator chain."""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = []
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                children.extend(item for item in value if isinstance(item, ast.AST))
+            elif isinstance(value, ast.AST):
+                children.append(value)
+        children.reverse()
+        stack.extend(children)
+
+
+def _regex_line(ctx, rule) -> int | None:
+    if rule.pattern is None:
+        return None
+    for i, line in enumerate(ctx.lines, 1):
+        if rule.pattern.search(line):
+            return i
+    return None
@@ -1,23 +1,17 @@
 import math
 import re
+from collections import Counter
 
-SECRET_PATTERNS = [
-    (r'''(?:api[_-]?key|apikey)\s*[:=]\s*['"]([A-Za-z0-9_\-]{20,})['"]''', "API key"),
-    (r'''AKIA[0-9A-Z]{16}''', "AWS Access Key ID"),
-    (r'''(?:aws[_-]?secret|AWS_SECRET_ACCESS_KEY)\s*[:=]\s*['"]([A-Za-z0-9/+=]{40})['"]''', "AWS Secret Access Key"),
-    (r'''gh[ps]_[A-Za-z0-9_]{36,}''', "GitHub token"),
-    (r'''github_pat_[A-Za-z0-9_]{22,}''', "GitHub Personal Access Token"),
-    (r'''sk_live_[A-Za-z0-9]{24,}''', "Stripe Secret Key (LIVE)"),
-    (r'''sk_test_[A-Za-z0-9]{24,}''', "Stripe Secret Key (test)"),
-    (r'''xox[baprs]-[A-Za-z0-9\-]{10,}''', "Slack token"),
-    (r'''(?:secret|password|passwd|pwd|token|auth_token|access_token|private_key)\s*[:=]\s*['"]([^'"]{8,})['"]''', "Hardcoded secret"),
-    (r'''(?:jwt[_-]?secret|JWT_SECRET)\s*[:=]\s*['"]([^'"]{6,})['"]''', "JWT Secret"),
-    (r'''(?:postgres|mysql|mongodb|redis)(?:ql)?:\/\/\w+:[^@\s]+@''', "Database URL with credentials"),
-    (r'''-----BEGIN (?:RSA |EC |DSA )?PRIVATE KEY-----''', "Private key"),
-    (r'''SG\.[A-Za-z0-9_\-]{22}\.[A-Za-z0-9_\-]{43}''', "SendGrid API key"),
-    (r'''AC[a-f0-9]{32}''', "Twilio Account SID"),
-    (r'''AIza[0-9A-Za-z\-_]{35}''', "Google API key"),
-]
+from api.services.rules import get_registry
+from api.services.scanners.file_context import FileContext, as_contexts
+
+# Secret patterns are the "secret" scanner rules of the rule packs
+# (api/services/rules/packs/secrets.json); each carries options.secret_type.
+
+_ASSIGNMENT_RE = re.compile(
+    r'''(?:secret|key|token|password|pwd)[^\S\r\n]*[:=][^\S\r\n]*['"]([A-Za-z0-9+/=_\-]{20,})['"]''',
+    re.IGNORECASE,
+)
 
 SKIP_PATTERNS = [
     r"\.test\.",
@@ -34,99 +28,119 @@ SKIP_PATTERNS = [
 ]
 
 
-def scan(files: list[dict]) -> list[dict]:
-    """Detect hardcoded secrets in source files."""
-    findings = []
+_SKIP_RE = re.compile("|".join(f"(?:{pat})" for pat in SKIP_PATTERNS))
+_ENTROPY_SKIP_EXTENSIONS = {".json", ".lock", ".svg", ".map"}
 
-    for f in files:
-        path = f["path"]
-        if any(re.search(pat, path) for pat in SKIP_PATTERNS):
+
+def scan(files: list) -> list[dict]:
+    """Detect hardcoded secrets in source files (dicts or FileContext)."""
+    findings = []
+    for ctx in as_contexts(files):
+        if _SKIP_RE.search(ctx.path):
             continue
+        findings.extend(_scan_file(ctx))
+    return findings
 
-        lines = f["content"].splitlines()
-        for i, line in enumerate(lines, 1):
-            for pattern, secret_type in SECRET_PATTERNS:
-                try:
-                    match = re.search(pattern, line, re.IGNORECASE)
-                    if match:
-                        matched_text = match.group(0)
-                        if _is_placeholder(matched_text):
-                            continue
-
-                        severity = "critical"
-                        if "test" in secret_type.lower():
-                            severity = "high"
-
-                        findings.append({
-                            "severity": severity,
-                            "category": "hardcoded_secret",
-                            "title": f"{secret_type} found in {path}",
-                            "description": (
-                                f"A hardcoded {secret_type} was detected. Hardcoded secrets in source code "
-                                "can be extracted by anyone with repo access and are difficult to rotate."
-                            ),
-                            "location": {
-                                "type": "file",
-                                "file": path,
-                                "line": i,
-                                "snippet": _redact_secret(line.strip(), match),
-                            },
-                            "evidence": {"secret_type": secret_type, "pattern_matched": True},
-                            "remediation": (
-                                "Move secrets to environment variables. Use a secrets manager "
-                                "(e.g., AWS Secrets Manager, HashiCorp Vault, or .env files excluded from version control)."
-                            ),
-                        })
-                        break  # One finding per line
-                except re.error:
-                    continue
+
+def _scan_file(ctx: FileContext) -> list[dict]:
+    """Pattern pass then entropy pass over one file, sharing its split lines."""
+    findings = []
+    flagged_lines: set[int] = set()
+
+    rules = get_registry().rules_for("secret", ctx.path)
+
+    for i, line in enumerate(ctx.lines, 1):
+        for rule in rules:
+            match = rule.pattern.search(line)
+            if not match or _is_placeholder(match.group(0)):
+                continue
+
+            secret_type = rule.options.get("secret_type", rule.title)
+            findings.append({
+                "severity": rule.severity,
+                "category": rule.category,
+                "title": f"{secret_type} found in {ctx.path}",
+                "description": (
+                    f"A hardcoded {secret_type} was detected. Hardcoded secrets in source code "
+                    "can be extracted by anyone with repo access and are difficult to rotate."
+                ),
+                "location": {
+                    "type": "file",
+                    "file": ctx.path,
+                    "line": i,
+                    "snippet": _redact_secret(line.strip(), *_stripped_span(line, match)),
+                },
+                "evidence": {"secret_type": secret_type, "pattern_matched": True, "rule_id": rule.id},
+                "remediation": (
+                    "Move secrets to environment variables. Use a secrets manager "
+                    "(e.g., AWS Secrets Manager, HashiCorp Vault, or .env files excluded from version control)."
+                ),
+            })
+            flagged_lines.add(i)
+            break  # One finding per line
 
     # High-entropy string check on secret-context assignments
-    for f in files:
-        if any(re.search(pat, f["path"]) for pat in SKIP_PATTERNS):
+    if ctx.ext in _ENTROPY_SKIP_EXTENSIONS:
+        return findings
+
+    candidates = _extract_assignment_candidates(ctx)
+    if not candidates:
+        return findings
+    entropies = _shannon_entropies([c[3] for c in candidates])
+
+    for (i, line, span, value), entropy in zip(candidates, entropies):
+        if entropy <= 4.0 or i in flagged_lines or _is_placeholder(value):
             continue
-        ext = "." + f["path"].rsplit(".", 1)[-1] if "." in f["path"] else ""
-        if ext in {".json", ".lock", ".svg", ".map"}:
+        flagged_lines.add(i)
+        findings.append({
+            "severity": "high",
+            "category": "hardcoded_secret",
+            "title": f"High-entropy secret in {ctx.path}",
+            "description": (
+                "A high-entropy string was found in a secret/key/token/password assignment. "
+                "This likely contains a real credential."
+            ),
+            "location": {
+                "type": "file",
+                "file": ctx.path,
+                "line": i,
+                "snippet": _redact_secret(line, *span),
+            },
+            "evidence": {
+                "entropy": round(entropy, 2),
+                "length": len(value),
+            },
+            "remediation": "Move this value to an environment variable or secrets manager.",
+        })
+
+    return findings
+
+
+def _extract_assignment_candidates(ctx: FileContext) -> list[tuple[int, str, tuple[int, int], str]]:
+    """
+    Find every secret-context assignment in one regex pass over the whole file.
+    Returns (line_number, stripped_line, span_in_stripped_line, value) per line,
+    keeping only the first assignment on each line.
+    """
+    candidates = []
+    last_line = 0
+    for match in _ASSIGNMENT_RE.finditer(ctx.content):
+        line_number = ctx.line_number(match.start())
+        if line_number == last_line:
             continue
+        last_line = line_number
 
-        lines = f["content"].splitlines()
-        for i, line in enumerate(lines, 1):
-            assign_match = re.search(
-                r'''(?:secret|key|token|password|pwd)\s*[:=]\s*['"]([A-Za-z0-9+/=_\-]{20,})['"]''',
-                line,
-                re.IGNORECASE,
-            )
-            if assign_match:
-                value = assign_match.group(1)
-                if _shannon_entropy(value) > 4.0 and not _is_placeholder(value):
-                    already_found = any(
-                        fd.get("location", {}).get("file") == f["path"]
-                        and fd.get("location", {}).get("line") == i
-                        for fd in findings
-                    )
-                    if not already_found:
-                        findings.append({
-                            "severity": "high",
-                            "category": "hardcoded_secret",
-                            "title": f"High-entropy secret in {f['path']}",
-                            "description": (
-                                "A high-entropy string was found in a secret/key/token/password assignment. "
-                                "This likely contains a real credential."
-                            ),
-                            "location": {
-                                "type": "file",
-                                "file": f["path"],
-                                "line": i,
-                                "snippet": _redact_secret(line.strip(), assign_match),
-                            },
-                            "evidence": {
-                                "entropy": round(_shannon_entropy(value), 2),
-                                "length": len(value),
-                            },
-                            "remediation": "Move this value to an environment variable or secrets manager.",
-                        })
+        raw_line = ctx.lines[line_number - 1]
+        shift = ctx.line_starts[line_number - 1] + len(raw_line) - len(raw_line.lstrip())
+        span = (match.start() - shift, match.end() - shift)
+        candidates.append((line_number, raw_line.strip(), span, match.group(1)))
+    return candidates
 
-    return findings
+
+def _stripped_span(line: str, match: re.Match) -> tuple[int, int]:
+    shift = len(line) - len(line.lstrip())
+    start, end = match.span()
+    return start - shift, end - shift
 
 
 def _is_placeholder(text: str) -> bool:
@@ -141,19 +155,36 @@ def _is_placeholder(text: str) -> bool:
 
 
 def _shannon_entropy(s: str) -> float:
-    if not s:
-        return 0.0
-    freq: dict[str, int] = {}
-    for c in s:
-        freq[c] = freq.get(c, 0) + 1
-    length = len(s)
-    return -sum(
-        (count / length) * math.log2(count / length) for count in freq.values()
-    )
-
-
-def _redact_secret(line: str, match: re.Match) -> str:
-    start, end = match.span()
+    return _shannon_entropies([s])[0]
+
+
+def _shannon_entropies(values: list[str]) -> list[float]:
+    """
+    Entropy for a batch of strings using H = log2(n) - sum(c*log2(c)) / n,
+    with c*log2(c) looked up from a precomputed table instead of per-char math.
+    """
+    results = []
+    for value in values:
+        length = len(value)
+        if not length:
+            results.append(0.0)
+            continue
+        if length >= len(_C_LOG2_C):
+            _extend_c_log2_c(length)
+        total = sum(map(_C_LOG2_C.__getitem__, Counter(value).values()))
+        results.append(math.log2(length) - total / length)
+    return results
+
+
+def _extend_c_log2_c(n: int):
+    _C_LOG2_C.extend(c * math.log2(c) for c in range(len(_C_LOG2_C), n + 1))
+
+
+_C_LOG2_C: list[float] = [0.0]
+_extend_c_log2_c(512)
+
+
+def _redact_secret(line: str, start: int, end: int) -> str:
     secret = line[start:end]
     if len(secret) > 8:
         redacted = secret[:4] + "*" * (len(secret) - 8) + secret[-4:]
@@ -1,14 +1,9 @@
-import hashlib
 from typing import Any
 
 import httpx
 
 from api.config import settings
-
-
-def _fingerprint(*parts: str) -> str:
-    payload = "|".join(parts)
-    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+from api.utils.fingerprint import digest, finding_fingerprint
 
 
 class SupermemoryService:
@@ -51,9 +46,11 @@ class SupermemoryService:
         remediation = finding.get("remediation", "")
         description = finding.get("description", "")
 
-        fingerprint = _fingerprint(mode, category, severity, title, str(location))
+        fingerprint = finding.get("fingerprint") or finding_fingerprint(
+            category, title, location, finding.get("evidence")
+        )
         scope = repo_url or target_url or "global"
-        scope_hash = _fingerprint(scope)
+        scope_hash = digest(scope)
 
         content = (
             f"Finding: {title}\n"
@@ -95,6 +92,7 @@ class SupermemoryService:
                 "category": category,
                 "title": title,
                 "location": location,
+                "fingerprint": fingerprint,
             },
         }
 
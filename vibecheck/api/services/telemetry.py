@@ -0,0 +1,307 @@
+"""
+In-process Prometheus metrics, served as text by GET /metrics.
+
+A small registry of counters, gauges and histograms with no external
+dependency or collector. Recording is a dict lookup and an addition (plus a
+bisect for histograms), so it is cheap enough for per-request and per-probe
+hot paths; label children are cached, and gauges backed by a function are
+evaluated only when /metrics is scraped.
+
+Metrics are recorded from the event loop thread; there is no locking, so
+recording from worker threads may drop the odd increment under contention.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            values = tuple(str(v) for v in values)
+            child = self._children.get(values) or self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_str(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].value += amount
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{self._label_str(key)} {_format(child.value)}"]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), function=None):
+        self._function = function
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].value += amount
+
+    def dec(self, amount: float = 1.0):
+        self._children[()].value -= amount
+
+    def set(self, value: float):
+        self._children[()].value = value
+
+    def _render_child(self, key, child):
+        value = self._function() if self._function is not None else child.value
+        return [f"{self.name}{self._label_str(key)} {_format(value)}"]
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; made cumulative when rendered.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_target", "_start")
+
+    def __init__(self, target):
+        self._target = target
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._target.observe(time.perf_counter() - self._start)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def time(self):
+        return _Timer(self._children[()])
+
+    def _render_child(self, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format(bound)
+            labels = self._label_str(key, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_str(key)} {_format(child.sum)}")
+        lines.append(f"{self.name}_count{self._label_str(key)} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY: list[_Metric] = []
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Metric definitions -----------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "vibecheck_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+SCANS_QUEUED = Gauge(
+    "vibecheck_scans_queued",
+    "Assessments handed to a background task that have not started yet.",
+    ("mode",),
+)
+SCANS_IN_FLIGHT = Gauge("vibecheck_scans_in_flight", "Scans currently running.", ("mode",))
+SCANS_TOTAL = Counter("vibecheck_scans_total", "Finished scans by final status.", ("mode", "status"))
+SCAN_STAGE_SECONDS = Histogram(
+    "vibecheck_scan_stage_duration_seconds",
+    "Duration of scan pipeline stages (scanners, agents, ...).",
+    ("mode", "stage"),
+    buckets=SLOW_BUCKETS,
+)
+AGENT_HTTP_PROBES = Counter(
+    "vibecheck_agent_http_probes_total",
+    "HTTP requests sent to scan targets, by agent (crawler for discovery).",
+    ("agent",),
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "vibecheck_llm_request_duration_seconds",
+    "LLM generate_content latency per attempt (api.services.llm).",
+    ("caller", "outcome"),
+    buckets=SLOW_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "vibecheck_llm_tokens_total",
+    "LLM tokens reported in usage metadata.",
+    ("caller", "kind"),
+)
+LLM_RETRIES = Counter(
+    "vibecheck_llm_retries_total",
+    "LLM calls retried after a rate limit, server or transport error.",
+    ("caller", "reason"),
+)
+LLM_QUEUE_SECONDS = Histogram(
+    "vibecheck_llm_queue_wait_seconds",
+    "Time LLM calls waited for rate limit budget (api.services.rate_limiter).",
+    ("priority",),
+    buckets=SLOW_BUCKETS,
+)
+LLM_QUEUED = Gauge("vibecheck_llm_queued", "LLM calls waiting for rate limit budget.", ("priority",))
+DB_SESSION_SECONDS = Histogram(
+    "vibecheck_db_session_duration_seconds",
+    "Lifetime of request-scoped database sessions.",
+)
+
+
+def scan_queued(mode: str):
+    SCANS_QUEUED.labels(mode).inc()
+
+
+@contextmanager
+def scan_running(mode: str):
+    """
+    Around a background scan: moves it from queued to in flight, and counts
+    it by the status set on the yielded dict ("failed" if it raised).
+    """
+    SCANS_QUEUED.labels(mode).dec()
+    in_flight = SCANS_IN_FLIGHT.labels(mode)
+    in_flight.inc()
+    outcome = {"status": "failed"}
+    try:
+        yield outcome
+    finally:
+        in_flight.dec()
+        SCANS_TOTAL.labels(mode, outcome["status"]).inc()
+
+
+def track_tunnels(tunnel_manager):
+    """Register gauges read from the tunnel manager at scrape time."""
+    Gauge(
+        "vibecheck_tunnel_pending_requests",
+        "Requests waiting on a tunnel response on this node.",
+        function=tunnel_manager.pending_count,
+    )
+    Gauge(
+        "vibecheck_tunnels_active",
+        "Tunnel sessions connected to this node.",
+        function=lambda: len(tunnel_manager.active_connections),
+    )
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing HTTP requests by their matched route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route on the scope; the template
+            # ("/v1/assessments/{assessment_id}") keeps label cardinality low.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, status).observe(time.perf_counter() - start)
@@ -1,31 +1,81 @@
 import asyncio
+import os
+import socket
+import time
 from datetime import datetime
 
+import httpx
 from fastapi import WebSocket
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.config import settings
 from api.models.tunnel_session import TunnelSession
+from api.services.tunnel_protocol import BinaryCodec, JsonCodec
+from api.services.tunnel_registry import create_registry
 from api.utils.errors import VibeCheckError
 from api.utils.id_generator import generate_id
 
 
+class TunnelConnection:
+    """In-memory state for one connected tunnel client."""
+
+    def __init__(self, ws: WebSocket, codec: JsonCodec | BinaryCodec):
+        self.ws = ws
+        self.codec = codec
+        self.slots = asyncio.Semaphore(settings.TUNNEL_MAX_IN_FLIGHT)
+        self.queued = 0
+        self.request_ids: set[str] = set()
+        self.last_seen = time.monotonic()
+        self.last_heartbeat: datetime | None = None
+        self.heartbeat_task: asyncio.Task | None = None
+
+
 class TunnelManager:
-    def __init__(self):
-        self.active_connections: dict[str, WebSocket] = {}
+    """
+    Owns the tunnels connected to this API node. Sessions connected to other
+    nodes are found through the shared registry and reached by forwarding the
+    probe to the owning node's internal proxy endpoint.
+    """
+
+    def __init__(self, registry=None, node_id: str | None = None, node_url: str | None = None):
+        self.registry = registry or create_registry(settings.TUNNEL_REGISTRY)
+        self.node_id = node_id or settings.NODE_ID or f"{socket.gethostname()}-{os.getpid()}"
+        self.node_url = (node_url or settings.NODE_URL or "").rstrip("/") or None
+        self._forward_client: httpx.AsyncClient | None = None
+        self.active_connections: dict[str, TunnelConnection] = {}
         self.pending_requests: dict[str, asyncio.Future] = {}
+        # Heartbeats are kept in memory and written to TunnelSession in batches.
+        self._dirty_heartbeats: dict[str, datetime] = {}
+        self._evicted: set[str] = set()
+        self._flush_task: asyncio.Task | None = None
+        if self.node_url and not settings.NODE_SHARED_SECRET:
+            print("[tunnel_manager] NODE_URL is set without NODE_SHARED_SECRET; probes forwarded between nodes will be rejected")
 
     async def register(
-        self, ws: WebSocket, target_port: int, db: AsyncSession
+        self,
+        ws: WebSocket,
+        target_port: int,
+        db: AsyncSession,
+        codec: JsonCodec | BinaryCodec | None = None,
     ) -> str:
         session = TunnelSession(target_port=target_port)
         db.add(session)
         await db.commit()
         await db.refresh(session)
-        self.active_connections[session.id] = ws
+
+        conn = TunnelConnection(ws, codec or JsonCodec())
+        conn.heartbeat_task = asyncio.create_task(self._heartbeat_loop(session.id, conn))
+        self.active_connections[session.id] = conn
+        await self.registry.claim(session.id, self.node_id, self.node_url)
+        self._ensure_flush_task()
         return session.id
 
     async def unregister(self, session_id: str, db: AsyncSession):
-        self.active_connections.pop(session_id, None)
+        self._drop(session_id)
+        await self.registry.release(session_id, self.node_id)
+        self._dirty_heartbeats.pop(session_id, None)
+        self._evicted.discard(session_id)
         session = await db.get(TunnelSession, session_id)
         if session:
             session.status = "disconnected"
@@ -34,6 +84,19 @@ class TunnelManager:
     def is_connected(self, session_id: str) -> bool:
         return session_id in self.active_connections
 
+    async def is_reachable(self, session_id: str) -> bool:
+        """True when the tunnel is connected here or to another registered node."""
+        if self.is_connected(session_id):
+            return True
+        owner = await self.registry.lookup(session_id)
+        return bool(owner and owner[0] != self.node_id and owner[1])
+
+    def pending_count(self, session_id: str | None = None) -> int:
+        if session_id is None:
+            return len(self.pending_requests)
+        conn = self.active_connections.get(session_id)
+        return len(conn.request_ids) if conn else 0
+
     async def proxy_request(
         self,
         session_id: str,
@@ -42,46 +105,193 @@ class TunnelManager:
         headers: dict = None,
         body: str = None,
     ) -> dict:
-        ws = self.active_connections.get(session_id)
-        if not ws:
+        if session_id in self.active_connections:
+            return await self.proxy_local(session_id, method, path, headers, body)
+        return await self._proxy_remote(session_id, method, path, headers, body)
+
+    async def proxy_local(
+        self,
+        session_id: str,
+        method: str,
+        path: str,
+        headers: dict = None,
+        body: str = None,
+    ) -> dict:
+        conn = self.active_connections.get(session_id)
+        if not conn:
             raise VibeCheckError.tunnel_not_connected()
 
-        request_id = generate_id("req")
-        future = asyncio.get_event_loop().create_future()
-        self.pending_requests[request_id] = future
-
-        await ws.send_json(
-            {
-                "type": "http_request",
-                "request_id": request_id,
-                "method": method,
-                "path": path,
-                "headers": headers or {},
-                "body": body,
-            }
-        )
+        if conn.queued >= settings.TUNNEL_MAX_QUEUED:
+            raise VibeCheckError.tunnel_busy()
+        conn.queued += 1
+        try:
+            await asyncio.wait_for(
+                conn.slots.acquire(), timeout=settings.TUNNEL_QUEUE_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            raise VibeCheckError.tunnel_busy()
+        finally:
+            conn.queued -= 1
 
+        request_id = generate_id("req")
         try:
-            response = await asyncio.wait_for(future, timeout=15.0)
-            return response
+            if session_id not in self.active_connections:
+                raise VibeCheckError.tunnel_not_connected()
+
+            future = asyncio.get_running_loop().create_future()
+            self.pending_requests[request_id] = future
+            conn.request_ids.add(request_id)
+
+            await conn.codec.send_request(conn.ws, request_id, method, path, headers, body)
+            return await asyncio.wait_for(
+                future, timeout=settings.TUNNEL_REQUEST_TIMEOUT_SECONDS
+            )
         except asyncio.TimeoutError:
             raise VibeCheckError.target_unreachable()
         finally:
             self.pending_requests.pop(request_id, None)
+            conn.request_ids.discard(request_id)
+            conn.slots.release()
+
+    async def _proxy_remote(
+        self,
+        session_id: str,
+        method: str,
+        path: str,
+        headers: dict | None,
+        body: str | None,
+    ) -> dict:
+        owner = await self.registry.lookup(session_id)
+        if not owner or owner[0] == self.node_id or not owner[1]:
+            raise VibeCheckError.tunnel_not_connected()
+
+        if self._forward_client is None:
+            self._forward_client = httpx.AsyncClient(
+                timeout=settings.TUNNEL_QUEUE_TIMEOUT_SECONDS
+                + settings.TUNNEL_REQUEST_TIMEOUT_SECONDS
+            )
+        try:
+            resp = await self._forward_client.post(
+                f"{owner[1]}/internal/tunnel/sessions/{session_id}/proxy",
+                headers={"X-VibeCheck-Node-Secret": settings.NODE_SHARED_SECRET},
+                json={"method": method, "path": path, "headers": headers or {}, "body": body},
+            )
+        except httpx.HTTPError:
+            raise VibeCheckError.tunnel_not_connected()
+
+        if resp.status_code == 200:
+            return resp.json()
+        try:
+            code = (resp.json().get("error") or {}).get("code")
+        except (ValueError, AttributeError):
+            code = None
+        if code == "TUNNEL_BUSY":
+            raise VibeCheckError.tunnel_busy()
+        if code == "TARGET_UNREACHABLE":
+            raise VibeCheckError.target_unreachable()
+        raise VibeCheckError.tunnel_not_connected()
+
+    async def handle_message(self, session_id: str, data: dict):
+        conn = self.active_connections.get(session_id)
+        if conn:
+            conn.last_seen = time.monotonic()
 
-    async def handle_message(
-        self, session_id: str, data: dict, db: AsyncSession
-    ):
         if data.get("type") == "http_response":
             request_id = data.get("request_id")
             future = self.pending_requests.get(request_id)
             if future and not future.done():
                 future.set_result(data)
-        elif data.get("type") == "pong":
-            session = await db.get(TunnelSession, session_id)
-            if session:
-                session.last_heartbeat = datetime.utcnow()
-                await db.commit()
+        elif data.get("type") == "pong" and conn:
+            conn.last_heartbeat = datetime.utcnow()
+            self._dirty_heartbeats[session_id] = conn.last_heartbeat
+
+    async def shutdown(self):
+        for session_id in list(self.active_connections):
+            self._drop(session_id)
+            try:
+                await self.registry.release(session_id, self.node_id)
+            except Exception as e:
+                print(f"[tunnel_manager] Registry release failed for {session_id}: {e}")
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._forward_client is not None:
+            await self._forward_client.aclose()
+            self._forward_client = None
+        await self.flush_heartbeats()
+
+    def _drop(self, session_id: str) -> TunnelConnection | None:
+        conn = self.active_connections.pop(session_id, None)
+        if not conn:
+            return None
+        if conn.heartbeat_task and conn.heartbeat_task is not asyncio.current_task():
+            conn.heartbeat_task.cancel()
+        for request_id in list(conn.request_ids):
+            future = self.pending_requests.get(request_id)
+            if future and not future.done():
+                future.set_exception(VibeCheckError.tunnel_not_connected())
+        return conn
+
+    async def _evict(self, session_id: str, conn: TunnelConnection):
+        """Drop a tunnel whose client stopped answering pings."""
+        if not self._drop(session_id):
+            return
+        self._evicted.add(session_id)
+        try:
+            await asyncio.wait_for(
+                conn.ws.close(code=1011, reason="Heartbeat timeout"), timeout=5.0
+            )
+        except Exception:
+            pass
+
+    async def _heartbeat_loop(self, session_id: str, conn: TunnelConnection):
+        interval = settings.TUNNEL_PING_INTERVAL_SECONDS
+        timeout = settings.TUNNEL_PING_TIMEOUT_SECONDS
+        while self.active_connections.get(session_id) is conn:
+            await asyncio.sleep(interval)
+            if time.monotonic() - conn.last_seen > timeout:
+                await self._evict(session_id, conn)
+                return
+            try:
+                await conn.ws.send_json({"type": "ping"})
+            except Exception:
+                await self._evict(session_id, conn)
+                return
+
+    def _ensure_flush_task(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.TUNNEL_HEARTBEAT_FLUSH_SECONDS)
+            try:
+                await self.flush_heartbeats()
+            except Exception as e:
+                print(f"[tunnel_manager] Heartbeat flush failed: {e}")
+
+    async def flush_heartbeats(self):
+        """Write buffered heartbeats and evictions to TunnelSession in one transaction."""
+        if not self._dirty_heartbeats and not self._evicted:
+            return
+        from api.database import async_sessionmaker_factory
+
+        heartbeats, self._dirty_heartbeats = self._dirty_heartbeats, {}
+        evicted, self._evicted = self._evicted, set()
+        async with async_sessionmaker_factory() as db:
+            for session_id, beat in heartbeats.items():
+                await db.execute(
+                    update(TunnelSession)
+                    .where(TunnelSession.id == session_id)
+                    .values(last_heartbeat=beat)
+                )
+            if evicted:
+                await db.execute(
+                    update(TunnelSession)
+                    .where(TunnelSession.id.in_(evicted))
+                    .values(status="disconnected")
+                )
+            await db.commit()
 
 
 tunnel_manager = TunnelManager()
@@ -0,0 +1,212 @@
+"""
+Wire formats for the WebSocket tunnel.
+
+Control messages (connect, session_created, ping, pong) are always JSON text
+frames. HTTP request/response traffic uses whatever the client negotiated in
+its `connect` message:
+
+- "json": the original text frames, body as decoded text.
+- "vcb1": binary frames carrying the body as raw bytes, with msgpack (or
+  compact JSON) metadata and optional per-message zlib compression.
+
+vcb1 frame layout (all integers big-endian):
+
+    magic "V" | flags u8 | id_len u8 | request_id | payload
+
+payload (zlib-compressed when FLAG_ZLIB is set):
+
+    meta_len u32 | meta | body
+"""
+
+import json
+import struct
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; vcb1 falls back to JSON metadata
+    msgpack = None
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "vcb1"
+
+FRAME_MAGIC = b"V"
+FLAG_ZLIB = 0x01
+FLAG_MSGPACK = 0x02
+
+# Below ~1 KiB zlib costs more CPU than it saves on a local tunnel.
+COMPRESS_MIN_BYTES = 1024
+# Upper bound on a decompressed payload; client bodies are capped far below it.
+MAX_FRAME_BYTES = 1024 * 1024
+
+_HEADER = struct.Struct("!cBB")
+_META_LEN = struct.Struct("!I")
+
+# Everything a malformed frame can raise while decoding. ValueError covers
+# UnicodeDecodeError, json.JSONDecodeError and most msgpack unpack errors.
+_DECODE_ERRORS = (struct.error, zlib.error, ValueError, TypeError) + (
+    (msgpack.UnpackException,) if msgpack is not None else ()
+)
+
+
+class TunnelProtocolError(ValueError):
+    pass
+
+
+def available_codecs() -> list[str]:
+    return ["msgpack", "json"] if msgpack is not None else ["json"]
+
+
+def encode_frame(
+    request_id: str,
+    meta: dict,
+    body: bytes = b"",
+    use_msgpack: bool = True,
+    compress: bool = True,
+) -> bytes:
+    flags = 0
+    if use_msgpack and msgpack is not None:
+        meta_bytes = msgpack.packb(meta, use_bin_type=True)
+        flags |= FLAG_MSGPACK
+    else:
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+
+    payload = _META_LEN.pack(len(meta_bytes)) + meta_bytes + body
+    if compress and len(payload) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, 1)
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= FLAG_ZLIB
+
+    rid = request_id.encode("ascii")
+    return _HEADER.pack(FRAME_MAGIC, flags, len(rid)) + rid + payload
+
+
+def decode_frame(frame: bytes) -> dict:
+    """
+    Decode a vcb1 frame into a message dict whose `body` is raw bytes. Any
+    malformed frame raises TunnelProtocolError, and a compressed payload may
+    not inflate past MAX_FRAME_BYTES.
+    """
+    try:
+        magic, flags, rid_len = _HEADER.unpack_from(frame)
+        if magic != FRAME_MAGIC:
+            raise TunnelProtocolError("Unknown tunnel frame magic")
+
+        offset = _HEADER.size
+        request_id = bytes(frame[offset:offset + rid_len]).decode("ascii")
+        payload = memoryview(frame)[offset + rid_len:]
+        if flags & FLAG_ZLIB:
+            inflater = zlib.decompressobj()
+            payload = memoryview(inflater.decompress(payload, MAX_FRAME_BYTES))
+            if inflater.unconsumed_tail or not inflater.eof:
+                raise TunnelProtocolError("Compressed tunnel frame is too large or truncated")
+
+        (meta_len,) = _META_LEN.unpack_from(payload)
+        meta_end = _META_LEN.size + meta_len
+        if meta_end > len(payload):
+            raise TunnelProtocolError("Truncated tunnel frame metadata")
+        meta_bytes = payload[_META_LEN.size:meta_end]
+        if flags & FLAG_MSGPACK:
+            if msgpack is None:
+                raise TunnelProtocolError("Received msgpack frame but msgpack is not installed")
+            meta = msgpack.unpackb(meta_bytes, raw=False)
+        else:
+            meta = json.loads(bytes(meta_bytes))
+        if not isinstance(meta, dict):
+            raise TunnelProtocolError("Tunnel frame metadata is not an object")
+    except TunnelProtocolError:
+        raise
+    except _DECODE_ERRORS as e:
+        raise TunnelProtocolError(f"Malformed tunnel frame: {e}") from e
+
+    meta["request_id"] = request_id
+    meta["body"] = bytes(payload[meta_end:])
+    return meta
+
+
+class JsonCodec:
+    """Original text protocol, used when the client does not negotiate vcb1."""
+
+    name = PROTOCOL_JSON
+
+    def describe(self) -> dict:
+        return {"protocol": PROTOCOL_JSON}
+
+    async def send_request(
+        self,
+        ws: WebSocket,
+        request_id: str,
+        method: str,
+        path: str,
+        headers: dict | None,
+        body: str | None,
+    ):
+        await ws.send_json(
+            {
+                "type": "http_request",
+                "request_id": request_id,
+                "method": method,
+                "path": path,
+                "headers": headers or {},
+                "body": body,
+            }
+        )
+
+
+class BinaryCodec:
+    name = PROTOCOL_BINARY
+
+    def __init__(self, use_msgpack: bool, compress: bool):
+        self.use_msgpack = use_msgpack
+        self.compress = compress
+
+    def describe(self) -> dict:
+        return {
+            "protocol": PROTOCOL_BINARY,
+            "codec": "msgpack" if self.use_msgpack else "json",
+            "compression": "zlib" if self.compress else None,
+        }
+
+    async def send_request(
+        self,
+        ws: WebSocket,
+        request_id: str,
+        method: str,
+        path: str,
+        headers: dict | None,
+        body: str | None,
+    ):
+        frame = encode_frame(
+            request_id,
+            {"type": "http_request", "method": method, "path": path, "headers": headers or {}},
+            body.encode("utf-8") if body else b"",
+            use_msgpack=self.use_msgpack,
+            compress=self.compress,
+        )
+        await ws.send_bytes(frame)
+
+
+def negotiate(connect_message: dict) -> JsonCodec | BinaryCodec:
+    """Pick the richest wire format both sides support."""
+    if PROTOCOL_BINARY not in (connect_message.get("protocols") or []):
+        return JsonCodec()
+    client_codecs = connect_message.get("codecs") or ["json"]
+    use_msgpack = "msgpack" in client_codecs and msgpack is not None
+    compress = "zlib" in (connect_message.get("compression") or [])
+    return BinaryCodec(use_msgpack=use_msgpack, compress=compress)
+
+
+async def receive_message(ws: WebSocket) -> dict:
+    """Receive either a JSON text frame or a vcb1 binary frame."""
+    message = await ws.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("bytes") is not None:
+        return decode_frame(message["bytes"])
+    try:
+        return json.loads(message["text"])
+    except ValueError as e:
+        raise TunnelProtocolError(f"Malformed tunnel message: {e}") from e
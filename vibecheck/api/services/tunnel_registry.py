@@ -0,0 +1,105 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from api.config import settings
+from api.models.tunnel_session import TunnelSession
+
+
+class InMemoryTunnelRegistry:
+    """
+    Process-local registry. All instances share one table so several
+    TunnelManager objects in a single process can stand in for API nodes.
+    """
+
+    _owners: dict[str, tuple[str, str | None]] = {}
+
+    async def claim(self, session_id: str, node_id: str, node_url: str | None):
+        self._owners[session_id] = (node_id, node_url)
+
+    async def release(self, session_id: str, node_id: str):
+        owner = self._owners.get(session_id)
+        if owner and owner[0] == node_id:
+            self._owners.pop(session_id, None)
+
+    async def lookup(self, session_id: str) -> tuple[str, str | None] | None:
+        return self._owners.get(session_id)
+
+
+class SqlTunnelRegistry:
+    """
+    Registry backed by the TunnelSession table, so it works on whatever
+    DATABASE_URL (SQLite or Postgres) every API replica already shares.
+    """
+
+    LOOKUP_TTL_SECONDS = 2.0
+    # A row whose heartbeat is older than this many flush intervals belongs
+    # to a node that crashed or was killed without releasing it.
+    STALE_AFTER_FLUSHES = 3
+
+    def __init__(self):
+        self._cache: dict[str, tuple[float, tuple[str, str | None] | None]] = {}
+
+    async def claim(self, session_id: str, node_id: str, node_url: str | None):
+        from api.database import async_sessionmaker_factory
+
+        async with async_sessionmaker_factory() as db:
+            await db.execute(
+                update(TunnelSession)
+                .where(TunnelSession.id == session_id)
+                .values(node_id=node_id, node_url=node_url, last_heartbeat=datetime.utcnow())
+            )
+            await db.commit()
+        self._cache.pop(session_id, None)
+
+    async def release(self, session_id: str, node_id: str):
+        from api.database import async_sessionmaker_factory
+
+        # Guarded by node_id so a node that has since claimed the session
+        # keeps it.
+        async with async_sessionmaker_factory() as db:
+            await db.execute(
+                update(TunnelSession)
+                .where(TunnelSession.id == session_id, TunnelSession.node_id == node_id)
+                .values(node_id=None, node_url=None)
+            )
+            await db.commit()
+        self._cache.pop(session_id, None)
+
+    async def lookup(self, session_id: str) -> tuple[str, str | None] | None:
+        now = time.monotonic()
+        cached = self._cache.get(session_id)
+        if cached and now - cached[0] < self.LOOKUP_TTL_SECONDS:
+            return cached[1]
+
+        from api.database import async_sessionmaker_factory
+
+        async with async_sessionmaker_factory() as db:
+            result = await db.execute(
+                select(TunnelSession.node_id, TunnelSession.node_url).where(
+                    TunnelSession.id == session_id,
+                    TunnelSession.status == "connected",
+                    TunnelSession.last_heartbeat >= self._stale_before(),
+                )
+            )
+            row = result.first()
+
+        owner = (row.node_id, row.node_url) if row and row.node_id else None
+        self._cache[session_id] = (now, owner)
+        return owner
+
+    def _stale_before(self) -> datetime:
+        window = max(
+            self.STALE_AFTER_FLUSHES * settings.TUNNEL_HEARTBEAT_FLUSH_SECONDS,
+            settings.TUNNEL_PING_TIMEOUT_SECONDS,
+        )
+        return datetime.utcnow() - timedelta(seconds=window)
+
+
+def create_registry(kind: str) -> InMemoryTunnelRegistry | SqlTunnelRegistry:
+    if kind == "memory":
+        return InMemoryTunnelRegistry()
+    if kind == "sql":
+        return SqlTunnelRegistry()
+    raise ValueError(f"Unknown TUNNEL_REGISTRY '{kind}'. Expected 'sql' or 'memory'.")
@@ -0,0 +1,295 @@
+"""
+Workspace model: one SubProject per manifest directory and ecosystem, so a
+monorepo with many packages is not flattened into a single language,
+framework and dependency map.
+"""
+
+import json
+import os
+import re
+import tomllib
+
+_NPM_FRAMEWORKS = [
+    ("next", "nextjs"),
+    ("express", "express"),
+    ("react", "react"),
+    ("vue", "vue"),
+    ("@angular/core", "angular"),
+    ("svelte", "svelte"),
+    ("fastify", "fastify"),
+    ("hono", "hono"),
+]
+_PYTHON_FRAMEWORKS = [("flask", "flask"), ("django", "django"), ("fastapi", "fastapi")]
+
+_ECOSYSTEM_LANGUAGES = {"npm": "javascript", "PyPI": "python", "Go": "go", "crates.io": "rust"}
+_ECOSYSTEM_EXTENSIONS = {
+    "npm": {".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".vue", ".svelte"},
+    "PyPI": {".py"},
+    "Go": {".go"},
+    "crates.io": {".rs"},
+}
+EXTENSION_LANGUAGES = {
+    ".py": "python", ".js": "javascript", ".ts": "typescript",
+    ".go": "go", ".rs": "rust", ".rb": "ruby", ".php": "php", ".java": "java",
+}
+
+_REQUIREMENT_SEPARATORS = ["==", ">=", "<=", "~=", "!="]
+_PEP508_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*([^;]*)")
+_GO_REQUIRE_RE = re.compile(r"^\s*(?:require\s+)?([^\s()]+)\s+(v[^\s]+)")
+
+
+class SubProject:
+    """One manifest-rooted package: its directory, ecosystem, dependencies and files."""
+
+    __slots__ = ("path", "ecosystem", "language", "framework", "manifests", "dependencies", "files")
+
+    def __init__(self, path: str, ecosystem: str | None, language: str | None):
+        self.path = path
+        self.ecosystem = ecosystem
+        self.language = language
+        self.framework: str | None = None
+        self.manifests: list[str] = []
+        self.dependencies: dict[str, str] = {}
+        self.files: list = []
+
+    def project_info(self, workspace: "Workspace") -> dict:
+        """project_info-shaped view of just this sub-project."""
+        return {
+            "project_path": self.path,
+            "language": self.language or workspace.dominant_language(self.files),
+            "framework": self.framework,
+            "dependencies": dict(self.dependencies),
+            "ecosystem_dependencies": (
+                {self.ecosystem: dict(self.dependencies)} if self.ecosystem else {}
+            ),
+            "has_gitignore": workspace.has_gitignore,
+            "gitignore_entries": workspace.gitignore_entries,
+        }
+
+    def summary(self) -> dict:
+        return {
+            "path": self.path,
+            "ecosystem": self.ecosystem,
+            "language": self.language,
+            "framework": self.framework,
+            "manifests": self.manifests,
+            "dependency_count": len(self.dependencies),
+            "file_count": len(self.files),
+        }
+
+
+class Workspace:
+    def __init__(self):
+        self.projects: list[SubProject] = []
+        self.has_gitignore = False
+        self.gitignore_entries: list[str] = []
+        self._by_dir: dict[str, list[SubProject]] = {}
+
+    def owner(self, path: str) -> SubProject | None:
+        """Sub-project owning a file: nearest manifest directory, matching ecosystem if several."""
+        return self._pick(self._candidates(path.rpartition("/")[0]), path)
+
+    def _candidates(self, directory: str) -> list[SubProject]:
+        while True:
+            candidates = self._by_dir.get(directory)
+            if candidates:
+                return candidates
+            if not directory:
+                return []
+            directory = directory.rpartition("/")[0]
+
+    @staticmethod
+    def _pick(candidates: list[SubProject], path: str) -> SubProject | None:
+        if len(candidates) > 1:
+            ext = os.path.splitext(path)[1]
+            for project in candidates:
+                if ext in _ECOSYSTEM_EXTENSIONS.get(project.ecosystem, ()):
+                    return project
+        return candidates[0] if candidates else None
+
+    def dominant_language(self, files: list) -> str | None:
+        counts: dict[str, int] = {}
+        for f in files:
+            ext = os.path.splitext(f["path"])[1]
+            counts[ext] = counts.get(ext, 0) + 1
+        if not counts:
+            return None
+        return EXTENSION_LANGUAGES.get(max(counts, key=counts.get), "unknown")
+
+    def project_info(self, files: list) -> dict:
+        """
+        Merged whole-repo view with the legacy project_info keys. Language and
+        framework come from the root project if it has a manifest, otherwise
+        from the largest sub-project.
+        """
+        info: dict = {
+            "language": None,
+            "framework": None,
+            "dependencies": {},
+            # Same dependencies keyed by advisory ecosystem ("npm", "PyPI") so
+            # version specs are compared with the right scheme.
+            "ecosystem_dependencies": {},
+            "has_gitignore": self.has_gitignore,
+            "gitignore_entries": self.gitignore_entries,
+            "projects": [p.summary() for p in self.projects],
+            "workspace": self,
+        }
+        for project in self.projects:
+            info["dependencies"].update(project.dependencies)
+            if project.ecosystem:
+                info["ecosystem_dependencies"].setdefault(project.ecosystem, {}).update(
+                    project.dependencies
+                )
+
+        manifested = [p for p in self.projects if p.manifests]
+        ranked = sorted(manifested, key=lambda p: (p.path != "", -len(p.files)))
+        for project in ranked:
+            info["language"] = info["language"] or project.language
+            info["framework"] = info["framework"] or project.framework
+        if not info["language"]:
+            info["language"] = self.dominant_language(files)
+        return info
+
+
+def build_workspace(files: list) -> Workspace:
+    """
+    Index every manifest as its own sub-project and assign each file to the
+    sub-project that owns its directory, in a single pass over `files`.
+    """
+    workspace = Workspace()
+    projects: dict[tuple[str, str], SubProject] = {}
+    files_by_dir: dict[str, list] = {}
+    root_gitignore = False
+
+    for f in files:
+        path = f["path"]
+        directory, _, name = path.rpartition("/")
+        files_by_dir.setdefault(directory, []).append(f)
+
+        manifest = _MANIFESTS.get(name)
+        if manifest:
+            ecosystem, parse = manifest
+            project = projects.get((directory, ecosystem))
+            if project is None:
+                project = SubProject(directory, ecosystem, _ECOSYSTEM_LANGUAGES[ecosystem])
+                projects[(directory, ecosystem)] = project
+            project.manifests.append(path)
+            parse(f["content"], project)
+        elif name == ".gitignore" and not root_gitignore:
+            root_gitignore = directory == ""
+            workspace.has_gitignore = True
+            workspace.gitignore_entries = [
+                line.strip()
+                for line in f["content"].splitlines()
+                if line.strip() and not line.startswith("#")
+            ]
+
+    workspace.projects = sorted(projects.values(), key=lambda p: (p.path, p.ecosystem))
+    for project in workspace.projects:
+        workspace._by_dir.setdefault(project.path, []).append(project)
+
+    unowned = None
+    for directory, dir_files in files_by_dir.items():
+        candidates = workspace._candidates(directory)
+        for f in dir_files:
+            project = workspace._pick(candidates, f["path"])
+            if project is None:
+                if unowned is None:
+                    unowned = SubProject("", None, None)
+                project = unowned
+            project.files.append(f)
+    if unowned is not None:
+        workspace.projects.append(unowned)
+    return workspace
+
+
+def _parse_package_json(content: str, project: SubProject):
+    try:
+        pkg = json.loads(content)
+    except json.JSONDecodeError:
+        return
+    if not isinstance(pkg, dict):
+        return
+    deps = {**(pkg.get("dependencies") or {}), **(pkg.get("devDependencies") or {})}
+    project.dependencies.update(deps)
+    project.framework = project.framework or _detect_framework(deps, _NPM_FRAMEWORKS)
+
+
+def _parse_requirements(content: str, project: SubProject):
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        for sep in _REQUIREMENT_SEPARATORS:
+            if sep in line:
+                name, ver = line.split(sep, 1)
+                project.dependencies[name.strip()] = ver.strip()
+                break
+        else:
+            project.dependencies[line] = "*"
+    project.framework = project.framework or _detect_framework(project.dependencies, _PYTHON_FRAMEWORKS)
+
+
+def _parse_pyproject(content: str, project: SubProject):
+    try:
+        data = tomllib.loads(content)
+    except tomllib.TOMLDecodeError:
+        return
+    for requirement in (data.get("project") or {}).get("dependencies") or []:
+        match = _PEP508_RE.match(requirement)
+        if match:
+            project.dependencies[match.group(1)] = match.group(2).strip() or "*"
+    poetry = ((data.get("tool") or {}).get("poetry") or {}).get("dependencies") or {}
+    for name, spec in poetry.items():
+        if name.lower() == "python":
+            continue
+        if isinstance(spec, dict):
+            spec = spec.get("version", "*")
+        project.dependencies[name] = str(spec)
+    project.framework = project.framework or _detect_framework(project.dependencies, _PYTHON_FRAMEWORKS)
+
+
+def _parse_go_mod(content: str, project: SubProject):
+    project.framework = project.framework or "go"
+    in_block = False
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("require ("):
+            in_block = True
+            continue
+        if in_block and stripped == ")":
+            in_block = False
+            continue
+        if in_block or stripped.startswith("require "):
+            match = _GO_REQUIRE_RE.match(stripped)
+            if match:
+                project.dependencies[match.group(1)] = match.group(2)
+
+
+def _parse_cargo_toml(content: str, project: SubProject):
+    try:
+        data = tomllib.loads(content)
+    except tomllib.TOMLDecodeError:
+        return
+    for table in ("dependencies", "dev-dependencies"):
+        for name, spec in (data.get(table) or {}).items():
+            if isinstance(spec, dict):
+                spec = spec.get("version", "*")
+            project.dependencies[name] = str(spec)
+
+
+def _detect_framework(deps: dict, frameworks: list[tuple[str, str]]) -> str | None:
+    lowered = {name.lower() for name in deps}
+    for package, framework in frameworks:
+        if package in lowered:
+            return framework
+    return None
+
+
+_MANIFESTS = {
+    "package.json": ("npm", _parse_package_json),
+    "requirements.txt": ("PyPI", _parse_requirements),
+    "pyproject.toml": ("PyPI", _parse_pyproject),
+    "go.mod": ("Go", _parse_go_mod),
+    "Cargo.toml": ("crates.io", _parse_cargo_toml),
+}
@@ -96,6 +96,26 @@ class VibeCheckError(Exception):
             502,
         )
 
+    @classmethod
+    def invalid_archive(cls, reason: str):
+        return cls(
+            "validation_error",
+            f"Upload is not a readable .tar.gz or .zip archive: {reason}",
+            "INVALID_ARCHIVE",
+            400,
+            "archive",
+        )
+
+    @classmethod
+    def upload_too_large(cls, limit: int):
+        return cls(
+            "validation_error",
+            f"Upload exceeds the {limit // (1024 * 1024)} MB limit.",
+            "UPLOAD_TOO_LARGE",
+            413,
+            "archive",
+        )
+
     @classmethod
     def duplicate_idempotency_key(cls):
         return cls(
@@ -113,3 +133,21 @@ class VibeCheckError(Exception):
             "TARGET_UNREACHABLE",
             502,
         )
+
+    @classmethod
+    def tunnel_busy(cls):
+        return cls(
+            "tunnel_error",
+            "Tunnel has too many requests in flight. Retry shortly.",
+            "TUNNEL_BUSY",
+            503,
+        )
+
+    @classmethod
+    def invalid_node_secret(cls):
+        return cls(
+            "forbidden",
+            "Internal node request rejected: missing or invalid node secret.",
+            "INVALID_NODE_SECRET",
+            403,
+        )
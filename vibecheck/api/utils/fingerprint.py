@@ -0,0 +1,64 @@
+import hashlib
+import re
+from urllib.parse import urlsplit
+
+_FILE_LINE = re.compile(r"[A-Za-z0-9_\-./]+\.[A-Za-z0-9]+:\d+")
+_LINE_REF = re.compile(r"\bline\s+\d+\b", re.IGNORECASE)
+_VERSION = re.compile(r"\bv?\d+(?:\.\d+)+[\w.\-+]*")
+_DOT_SLASH = re.compile(r"^(?:\./)+")
+
+
+def digest(*parts: str) -> str:
+    """Short stable hash of `parts`, joined with '|'."""
+    payload = "|".join(parts)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+def normalize_title(title: str | None) -> str:
+    """Lowercase, with file:line references, line numbers and versions removed."""
+    text = _FILE_LINE.sub(" ", title or "")
+    text = _LINE_REF.sub(" ", text)
+    text = _VERSION.sub(" ", text)
+    return " ".join(text.split()).lower()
+
+
+def finding_place(location: dict | None, evidence: dict | None = None) -> str:
+    """
+    Where a finding is, stable across runs: the file, the dependency, or the
+    endpoint path. Line numbers, installed versions and the target host
+    (a new tunnel per run) are left out.
+    """
+    location = location if isinstance(location, dict) else {}
+    evidence = evidence if isinstance(evidence, dict) else {}
+    if location.get("package"):
+        parts = [location.get("file") or location.get("project") or "", location["package"]]
+        return ":".join(parts)
+    if location.get("file"):
+        return _DOT_SLASH.sub("", str(location["file"]))
+    url = location.get("url") or evidence.get("url")
+    if url:
+        path = urlsplit(str(url)).path or "/"
+        method = evidence.get("method")
+        return f"{method.upper()} {path}" if isinstance(method, str) else path
+    return ""
+
+
+def finding_fingerprint(
+    category: str | None,
+    title: str | None,
+    location: dict | None,
+    evidence: dict | None = None,
+) -> str:
+    """
+    Identity of a finding across assessments of the same repo or target:
+    category, normalized title, place, and the scanner rule id (or CVE) when
+    there is one. Two runs reporting the same issue get the same value.
+    """
+    evidence = evidence if isinstance(evidence, dict) else {}
+    rule_id = evidence.get("rule_id") or evidence.get("cve") or ""
+    return digest(
+        category or "unknown",
+        normalize_title(title),
+        finding_place(location, evidence),
+        str(rule_id),
+    )
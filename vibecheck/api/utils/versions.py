@@ -0,0 +1,77 @@
+import re
+from functools import total_ordering
+
+from packaging.version import InvalidVersion, Version
+
+_SEMVER_RE = re.compile(
+    r"^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:\.(\d+))?"
+    r"(?:-([0-9A-Za-z.\-]+))?(?:\+[0-9A-Za-z.\-]+)?$"
+)
+
+
+@total_ordering
+class _Infinity:
+    """Unbounded end of a version range; compares against any version key."""
+
+    def __init__(self, sign: int):
+        self.sign = sign
+
+    def __eq__(self, other):
+        return isinstance(other, _Infinity) and other.sign == self.sign
+
+    def __lt__(self, other):
+        if isinstance(other, _Infinity):
+            return self.sign < other.sign
+        return self.sign < 0
+
+    def __hash__(self):
+        return hash(("_Infinity", self.sign))
+
+    def __repr__(self):
+        return "-inf" if self.sign < 0 else "+inf"
+
+
+MIN_VERSION = _Infinity(-1)
+MAX_VERSION = _Infinity(1)
+
+
+def normalize_package_name(ecosystem: str, name: str) -> str:
+    """Canonical package name: PEP 503 for PyPI, lowercase for npm, as-is otherwise."""
+    name = name.strip()
+    if ecosystem == "PyPI":
+        return re.sub(r"[-_.]+", "-", name).lower()
+    if ecosystem == "npm":
+        return name.lower()
+    return name
+
+
+def parse_version(ecosystem: str, version: str):
+    """
+    Comparable key for a version string, or None if it cannot be parsed.
+    PyPI uses PEP 440; every other ecosystem uses semver precedence
+    (prereleases sort before the release, build metadata is ignored).
+    """
+    version = (version or "").strip()
+    if not version:
+        return None
+    if ecosystem == "PyPI":
+        try:
+            return Version(version)
+        except InvalidVersion:
+            return None
+    return _semver_key(version)
+
+
+def _semver_key(version: str):
+    match = _SEMVER_RE.match(version)
+    if not match:
+        return None
+    major, minor, patch, extra, pre = match.groups()
+    release = (int(major), int(minor or 0), int(patch or 0), int(extra or 0))
+    if pre is None:
+        return (release, 1, ())
+    identifiers = tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in pre.split(".")
+    )
+    return (release, 0, identifiers)
@@ -0,0 +1,91 @@
+"""
+Lookup latency of the offline advisory database.
+
+Run from vibecheck/:
+
+    python -m benchmarks.advisory_lookup [--advisories 30000] [--lookups 20000]
+
+Generates synthetic OSV records spread over npm and PyPI packages, imports
+them into a temporary SQLite index, then times `AdvisoryDatabase.match` for
+random (package, version) pairs. "cold" lookups include the indexed query and
+interval tree build for the package; "warm" ones hit the LRU cache.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from api.services.advisory_db import AdvisoryDatabase
+
+_ECOSYSTEMS = ["npm", "PyPI"]
+
+
+def generate_records(count: int, packages: int, seed: int = 11) -> list[dict]:
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        ecosystem = rng.choice(_ECOSYSTEMS)
+        major = rng.randint(0, 9)
+        introduced = "0" if rng.random() < 0.3 else f"{major}.{rng.randint(0, 9)}.0"
+        fixed = f"{major + rng.randint(0, 2)}.{rng.randint(0, 20)}.{rng.randint(1, 9)}"
+        events = [{"introduced": introduced}]
+        if rng.random() < 0.9:
+            events.append({"fixed": fixed})
+        records.append({
+            "id": f"GHSA-bench-{i:06d}",
+            "aliases": [f"CVE-2024-{i:05d}"],
+            "summary": f"Synthetic advisory {i}",
+            "database_specific": {"severity": rng.choice(["LOW", "MODERATE", "HIGH", "CRITICAL"])},
+            "affected": [{
+                "package": {"ecosystem": ecosystem, "name": f"pkg-{rng.randrange(packages)}"},
+                "ranges": [{"type": "ECOSYSTEM", "events": events}],
+            }],
+        })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--advisories", type=int, default=30_000)
+    parser.add_argument("--packages", type=int, default=3_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "osv.json")
+        with open(source, "w") as fh:
+            json.dump(generate_records(args.advisories, args.packages), fh)
+
+        db = AdvisoryDatabase(os.path.join(tmp, "advisories.db"))
+        start = time.perf_counter()
+        count = db.import_osv([source])
+        print(f"imported {count} advisories in {time.perf_counter() - start:.2f} s")
+
+        rng = random.Random(5)
+        queries = [
+            (
+                rng.choice(_ECOSYSTEMS),
+                f"pkg-{rng.randrange(args.packages)}",
+                f"{rng.randint(0, 10)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}",
+            )
+            for _ in range(args.lookups)
+        ]
+
+        for label in ("cold", "warm"):
+            matched = 0
+            start = time.perf_counter()
+            for ecosystem, package, version in queries:
+                matched += len(db.match(ecosystem, package, version))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:<6} {len(queries)} lookups {elapsed:>7.3f} s "
+                f"{elapsed / len(queries) * 1e6:>7.1f} us/lookup ({matched} matches)"
+            )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Repo ingestion: thread-pool reads versus a single reader thread.
+
+Run from vibecheck/:
+
+    python -m benchmarks.ingest_read [--files 20000] [--workers 8] [--root DIR]
+
+Writes a synthetic source tree to a temporary directory (or reads an existing
+checkout given with --root) and times `lightweight_scanner.read_tree` with one
+worker and with --workers workers. Both runs produce the same file list; the
+second run is checked against the first. The files are in the page cache after
+the first pass, so on a local disk this mostly measures the per-file syscall
+and classification overhead; the gain from overlapping reads is larger on
+network-backed volumes, where each open/read waits on a round trip.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from api.services.content_classifier import IngestStats
+from api.services.lightweight_scanner import read_tree
+
+_EXTENSIONS = [".py", ".js", ".ts", ".tsx", ".go", ".json", ".yml", ".md"]
+
+
+def write_tree(root: str, count: int, seed: int = 3):
+    rng = random.Random(seed)
+    for n in range(count):
+        directory = os.path.join(root, f"pkg{n % 40}", f"sub{n % 7}")
+        os.makedirs(directory, exist_ok=True)
+        lines = [f"line {i} of module {n}: value = {rng.random():.6f}" for i in range(rng.randint(20, 400))]
+        with open(os.path.join(directory, f"m{n}{rng.choice(_EXTENSIONS)}"), "w") as fh:
+            fh.write("\n".join(lines))
+
+
+def _time(label: str, root: str, workers: int) -> tuple[float, list[str]]:
+    ingest = IngestStats()
+    start = time.perf_counter()
+    files = read_tree(root, ingest, workers=workers)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:>7.2f} s  {ingest.files_read} files, {ingest.bytes_read / 1e6:.1f} MB")
+    return elapsed, [f["path"] for f in files]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--root", help="existing directory to read instead of a synthetic tree")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.root
+        if root is None:
+            root = tmp
+            write_tree(root, args.files)
+
+        _time("warm-up", root, 1)
+        serial, serial_paths = _time("1 worker", root, 1)
+        pooled, pooled_paths = _time(f"{args.workers} workers", root, args.workers)
+        assert serial_paths == pooled_paths, "read order depends on worker count"
+        print(f"speedup: {serial / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
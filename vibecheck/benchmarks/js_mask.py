@@ -0,0 +1,98 @@
+"""
+Cost of the masked JS/TS view in pattern_scanner.
+
+Run from vibecheck/:
+
+    python -m benchmarks.js_mask [--files 5000]
+
+Generates synthetic .js/.tsx modules with comments, strings and template
+literals, some of which mention sinks (`innerHTML`, `eval(`) in comments or
+strings only. "raw" runs every pattern rule for the file type over the
+original lines, as before masking; "masked" is `pattern_scanner.scan`, which
+masks each file once and runs the `view: masked` rules over the masked
+lines. `js_mask.mask` on its own is timed too.
+"""
+
+import argparse
+import random
+import time
+
+from api.services.rules import get_registry
+from api.services.scanners import js_mask, pattern_scanner
+
+_LINES = [
+    "// Render the {name} panel; never assign innerHTML directly",
+    "import {{ useState }} from 'react';",
+    "const label_{i} = \"Click to eval(expression) in the sandbox\";",
+    "const url_{i} = `${{base}}/api/items/${{id}}?page={i}`;",
+    "/* legacy: el.innerHTML = html; */",
+    "export function handler{i}(props) {{",
+    "  const [value, setValue] = useState(props.initial / {i});",
+    "  if (!/^[a-z]+$/i.test(value)) return null;",
+    "  return <div className=\"panel\">{{value}}</div>;",
+    "}}",
+]
+_SINKS = [
+    "el.innerHTML = props.html;",
+    "const fn = new Function(props.code);",
+    "child_process.exec(`ls ${dir}`);",
+]
+
+
+def generate_files(count: int, seed: int = 5) -> list[dict]:
+    rng = random.Random(seed)
+    files = []
+    for n in range(count):
+        lines = []
+        for i in range(rng.randint(4, 20)):
+            lines.extend(line.format(i=i, name=f"p{n}") for line in _LINES)
+        if rng.random() < 0.05:
+            lines.insert(rng.randrange(len(lines)), rng.choice(_SINKS))
+        ext = rng.choice([".js", ".tsx"])
+        files.append({"path": f"src/c{n % 40}/m{n}{ext}", "content": "\n".join(lines)})
+    return files
+
+
+def raw_pass(files: list[dict]) -> int:
+    registry = get_registry()
+    hits = 0
+    for f in files:
+        lines = f["content"].splitlines()
+        for rule in registry.rules_for("pattern", f["path"]):
+            for line in lines:
+                if rule.pattern.search(line):
+                    hits += 1
+                    break
+    return hits
+
+
+def mask_only(files: list[dict]) -> int:
+    return sum(len(js_mask.mask(f["content"])) for f in files)
+
+
+def _time(label: str, fn, files: list[dict]) -> float:
+    start = time.perf_counter()
+    result = fn(files)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {elapsed:>7.2f} s  {result}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=5_000)
+    args = parser.parse_args()
+
+    files = generate_files(args.files)
+    lines = sum(f["content"].count("\n") + 1 for f in files)
+    print(f"{len(files)} files, {lines} lines")
+
+    get_registry()
+    raw = _time("raw", raw_pass, files)
+    masked = _time("masked", lambda fs: len(pattern_scanner.scan(fs)), files)
+    _time("mask()", mask_only, files)
+    print(f"masked / raw: {masked / raw:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Throughput and findings parity of the lightweight static scanners.
+
+Run from vibecheck/:
+
+    python -m benchmarks.lightweight_scan [--files 2000] [--mix py=4,js=3,ts=2,go=1]
+        [--projects 4] [--vuln-rate 0.08] [--seed 1] [--update-golden]
+
+Generates a synthetic monorepo: `--projects` sub-projects, each with a
+manifest, Dockerfile and .env, and `--files` source files drawn from the
+language mix. A `--vuln-rate` fraction of the source files carry a seeded
+injection sink or hardcoded secret. A fixed parity corpus is added: one
+file per source extension the scanners cover, each with a line triggering
+every pattern rule, so a rule pack change to which languages a rule runs
+on shows up in the comparison. The harness then times
+`detect_project_info`, each scanner and the full `run_lightweight_scan`
+pipeline (against a temporary SQLite database, with Gemini and Supermemory
+disabled, so it runs offline). For each it reports files/s, MB/s and the
+findings count, plus the peak RSS.
+
+The scanners' findings are compared with benchmarks/golden/lightweight_scan.json
+for the same generator arguments. The comparison uses per-(scanner, title)
+counts and a digest of every (scanner, title, file, line). After an
+intended change in detection, rerun with --update-golden and commit the
+file.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import string
+import tempfile
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from api.config import settings
+from api.database import Base
+from api.models.finding import Finding
+from api.services import lightweight_scanner
+from api.services.lightweight_scanner import SKIP_DIRS, detect_project_info, run_lightweight_scan
+from api.services.lockfiles import build_dependency_graph
+from api.services.scan_metrics import peak_rss_mb
+from api.services.scanners import (
+    config_scanner,
+    dependency_scanner,
+    pattern_scanner,
+    python_ast,
+    secret_scanner,
+)
+from api.services.scanners.file_context import as_contexts
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "golden", "lightweight_scan.json")
+
+_BODY = {
+    ".py": [
+        "def handler_{n}_{i}(request, db):",
+        "    items = [x * 2 for x in range({i})]",
+        "    total = sum(items) + len(request.args)",
+        "    logger.debug('processed %d items', total)",
+        "    return {{'total': total}}",
+        "",
+    ],
+    ".js": [
+        "export function handler{n}_{i}(req, res) {{",
+        "  const items = Array.from({{ length: {i} }}, (_, x) => x * 2);",
+        "  // sum the items; never assign innerHTML from input",
+        "  res.json({{ total: items.reduce((a, b) => a + b, 0) }});",
+        "}}",
+        "",
+    ],
+    ".ts": [
+        "export async function load{n}_{i}(id: string): Promise<Item | null> {{",
+        "  const url = `${{API_BASE}}/items/${{id}}?page={i}`;",
+        "  const res = await fetch(url);",
+        "  return res.ok ? ((await res.json()) as Item) : null;",
+        "}}",
+        "",
+    ],
+    ".go": [
+        "func Handler{n}_{i}(w http.ResponseWriter, r *http.Request) {{",
+        "\titems := make([]int, {i})",
+        "\tfmt.Fprintf(w, \"%d items\", len(items))",
+        "}}",
+        "",
+    ],
+}
+_HEADER = {
+    ".py": ["import logging", "import os", "import subprocess", "", "logger = logging.getLogger(__name__)", ""],
+    ".js": ["import express from 'express';", "const child_process = require('child_process');", ""],
+    ".ts": ["import type { Item } from './types';", "const API_BASE = process.env.API_BASE ?? '';", ""],
+    ".go": ["package handlers", "", "import (", "\t\"fmt\"", "\t\"net/http\"", ")", ""],
+}
+_SINKS = {
+    ".py": [
+        "    cursor.execute(f\"SELECT * FROM users WHERE id = {{request.args['id']}}\")",
+        "    value = eval(request.args['expr'])",
+        "    os.system(\"ping -c 1 \" + request.args['host'])",
+        "    data = pickle.loads(request.data)",
+    ],
+    ".js": [
+        "document.getElementById('out').innerHTML = location.hash;",
+        "const result = eval(req.query.code);",
+        "child_process.exec('ls ' + req.query.dir);",
+        "res.setHeader('Access-Control-Allow-Origin', '*');",
+    ],
+    ".ts": [
+        "el.innerHTML = params.get('html') as string;",
+        "const fn = new Function(params.get('code') as string);",
+    ],
+    ".go": [
+        "\trows, _ := db.Query(\"SELECT * FROM users WHERE id = \" + r.URL.Query().Get(\"id\"))",
+        "\texec.Command(\"sh\", \"-c\", r.URL.Query().Get(\"cmd\")).Run()",
+    ],
+}
+# One trigger per pattern rule, written to parity/sinks<ext> for every
+# extension in _PARITY_EXTENSIONS. Not meant to parse; the .py copy exercises
+# the python_ast rules' regex fallback.
+_PARITY_LINES = [
+    "db.query(\"SELECT * FROM users WHERE id = \" + id)",
+    "User.raw(\"SELECT name FROM t WHERE id = \" + id)",
+    "q = f\"SELECT * FROM t WHERE id = {uid}\"",
+    "el.innerHTML = userHtml",
+    "<div dangerouslySetInnerHTML={{ __html: html }} />",
+    "<div v-html=\"html\"></div>",
+    "result = eval(expr)",
+    "exec(code)",
+    "fn = new Function(body)",
+    "child_process.exec(cmd)",
+    "subprocess.run(\"ls \" + d, shell=True)",
+    "os.system(cmd)",
+    "pickle.loads(blob)",
+    "yaml.load(doc)",
+    "id = req.query.id",
+    "DEBUG = true",
+    "app.run(debug=True)",
+    "cors: \"*\"",
+    "app.use(cors())",
+    "console.log(\"token\", token)",
+    "print(\"password\", password)",
+]
+_PARITY_EXTENSIONS = (".py", ".js", ".ts", ".jsx", ".tsx", ".vue", ".svelte", ".rb", ".php", ".java", ".go")
+_SECRETS = [
+    "AWS_ACCESS_KEY_ID = \"AKIA{upper16}\"",
+    "GITHUB_TOKEN = \"ghp_{alnum36}\"",
+    "STRIPE_SECRET_KEY = \"sk_live_{alnum24}\"",
+    "JWT_SECRET = \"{alnum24}\"",
+]
+_MANIFESTS = {
+    ".py": ("requirements.txt", "flask==0.12.2\ndjango==2.2.0\nrequests==2.19.0\npyyaml==5.3\n"),
+    ".js": ("package.json", json.dumps({"name": "svc", "dependencies": {"express": "4.17.0", "lodash": "4.17.19", "jsonwebtoken": "8.5.0"}})),
+    ".ts": ("package.json", json.dumps({"name": "web", "dependencies": {"next": "12.0.0", "axios": "0.21.0"}, "devDependencies": {"typescript": "5.0.0"}})),
+    ".go": ("go.mod", "module example.com/svc\n\ngo 1.21\n\nrequire github.com/gin-gonic/gin v1.6.0\n"),
+}
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        lang, _, weight = part.partition("=")
+        ext = "." + lang.strip().lstrip(".")
+        if ext not in _BODY:
+            raise SystemExit(f"unknown language {lang!r}; choose from {', '.join(e[1:] for e in _BODY)}")
+        weights[ext] = float(weight or 1)
+    return weights
+
+
+def _secret(rng: random.Random) -> str:
+    def pick(alphabet, n):
+        return "".join(rng.choice(alphabet) for _ in range(n))
+
+    return rng.choice(_SECRETS).format(
+        upper16=pick(string.ascii_uppercase + string.digits, 16),
+        alnum36=pick(string.ascii_letters + string.digits, 36),
+        alnum24=pick(string.ascii_letters + string.digits, 24),
+    )
+
+
+def generate_repo(files: int, mix: dict[str, float], projects: int, vuln_rate: float, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    exts = list(mix)
+    project_langs = [exts[p % len(exts)] for p in range(projects)]
+    repo = []
+    for p, ext in enumerate(project_langs):
+        manifest, content = _MANIFESTS[ext]
+        root = f"services/svc{p}"
+        repo.append({"path": f"{root}/{manifest}", "content": content})
+        repo.append({"path": f"{root}/Dockerfile", "content": "FROM node:latest\nUSER root\nCOPY . .\nEXPOSE 3000\n"})
+        repo.append({"path": f"{root}/.env", "content": f"DATABASE_URL=postgres://admin:hunter2@db/app\n{_secret(rng)}\n"})
+    repo.append({"path": ".gitignore", "content": "node_modules/\n__pycache__/\n"})
+
+    for n in range(files):
+        ext = rng.choices(exts, weights=[mix[e] for e in exts])[0]
+        lines = list(_HEADER[ext])
+        for i in range(rng.randint(4, 30)):
+            lines.extend(line.format(n=n, i=i) for line in _BODY[ext])
+        if rng.random() < vuln_rate:
+            if rng.random() < 0.3:
+                lines.insert(len(_HEADER[ext]), _secret(rng))
+            else:
+                lines.insert(len(lines) - 2, rng.choice(_SINKS[ext]).format())
+        project = rng.randrange(projects)
+        repo.append({"path": f"services/svc{project}/src/mod{n % 25}/m{n}{ext}", "content": "\n".join(lines)})
+    for ext in _PARITY_EXTENSIONS:
+        repo.append({"path": f"parity/sinks{ext}", "content": "\n".join(_PARITY_LINES) + "\n"})
+    return repo
+
+
+def _identity(agent: str, finding: dict) -> str:
+    location = finding.get("location") or {}
+    return f"{agent}|{finding['title']}|{location.get('file', '')}|{location.get('line', '')}"
+
+
+def run_scanners(files: list[dict], size_mb: float) -> list[str]:
+    """Time each stage as the pipeline runs it; returns finding identities."""
+    identities: list[str] = []
+
+    start = time.perf_counter()
+    contexts = as_contexts(files)
+    project_info = detect_project_info(contexts)
+    graph = build_dependency_graph(contexts, None, SKIP_DIRS)
+    for ecosystem, deps in project_info["ecosystem_dependencies"].items():
+        for name in deps:
+            graph.mark_direct(ecosystem, name)
+    project_info["dependency_graph"] = graph
+    _report("detect_project_info", time.perf_counter() - start, len(files), size_mb, None)
+
+    stages = [
+        ("dependency_scanner", lambda: dependency_scanner.scan(contexts, project_info)),
+        ("pattern_scanner", lambda: pattern_scanner.scan(contexts)),
+        ("secret_scanner", lambda: secret_scanner.scan(contexts)),
+        ("config_scanner", lambda: config_scanner.scan(contexts, project_info)),
+    ]
+    for name, scan in stages:
+        start = time.perf_counter()
+        findings = scan()
+        _report(name, time.perf_counter() - start, len(files), size_mb, len(findings))
+        identities.extend(_identity(name, f) for f in findings)
+    return identities
+
+
+async def run_pipeline(files: list[dict], size_mb: float, workdir: str) -> int:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    db_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    from api.models.assessment import Assessment
+
+    async with db_factory() as db:
+        assessment = Assessment(mode="lightweight", status="queued")
+        db.add(assessment)
+        await db.commit()
+        assessment_id = assessment.id
+
+    start = time.perf_counter()
+    await run_lightweight_scan(assessment_id, None, files, db_factory)
+    elapsed = time.perf_counter() - start
+
+    async with db_factory() as db:
+        assessment = await db.get(Assessment, assessment_id)
+        count = await db.scalar(select(func.count(Finding.id)).where(Finding.assessment_id == assessment_id))
+        status, error = assessment.status, assessment.error_message
+    await engine.dispose()
+    if status != "complete":
+        raise SystemExit(f"pipeline ended in status {status}: {error}")
+    _report("run_lightweight_scan", elapsed, len(files), size_mb, count)
+    return count
+
+
+def _report(label: str, elapsed: float, files: int, size_mb: float, findings: int | None):
+    rate = f"{files / elapsed:>10.0f} files/s {size_mb / elapsed:>8.2f} MB/s" if elapsed else ""
+    count = "" if findings is None else f"{findings:>7} findings"
+    print(f"{label:<22} {elapsed:>8.3f} s {rate} {count}")
+
+
+def summarize(identities: list[str]) -> dict:
+    counts: dict[str, int] = {}
+    for identity in identities:
+        key = "|".join(identity.split("|", 2)[:2])
+        counts[key] = counts.get(key, 0) + 1
+    digest = hashlib.sha256("\n".join(sorted(identities)).encode()).hexdigest()
+    return {"total": len(identities), "digest": digest, "counts": dict(sorted(counts.items()))}
+
+
+def check_golden(params: dict, summary: dict, update: bool) -> bool:
+    golden = {}
+    if os.path.exists(GOLDEN_PATH):
+        with open(GOLDEN_PATH) as fh:
+            golden = json.load(fh)
+    key = json.dumps(params, sort_keys=True)
+
+    if update:
+        golden[key] = summary
+        os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+        with open(GOLDEN_PATH, "w") as fh:
+            json.dump(golden, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"golden updated: {summary['total']} findings")
+        return True
+
+    expected = golden.get(key)
+    if expected is None:
+        print("golden: no entry for these arguments (run with --update-golden to record one)")
+        return True
+    if expected["digest"] == summary["digest"]:
+        print(f"golden: match ({summary['total']} findings)")
+        return True
+    print(f"golden: MISMATCH (expected {expected['total']} findings, got {summary['total']})")
+    for name in sorted(set(expected["counts"]) | set(summary["counts"])):
+        before, after = expected["counts"].get(name, 0), summary["counts"].get(name, 0)
+        if before != after:
+            print(f"  {name}: {before} -> {after}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2_000)
+    parser.add_argument("--mix", default="py=4,js=3,ts=2,go=1")
+    parser.add_argument("--projects", type=int, default=4)
+    parser.add_argument("--vuln-rate", type=float, default=0.08)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--update-golden", action="store_true")
+    args = parser.parse_args()
+
+    # Offline: no LLM pass, no memory ingestion, and the scan's debug log
+    # goes nowhere.
+    settings.GEMINI_API_KEY = ""
+    settings.SUPERMEMORY_API_KEY = ""
+    lightweight_scanner.LOG_PATH = os.devnull
+
+    mix = parse_mix(args.mix)
+    files = generate_repo(args.files, mix, args.projects, args.vuln_rate, args.seed)
+    size_mb = sum(len(f["content"]) for f in files) / 1e6
+    print(f"{len(files)} files, {size_mb:.1f} MB, mix {args.mix}, {args.projects} projects")
+
+    identities = run_scanners(files, size_mb)
+    # The pipeline would otherwise hit the AST caches warmed by the scanners.
+    python_ast._tree_cache.clear()
+    python_ast._result_cache.clear()
+    with tempfile.TemporaryDirectory() as workdir:
+        settings.BLOB_DIR = os.path.join(workdir, "blobs")
+        lightweight_scanner.blob_store.root = settings.BLOB_DIR
+        pipeline_count = asyncio.run(run_pipeline(files, size_mb, workdir))
+    print(f"peak RSS {peak_rss_mb()} MB")
+
+    ok = pipeline_count == len(identities)
+    if not ok:
+        print(f"pipeline stored {pipeline_count} findings, scanners returned {len(identities)}")
+    params = {
+        "files": args.files, "mix": args.mix, "projects": args.projects,
+        "vuln_rate": args.vuln_rate, "seed": args.seed,
+    }
+    ok = check_golden(params, summarize(identities), args.update_golden) and ok
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
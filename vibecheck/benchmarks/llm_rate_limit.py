@@ -0,0 +1,157 @@
+"""
+LLM throughput under a provider quota, with and without the shared limiter.
+
+Run from vibecheck/:
+
+    python -m benchmarks.llm_rate_limit [--rpm 600] [--window 5] [--seconds 15]
+        [--scans 4] [--hog-callers 6] [--latency-ms 100]
+
+A fake provider enforces `--rpm` requests per minute, counted over a sliding
+`--window` seconds. Time is compressed: a real provider counts over a minute.
+Calls beyond the quota get a 429.
+
+Against it run `--scans` background scans. Scan 0 is a hog with
+`--hog-callers` concurrent callers; the others have one caller each, like a
+scan running its agents in turn. Each caller issues calls back to back. An
+interactive caller (finding analysis) asks once a second.
+
+The scenario runs twice:
+- retries only (LLM_REQUESTS_PER_MINUTE=0)
+- with the token-bucket limiter at --rpm, its burst scaled to the window
+
+Reported for each run:
+- successful calls/s against the quota
+- 429s received, and calls that failed after exhausting their retries
+- the smallest and largest scan's share of calls
+- interactive latency
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+from collections import deque
+
+from google.genai import errors
+
+from api.config import settings
+from api.services import llm, rate_limiter
+from api.services.llm import FakeProvider
+from api.services.rate_limiter import RateLimiter
+
+
+class QuotaProvider:
+    """`respond` for a FakeProvider: answers after a delay, or 429s beyond the quota."""
+
+    def __init__(self, rpm: float, window: float, latency_s: float):
+        self.limit = max(1, int(rpm * window / 60))
+        self.window = window
+        self.latency_s = latency_s
+        self.sent: deque[float] = deque()
+        self.rejected = 0
+
+    async def __call__(self, caller, contents, config):
+        now = time.monotonic()
+        while self.sent and now - self.sent[0] > self.window:
+            self.sent.popleft()
+        if len(self.sent) >= self.limit:
+            self.rejected += 1
+            raise errors.APIError(429, {"error": {"code": 429, "message": "Resource has been exhausted"}})
+        self.sent.append(now)
+        await asyncio.sleep(self.latency_s)
+        return "[]"
+
+
+async def run_scenario(args, limited: bool) -> dict:
+    quota = QuotaProvider(args.rpm, args.window, args.latency_ms / 1000)
+    llm.set_provider(FakeProvider(quota))
+    rate_limiter.BURST_SECONDS = args.window / 6
+    llm.limiter = RateLimiter(args.rpm if limited else 0, 0)
+
+    deadline = time.monotonic() + args.seconds
+    done: dict[str, int] = {}
+    failed = 0
+    interactive: list[float] = []
+
+    async def background(scan: str):
+        nonlocal failed
+        while time.monotonic() < deadline:
+            try:
+                await llm.generate("agent.bench", "probe the target", key=scan)
+                done[scan] = done.get(scan, 0) + 1
+            except errors.APIError:
+                failed += 1
+
+    async def analyst():
+        nonlocal failed
+        while time.monotonic() < deadline:
+            start = time.monotonic()
+            try:
+                await llm.generate("finding_analysis", "explain this finding", key="analyst", interactive=True)
+                interactive.append(time.monotonic() - start)
+            except errors.APIError:
+                failed += 1
+            await asyncio.sleep(max(0.0, 1.0 - (time.monotonic() - start)))
+
+    tasks = [background("scan0") for _ in range(args.hog_callers)]
+    tasks += [background(f"scan{n}") for n in range(1, args.scans)]
+    start = time.monotonic()
+    await asyncio.gather(*tasks, analyst())
+    elapsed = time.monotonic() - start
+
+    shares = [done.get(f"scan{n}", 0) for n in range(args.scans)]
+    return {
+        "ok_per_s": (sum(shares) + len(interactive)) / elapsed,
+        "rejected": quota.rejected,
+        "failed": failed,
+        "shares": shares,
+        "interactive": sorted(interactive),
+    }
+
+
+def _report(label: str, result: dict, quota_per_s: float):
+    shares = result["shares"]
+    total = sum(shares) or 1
+    latencies = result["interactive"]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else float("nan")
+    median = statistics.median(latencies) if latencies else float("nan")
+    print(
+        f"{label:<14} {result['ok_per_s']:>6.1f}/s ({result['ok_per_s'] / quota_per_s:>4.0%} of quota) "
+        f"{result['rejected']:>6} 429s {result['failed']:>5} failed  "
+        f"scan share {min(shares) / total:>4.0%}-{max(shares) / total:>4.0%}  "
+        f"interactive p50 {median * 1000:>6.0f} ms p95 {p95 * 1000:>6.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rpm", type=float, default=600)
+    parser.add_argument("--window", type=float, default=5.0)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--scans", type=int, default=4)
+    parser.add_argument("--hog-callers", type=int, default=6)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    # Backoff scaled like the window, so retries matter within the run.
+    settings.LLM_RETRY_BASE_SECONDS = args.window / 60
+    settings.LLM_RETRY_MAX_SECONDS = args.window / 2
+    settings.LLM_MAX_CONCURRENT = 64
+    llm._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENT)
+
+    quota_per_s = args.rpm / 60
+    print(
+        f"quota {args.rpm:g} rpm ({quota_per_s:g}/s over {args.window:g} s windows), {args.scans} scans "
+        f"(scan0 with {args.hog_callers} callers), {args.latency_ms:g} ms per call, {args.seconds:g} s"
+    )
+    for label, limited in (("retries only", False), ("limiter", True)):
+        # Keep the per-retry warnings out of the table.
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(run_scenario(args, limited))
+        _report(label, result, quota_per_s)
+
+
+if __name__ == "__main__":
+    main()
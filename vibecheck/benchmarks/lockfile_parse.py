@@ -0,0 +1,83 @@
+"""
+Time and peak memory of the streaming package-lock.json parser.
+
+Run from vibecheck/:
+
+    python -m benchmarks.lockfile_parse [--packages 50000]
+
+Writes a synthetic lockfileVersion 3 package-lock.json (about 20 MB at the
+default size), then parses it with `lockfiles.parse_package_lock` and, for
+comparison, with `json.load`. Peak memory is measured with tracemalloc, which
+slows both runs down by a similar factor, so wall times are taken separately.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from api.services.lockfiles import DependencyGraph, parse_package_lock
+
+
+def write_lockfile(path: str, packages: int, seed: int = 3):
+    rng = random.Random(seed)
+    names = [f"pkg-{i}" for i in range(packages // 4)]
+    entries = {"": {"name": "app", "version": "1.0.0", "dependencies": {n: "^1.0.0" for n in names[:50]}}}
+    for i in range(packages):
+        name = rng.choice(names)
+        prefix = "" if i < len(names) else f"node_modules/{rng.choice(names)}/"
+        entries[f"{prefix}node_modules/{name}"] = {
+            "version": f"{rng.randint(0, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 9)}",
+            "resolved": f"https://registry.npmjs.org/{name}/-/{name}-1.0.0.tgz",
+            "integrity": "sha512-" + "".join(rng.choice("abcdefABCDEF0123456789+/") for _ in range(86)) + "==",
+            "dev": rng.random() < 0.5,
+            "dependencies": {rng.choice(names): "^1.0.0" for _ in range(rng.randint(0, 4))},
+            "engines": {"node": ">=12"},
+        }
+    with open(path, "w") as fh:
+        json.dump({"name": "app", "lockfileVersion": 3, "requires": True, "packages": entries}, fh, indent=2)
+
+
+def streaming(path: str) -> int:
+    graph = DependencyGraph()
+    with open(path, encoding="utf-8") as fh:
+        parse_package_lock(fh, graph, "package-lock.json")
+    return len(graph)
+
+
+def full_load(path: str) -> int:
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    return len({(k.rsplit("node_modules/", 1)[-1], v.get("version")) for k, v in data["packages"].items() if k})
+
+
+def _measure(label: str, fn, path: str):
+    start = time.perf_counter()
+    count = fn(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed:>7.2f} s  peak {peak / 1e6:>7.1f} MB  {count} packages")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--packages", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "package-lock.json")
+        write_lockfile(path, args.packages)
+        print(f"package-lock.json {os.path.getsize(path) / 1e6:.1f} MB")
+        _measure("streaming", streaming, path)
+        _measure("json.load", full_load, path)
+
+
+if __name__ == "__main__":
+    main()
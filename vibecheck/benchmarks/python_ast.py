@@ -0,0 +1,102 @@
+"""
+Python pattern rules: AST engine versus the old line-regex pass.
+
+Run from vibecheck/:
+
+    python -m benchmarks.python_ast [--files 10000] [--sink-rate 0.05]
+
+Generates a synthetic Python repo in which a `--sink-rate` fraction of the
+modules contain an injection sink, and times `pattern_scanner.scan` cold and
+warm (result cache hit). Baselines: "legacy" runs every pattern rule of every
+language over every line, as the scanner did before rule packs, and "regex"
+runs only the rules targeting .py, each by its line regex. Only files that
+contain a check's hint substrings are parsed, so the cold AST time grows with
+the sink rate.
+"""
+
+import argparse
+import random
+import time
+
+from api.services.rules import get_registry
+from api.services.scanners import pattern_scanner, python_ast
+
+_BODY = [
+    "def handler_{n}_{i}(request, db):",
+    "    items = [x * 2 for x in range({i})]",
+    "    total = sum(items) + len(request.args)",
+    "    logger.debug('processed %d items', total)",
+    "    result = db.session.query(Model).filter_by(id={i}).first()",
+    "    return {{'total': total, 'name': result.name if result else None}}",
+    "",
+]
+_SINKS = [
+    "    cursor.execute(\"SELECT * FROM t WHERE id = \" + request.args['id'])",
+    "    subprocess.run(f\"convert {{request.files['f'].filename}}\", shell=True)",
+    "    data = pickle.loads(request.data)",
+    "    value = eval(request.args['expr'])",
+]
+
+
+def generate_files(count: int, sink_rate: float = 0.05, seed: int = 11) -> list[dict]:
+    rng = random.Random(seed)
+    files = []
+    for n in range(count):
+        lines = ["import logging", "import subprocess", "import pickle", "", "logger = logging.getLogger(__name__)", ""]
+        for i in range(rng.randint(5, 25)):
+            lines.extend(line.format(n=n, i=i) for line in _BODY)
+        if rng.random() < sink_rate:
+            lines.insert(-1, rng.choice(_SINKS))
+        files.append({"path": f"pkg{n % 50}/module_{n}.py", "content": "\n".join(lines)})
+    return files
+
+
+def legacy_pass(files: list[dict]) -> int:
+    return _line_regex(files, get_registry().rules)
+
+
+def regex_pass(files: list[dict]) -> int:
+    return _line_regex(files, get_registry().rules_for("pattern", "x.py"))
+
+
+def _line_regex(files: list[dict], rules) -> int:
+    rules = [rule for rule in rules if rule.scanner == "pattern" and rule.pattern is not None]
+    hits = 0
+    for f in files:
+        lines = f["content"].splitlines()
+        for rule in rules:
+            for line in lines:
+                if rule.pattern.search(line):
+                    hits += 1
+                    break
+    return hits
+
+
+def _time(label: str, fn, files: list[dict]):
+    start = time.perf_counter()
+    count = fn(files)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:>7.2f} s  {count} findings")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--sink-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    files = generate_files(args.files, args.sink_rate)
+    lines = sum(f["content"].count("\n") + 1 for f in files)
+    print(f"{len(files)} files, {lines} lines")
+
+    get_registry()
+    _time("legacy", legacy_pass, files)
+    _time("regex", regex_pass, files)
+    python_ast._tree_cache.clear()
+    python_ast._result_cache.clear()
+    _time("ast cold", lambda fs: len(pattern_scanner.scan(fs)), files)
+    _time("ast warm", lambda fs: len(pattern_scanner.scan(fs)), files)
+
+
+if __name__ == "__main__":
+    main()
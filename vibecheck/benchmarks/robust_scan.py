@@ -0,0 +1,470 @@
+"""
+End-to-end robust scan against a local vulnerable app with a scripted LLM.
+
+Run from vibecheck/:
+
+    python -m benchmarks.robust_scan [--agents recon,auth,injection,config] [--depth standard]
+        [--llm-latency-ms 50] [--target-latency-ms 2] [--calls-per-turn 2] [--seed 1]
+        [--database-url URL]
+
+Serves a small deliberately vulnerable Starlette app with uvicorn on a
+loopback port, in its own thread. It has reflected XSS, a SQL error
+oracle, command injection, IDOR, default credentials, exposed .env, debug
+and admin pages, and permissive CORS. The LLM provider
+(api.services.llm) is replaced with a deterministic fake. The fake works
+through a probe catalogue shuffled per agent, `--calls-per-turn` function calls per model
+turn. It calls report_finding when a probe's response shows the expected
+signal, and sleeps `--llm-latency-ms` per call to stand in for the model.
+
+The harness then runs `run_robust_scan` once against a temporary SQLite
+database (or --database-url). It reports:
+- wall time
+- HTTP requests/s, as seen by the target
+- model calls and estimated tokens
+- database writes (INSERT/UPDATE/DELETE statements and commits)
+- steps, probes, findings and step latency per agent
+
+Step latency is the gap between consecutive agent_logs rows. It covers the
+model call, the tool's HTTP request and the row flush. Nothing leaves the
+machine, so the numbers isolate the orchestration: concurrency, connection
+pooling and database round trips.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import tempfile
+import threading
+import time
+import zlib
+
+import uvicorn
+from google.genai import types
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from api.agents import AGENT_MAP
+from api.config import settings
+from api.database import Base
+from api.models.agent_log import AgentLog
+from api.models.assessment import Assessment
+from api.models.finding import Finding
+from api.services import llm
+from api.services.llm import FakeProvider
+from api.services.robust_scanner import run_robust_scan
+from api.services.scan_metrics import peak_rss_mb
+
+# --- Vulnerable target --------------------------------------------------------
+
+_USERS = [
+    {"id": n, "email": f"user{n}@example.com", "password_hash": f"5f4dcc3b5aa765d61d8327deb882cf9{n}", "role": role}
+    for n, role in enumerate(["admin", "user", "user", "support"], start=1)
+]
+_INDEX = """<!doctype html>
+<html><head><title>Acme Portal</title></head><body>
+<a href="/login">Log in</a> <a href="/admin">Admin</a> <a href="/search?q=shoes">Search</a>
+<a href="/api/items?id=1">Item 1</a> <a href="/ping?host=127.0.0.1">Status</a>
+<script>fetch('/api/users').then(r => r.json()); fetch('/api/config');</script>
+</body></html>"""
+
+
+class TargetStats:
+    __slots__ = ("requests", "latency_s")
+
+    def __init__(self, latency_s: float):
+        self.requests = 0
+        self.latency_s = latency_s
+
+
+def build_target(stats: TargetStats):
+    """The vulnerable app, wrapped to count requests and add leaky headers."""
+
+    async def index(request: Request):
+        return HTMLResponse(_INDEX)
+
+    async def search(request: Request):
+        # Reflected without escaping.
+        return HTMLResponse(f"<h1>Results for {request.query_params.get('q', '')}</h1><p>0 items</p>")
+
+    async def items(request: Request):
+        item_id = request.query_params.get("id", "1")
+        if "'" in item_id or " or " in item_id.lower():
+            return PlainTextResponse(
+                f'sqlite3.OperationalError: near "{item_id}": syntax error\n'
+                f"  query: SELECT * FROM items WHERE id = {item_id}",
+                status_code=500,
+            )
+        return JSONResponse({"id": item_id, "name": f"Item {item_id}", "price": 9.99})
+
+    async def ping(request: Request):
+        host = request.query_params.get("host", "127.0.0.1")
+        output = f"PING {host.split(';')[0]}: 56 data bytes\n64 bytes: icmp_seq=0 ttl=64 time=0.04 ms\n"
+        if ";" in host or "|" in host:
+            output += "uid=0(root) gid=0(root) groups=0(root)\n"
+        return PlainTextResponse(output)
+
+    async def users(request: Request):
+        return JSONResponse(_USERS)
+
+    async def user(request: Request):
+        user_id = int(request.path_params["user_id"])
+        match = next((u for u in _USERS if u["id"] == user_id), None)
+        return JSONResponse(match) if match else JSONResponse({"error": "not found"}, status_code=404)
+
+    async def login(request: Request):
+        if request.method == "GET":
+            return HTMLResponse('<form method="post"><input name="username"><input name="password"></form>')
+        body = await request.body()
+        try:
+            creds = json.loads(body or b"{}")
+        except ValueError:
+            creds = {}
+        if creds.get("username") == "admin" and creds.get("password") == "admin":
+            return JSONResponse({"token": "eyJhbGciOiJub25lIn0.eyJzdWIiOiJhZG1pbiJ9.", "role": "admin"})
+        return JSONResponse({"error": "invalid credentials"}, status_code=401)
+
+    async def admin(request: Request):
+        return HTMLResponse("<h1>Admin dashboard</h1><p>Users: 4 | Orders: 1289 | <a href='/api/users'>manage</a></p>")
+
+    async def debug(request: Request):
+        return PlainTextResponse(
+            "Traceback (most recent call last):\n  File \"/srv/app/views.py\", line 42, in handler\n"
+            "KeyError: 'session'\nDATABASE_URL=postgres://app:s3cret@db:5432/app\nDEBUG=True\n"
+        )
+
+    async def dotenv(request: Request):
+        return PlainTextResponse("DATABASE_URL=postgres://app:s3cret@db:5432/app\nSECRET_KEY=dev-secret-key\n")
+
+    async def config(request: Request):
+        return JSONResponse({"stripe_key": "sk_live_51Hq3benchmark", "debug": True, "version": "1.4.2"})
+
+    async def robots(request: Request):
+        return PlainTextResponse("User-agent: *\nDisallow: /admin\nDisallow: /debug\n")
+
+    routes = [
+        Route("/", index, methods=["GET", "HEAD"]),
+        Route("/search", search),
+        Route("/api/items", items),
+        Route("/ping", ping),
+        Route("/api/users", users, methods=["GET", "HEAD", "OPTIONS"]),
+        Route("/api/users/{user_id:int}", user),
+        Route("/login", login, methods=["GET", "POST"]),
+        Route("/admin", admin, methods=["GET", "HEAD"]),
+        Route("/debug", debug),
+        Route("/.env", dotenv),
+        Route("/api/config", config),
+        Route("/robots.txt", robots),
+    ]
+    app = Starlette(routes=routes)
+
+    async def count_and_decorate(scope, receive, send):
+        if scope["type"] != "http":
+            await app(scope, receive, send)
+            return
+        stats.requests += 1
+        if stats.latency_s:
+            await asyncio.sleep(stats.latency_s)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server", b"Werkzeug/2.0.1 Python/3.8.10"),
+                    (b"x-powered-by", b"Express"),
+                    (b"access-control-allow-origin", b"*"),
+                ]
+            await send(message)
+
+        await app(scope, receive, send_wrapper)
+
+    return count_and_decorate
+
+
+class TargetServer:
+    """uvicorn on a loopback socket, in a thread with its own event loop."""
+
+    def __init__(self, app):
+        # proto must be IPPROTO_TCP for asyncio to set TCP_NODELAY on accepted
+        # connections; without it keep-alive responses stall ~40 ms on
+        # Nagle plus delayed ACK.
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self._sock.getsockname()[1]}"
+        config = uvicorn.Config(app, log_level="warning", access_log=False, lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._sock]}, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise SystemExit("target server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+        self._sock.close()
+
+
+# --- Scripted LLM -------------------------------------------------------------
+
+# (method, path, body, signal in the response, finding reported when it shows)
+_PROBES = [
+    ("GET", "/", None, None, None),
+    ("GET", "/robots.txt", None, None, None),
+    ("GET", "/admin", None, "Admin dashboard", ("high", "missing_auth", "Admin dashboard reachable without authentication")),
+    ("GET", "/debug", None, "Traceback", ("high", "information_disclosure", "Debug endpoint leaks stack traces and credentials")),
+    ("GET", "/.env", None, "DATABASE_URL", ("critical", "information_disclosure", "Environment file served over HTTP")),
+    ("GET", "/api/config", None, "sk_live_", ("critical", "information_disclosure", "Live payment key exposed by /api/config")),
+    ("GET", "/api/users", None, "password_hash", ("high", "data_exposure", "User list with password hashes readable anonymously")),
+    ("GET", "/api/users/1", None, "admin@", None),
+    ("GET", "/api/users/2", None, "user2@", ("high", "idor", "User records readable by id without authorization")),
+    ("GET", "/api/users/3", None, None, None),
+    ("POST", "/login", '{"username": "admin", "password": "admin"}', '"token"', ("critical", "default_credentials", "Default admin/admin credentials accepted")),
+    ("POST", "/login", '{"username": "admin", "password": "wrong"}', None, None),
+    ("GET", "/login", None, None, None),
+    ("GET", "/search?q=%3Cscript%3Ealert(1)%3C/script%3E", None, "<script>alert(1)</script>", ("high", "xss", "Reflected XSS in /search q parameter")),
+    ("GET", "/search?q=shoes", None, None, None),
+    ("GET", "/api/items?id=1", None, None, None),
+    ("GET", "/api/items?id=1'", None, "syntax error", ("critical", "sql_injection", "SQL error oracle in /api/items id parameter")),
+    ("GET", "/api/items?id=1%20OR%201=1", None, None, None),
+    ("GET", "/ping?host=127.0.0.1", None, None, None),
+    ("GET", "/ping?host=127.0.0.1;id", None, "uid=0(root)", ("critical", "command_injection", "Command injection in /ping host parameter")),
+    ("OPTIONS", "/api/users", None, None, None),
+    ("GET", "/.git/config", None, None, None),
+    ("GET", "/swagger", None, None, None),
+    ("GET", "/graphql", None, None, None),
+    ("GET", "/wp-admin", None, None, None),
+    ("GET", "/api/v1/orders", None, None, None),
+    ("HEADERS", "/", None, "CORS allows all origins", ("medium", "cors_misconfiguration", "CORS allows any origin")),
+    ("HEADERS", "/api/users", None, "Missing security headers", ("low", "missing_headers", "Security headers missing")),
+]
+
+
+class LLMStats:
+    __slots__ = ("calls", "prompt_tokens", "completion_tokens")
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class ScriptedModel:
+    """
+    The `respond` function of an llm.FakeProvider. Each caller (one per
+    agent) gets its own script: the probe catalogue in an order fixed by the
+    seed and the caller name.
+    """
+
+    def __init__(self, stats: LLMStats, latency_s: float, calls_per_turn: int, seed: int):
+        self.stats = stats
+        self.latency_s = latency_s
+        self.calls_per_turn = calls_per_turn
+        self.seed = seed
+        self._scripts: dict[str, dict] = {}
+
+    async def __call__(self, caller: str, contents: list[types.Content], config) -> types.GenerateContentResponse:
+        script = self._scripts.get(caller)
+        if script is None:
+            plan = list(_PROBES)
+            random.Random(self.seed ^ zlib.crc32(caller.encode())).shuffle(plan)
+            script = self._scripts[caller] = {"plan": plan, "pending": [], "reported": set()}
+        self.stats.calls += 1
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+
+        calls = _findings_from(script, contents[-1])
+        script["pending"] = []
+        while script["plan"] and len(calls) < self.calls_per_turn:
+            probe = script["plan"].pop()
+            script["pending"].append(probe)
+            method, path, body = probe[:3]
+            if method == "HEADERS":
+                calls.append(types.FunctionCall(name="check_headers", args={"path": path}))
+            else:
+                args = {"method": method, "path": path}
+                if body is not None:
+                    args.update(body=body, headers={"Content-Type": "application/json"})
+                calls.append(types.FunctionCall(name="http_request", args=args))
+
+        parts = [types.Part(function_call=call) for call in calls] or [types.Part(text="Assessment complete.")]
+        prompt_tokens = llm.estimate_tokens(contents, config)
+        completion_tokens = sum(len(json.dumps(call.args)) // 4 + 8 for call in calls) or 4
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.completion_tokens += completion_tokens
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens, candidates_token_count=completion_tokens
+            ),
+        )
+
+
+def _findings_from(script: dict, last: types.Content) -> list[types.FunctionCall]:
+    responses = [p.function_response for p in last.parts or [] if p.function_response]
+    # report_finding responses come first in a turn; line the remaining ones
+    # up with the probes sent last turn.
+    responses = [r for r in responses if r.name != "report_finding"]
+    calls = []
+    for probe, response in zip(script["pending"], responses):
+        signal, finding = probe[3], probe[4]
+        if not finding or finding[2] in script["reported"]:
+            continue
+        result = (response.response or {}).get("result") or {}
+        if signal in json.dumps(result):
+            script["reported"].add(finding[2])
+            severity, category, title = finding
+            calls.append(types.FunctionCall(name="report_finding", args={
+                "severity": severity,
+                "category": category,
+                "title": title,
+                "description": f"{probe[0]} {probe[1]} returned a response containing {signal!r}.",
+                "evidence": {"url": result.get("url", probe[1]), "response_code": result.get("status_code")},
+                "remediation": "Fix the handler and add a regression test.",
+            }))
+    return calls
+
+
+# --- Harness ------------------------------------------------------------------
+
+
+class DBStats:
+    __slots__ = ("writes", "commits")
+
+    def __init__(self):
+        self.writes: dict[str, int] = {"INSERT": 0, "UPDATE": 0, "DELETE": 0}
+        self.commits = 0
+
+    def attach(self, engine):
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            verb = statement.lstrip()[:6].upper()
+            if verb in self.writes:
+                self.writes[verb] += 1
+
+        @event.listens_for(engine.sync_engine, "commit")
+        def _commit(conn):
+            self.commits += 1
+
+
+async def run(args, target_url: str, target: TargetStats, llm_stats: LLMStats, workdir: str) -> int:
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    db_factory = async_sessionmaker(engine, expire_on_commit=False)
+    agents = [name.strip() for name in args.agents.split(",") if name.strip()]
+
+    async with db_factory() as db:
+        assessment = Assessment(mode="robust", status="queued", target_url=target_url, agents=agents, depth=args.depth)
+        db.add(assessment)
+        await db.commit()
+        assessment_id = assessment.id
+
+    db_stats = DBStats()
+    db_stats.attach(engine)
+    served_before = target.requests
+    start = time.perf_counter()
+    await run_robust_scan(assessment_id, target_url, agents, args.depth, db_factory)
+    elapsed = time.perf_counter() - start
+    served = target.requests - served_before
+
+    async with db_factory() as db:
+        assessment = await db.get(Assessment, assessment_id)
+        logs = (
+            await db.execute(
+                select(AgentLog.agent, AgentLog.timestamp)
+                .where(AgentLog.assessment_id == assessment_id)
+                .order_by(AgentLog.agent, AgentLog.step)
+            )
+        ).all()
+        finding_count = await db.scalar(select(func.count(Finding.id)).where(Finding.assessment_id == assessment_id))
+    if args.database_url:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+    print(f"status {assessment.status}" + (f" ({assessment.error_message})" if assessment.error_message else ""))
+    print(f"wall time {elapsed:.3f} s, {finding_count} findings")
+    print(f"target: {served} requests, {served / elapsed:.1f} req/s")
+    print(
+        f"llm: {llm_stats.calls} calls, ~{llm_stats.prompt_tokens} prompt / "
+        f"{llm_stats.completion_tokens} completion tokens"
+    )
+    writes = db_stats.writes
+    print(
+        f"db: {sum(writes.values())} writes ({writes['INSERT']} insert, {writes['UPDATE']} update, "
+        f"{writes['DELETE']} delete), {db_stats.commits} commits"
+    )
+
+    gaps: dict[str, list[float]] = {}
+    previous: dict[str, object] = {}
+    for agent, timestamp in logs:
+        if agent in previous:
+            gaps.setdefault(agent, []).append((timestamp - previous[agent]).total_seconds() * 1000)
+        previous[agent] = timestamp
+
+    stages = {s["name"]: s for s in (assessment.metrics or {}).get("stages", [])}
+    crawl = stages.get("crawl", {})
+    print(f"crawl: {crawl.get('requests', 0)} requests in {crawl.get('duration_ms', 0):.1f} ms")
+    print(f"{'agent':<10} {'ms':>9} {'steps':>6} {'http':>5} {'findings':>8} {'step ms mean':>13} {'p95':>8}")
+    for name in agents:
+        stage = stages.get(f"agent.{name}")
+        if stage is None:
+            continue
+        agent_gaps = sorted(gaps.get(name, []))
+        mean = statistics.fmean(agent_gaps) if agent_gaps else 0.0
+        p95 = agent_gaps[min(len(agent_gaps) - 1, int(len(agent_gaps) * 0.95))] if agent_gaps else 0.0
+        print(
+            f"{name:<10} {stage['duration_ms']:>9.1f} {stage.get('steps', 0):>6} {stage.get('http_requests', 0):>5} "
+            f"{stage.get('findings', 0):>8} {mean:>13.1f} {p95:>8.1f}"
+        )
+    print(f"peak RSS {peak_rss_mb()} MB")
+    return 0 if assessment.status == "complete" else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agents", default=",".join(AGENT_MAP))
+    parser.add_argument("--depth", choices=["quick", "standard", "deep"], default="standard")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--target-latency-ms", type=float, default=2.0)
+    parser.add_argument("--calls-per-turn", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="async SQLAlchemy URL; tables are created and dropped")
+    args = parser.parse_args()
+
+    unknown = set(args.agents.split(",")) - set(AGENT_MAP)
+    if unknown:
+        raise SystemExit(f"unknown agents {sorted(unknown)}; choose from {', '.join(AGENT_MAP)}")
+
+    # No memory ingestion; with a provider set no Gemini key is needed.
+    settings.SUPERMEMORY_API_KEY = ""
+    llm_stats = LLMStats()
+    script = ScriptedModel(llm_stats, args.llm_latency_ms / 1000, args.calls_per_turn, args.seed)
+    llm.set_provider(FakeProvider(script))
+
+    target = TargetStats(args.target_latency_ms / 1000)
+    print(
+        f"agents {args.agents}, depth {args.depth}, llm latency {args.llm_latency_ms:g} ms, "
+        f"target latency {args.target_latency_ms:g} ms, {args.calls_per_turn} calls per turn"
+    )
+    with TargetServer(build_target(target)) as server, tempfile.TemporaryDirectory() as workdir:
+        code = asyncio.run(run(args, server.url, target, llm_stats, workdir))
+    raise SystemExit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Per-file overhead of the secret scanner on a large synthetic tree.
+
+Run from vibecheck/:
+
+    python -m benchmarks.scanner_file_overhead [--files 50000]
+
+"legacy" reproduces the old bookkeeping: every SKIP_PATTERNS regex tried
+against each path in both passes, and the content split into lines twice.
+"context" is the current path: one combined skip regex and one FileContext
+per file. The full `secret_scanner.scan` time is reported as well.
+"""
+
+import argparse
+import random
+import re
+import time
+
+from api.services.scanners import secret_scanner
+from api.services.scanners.file_context import as_contexts
+
+_DIRS = ["src", "src/components", "lib", "api/routes", "test", "vendor/pkg", "node_modules/x"]
+_NAMES = ["index.ts", "util.py", "Button.tsx", "app.test.js", "server.go", "config.yaml", "db.rb"]
+
+
+def generate_files(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    files = []
+    for i in range(count):
+        path = f"{rng.choice(_DIRS)}/m{i}/{rng.choice(_NAMES)}"
+        lines = [f"value_{j} = compute({j}, '{rng.random():.6f}')" for j in range(rng.randint(5, 40))]
+        files.append({"path": path, "content": "\n".join(lines)})
+    return files
+
+
+def legacy_overhead(files: list[dict]) -> int:
+    kept = 0
+    for f in files:
+        if any(re.search(pat, f["path"]) for pat in secret_scanner.SKIP_PATTERNS):
+            continue
+        kept += len(f["content"].splitlines())
+    for f in files:
+        if any(re.search(pat, f["path"]) for pat in secret_scanner.SKIP_PATTERNS):
+            continue
+        ext = "." + f["path"].rsplit(".", 1)[-1] if "." in f["path"] else ""
+        if ext in {".json", ".lock", ".svg", ".map"}:
+            continue
+        kept += len(f["content"].splitlines())
+    return kept
+
+
+def context_overhead(files: list[dict]) -> int:
+    kept = 0
+    for ctx in as_contexts(files):
+        if secret_scanner._SKIP_RE.search(ctx.path):
+            continue
+        kept += len(ctx.lines)
+    return kept
+
+
+def _time(label: str, fn, files: list[dict]):
+    start = time.perf_counter()
+    fn(files)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:>8.3f} s total {elapsed / len(files) * 1e6:>8.2f} us/file")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=50_000)
+    args = parser.parse_args()
+
+    files = generate_files(args.files)
+    print(f"{len(files)} files, {sum(len(f['content']) for f in files) / 1e6:.1f} MB")
+    _time("legacy overhead", legacy_overhead, files)
+    _time("context overhead", context_overhead, files)
+    _time("secret_scanner.scan", secret_scanner.scan, files)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Compare tunnel wire formats for a typical probe round trip.
+
+Run from vibecheck/:
+
+    python -m benchmarks.tunnel_protocol [--iterations 5000]
+
+Reports bytes on the wire and encode+decode CPU time per probe (request frame
+from the API plus response frame from the client) for the JSON text protocol
+and the vcb1 binary protocol with and without msgpack/zlib, plus the format
+negotiated for a default `vibecheck connect` (which does not offer zlib).
+"""
+
+import argparse
+import json
+import time
+
+from api.services import tunnel_protocol as proto
+
+_HEADERS = {
+    "content-type": "text/html; charset=utf-8",
+    "content-length": "5000",
+    "date": "Mon, 19 Oct 2026 12:00:00 GMT",
+    "server": "uvicorn",
+    "x-powered-by": "Express",
+    "cache-control": "no-store",
+    "set-cookie": "session=abc123; Path=/; HttpOnly",
+    "vary": "Accept-Encoding",
+    "etag": 'W/"1388-abcdef0123456789"',
+    "connection": "keep-alive",
+    "keep-alive": "timeout=5",
+    "access-control-allow-origin": "*",
+}
+_BODY = (
+    "<!doctype html><html><head><title>Dashboard</title></head><body>"
+    + "".join(
+        f'<li><a href="/api/items/{i}">Item {i}</a> <span class="price">{i * 3}.99</span></li>'
+        for i in range(80)
+    )
+    + "</body></html>"
+)[:5000]
+
+
+def _json_round_trip() -> int:
+    request = json.dumps(
+        {
+            "type": "http_request",
+            "request_id": "req_0123456789ab",
+            "method": "GET",
+            "path": "/api/items?page=2",
+            "headers": {},
+            "body": None,
+        }
+    )
+    json.loads(request)
+    response = json.dumps(
+        {
+            "type": "http_response",
+            "request_id": "req_0123456789ab",
+            "status_code": 200,
+            "headers": _HEADERS,
+            "body": _BODY,
+        }
+    )
+    decoded = json.loads(response)
+    decoded["body"][:2000]
+    return len(request) + len(response.encode("utf-8"))
+
+
+def _binary_round_trip(use_msgpack: bool, compress: bool) -> int:
+    request = proto.encode_frame(
+        "req_0123456789ab",
+        {"type": "http_request", "method": "GET", "path": "/api/items?page=2", "headers": {}},
+        use_msgpack=use_msgpack,
+        compress=compress,
+    )
+    proto.decode_frame(request)
+    response = proto.encode_frame(
+        "req_0123456789ab",
+        {"type": "http_response", "status_code": 200, "headers": _HEADERS},
+        _BODY.encode("utf-8"),
+        use_msgpack=use_msgpack,
+        compress=compress,
+    )
+    decoded = proto.decode_frame(response)
+    decoded["body"][:8000].decode("utf-8", errors="replace")[:2000]
+    return len(request) + len(response)
+
+
+def _measure(name: str, fn, iterations: int):
+    wire_bytes = fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {wire_bytes:>8} B/probe {elapsed / iterations * 1e6:>10.1f} us/probe")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"msgpack available: {proto.msgpack is not None}")
+    _measure("json (text frames)", _json_round_trip, args.iterations)
+    _measure("vcb1 json meta", lambda: _binary_round_trip(False, False), args.iterations)
+    _measure("vcb1 json meta + zlib", lambda: _binary_round_trip(False, True), args.iterations)
+    if proto.msgpack is not None:
+        _measure("vcb1 msgpack", lambda: _binary_round_trip(True, False), args.iterations)
+        _measure("vcb1 msgpack + zlib", lambda: _binary_round_trip(True, True), args.iterations)
+
+    default = proto.negotiate(
+        {"protocols": [proto.PROTOCOL_BINARY], "codecs": proto.available_codecs(), "compression": []}
+    )
+    _measure(
+        "negotiated default",
+        lambda: _binary_round_trip(default.use_msgpack, default.compress),
+        args.iterations,
+    )
+
+
+if __name__ == "__main__":
+    main()
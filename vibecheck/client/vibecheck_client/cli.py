@@ -5,10 +5,19 @@ import sys
 import httpx
 import websockets
 
+from vibecheck_client.protocol import (
+    PROTOCOL_BINARY,
+    connect_message,
+    decode_frame,
+    encode_frame,
+)
 
-async def run(port: int, server_url: str):
+MAX_BODY_BYTES = 5000
+
+
+async def run(port: int, server_url: str, compress: bool = False):
     async with websockets.connect(server_url) as ws:
-        await ws.send(json.dumps({"type": "connect", "target_port": port}))
+        await ws.send(json.dumps(connect_message(port, compress)))
         response = json.loads(await ws.recv())
 
         if response.get("type") != "session_created":
@@ -16,65 +25,92 @@ async def run(port: int, server_url: str):
             return
 
         session_id = response["session_id"]
+        binary = response.get("protocol") == PROTOCOL_BINARY
+        use_msgpack = response.get("codec") == "msgpack"
+        compress = response.get("compression") == "zlib"
+
         print("Connected to VibeCheck API")
         print(f"Tunnel session: {session_id}")
         print(f"Proxying to localhost:{port}")
+        print(f"Wire protocol: {response.get('protocol', 'json')}")
         print("Ready for robust scanning.\n")
 
+        async def send_response(request_id: str, status_code: int, headers: dict, body: bytes):
+            if binary:
+                await ws.send(
+                    encode_frame(
+                        request_id,
+                        {"type": "http_response", "status_code": status_code, "headers": headers},
+                        body,
+                        use_msgpack=use_msgpack,
+                        compress=compress,
+                    )
+                )
+            else:
+                await ws.send(
+                    json.dumps(
+                        {
+                            "type": "http_response",
+                            "request_id": request_id,
+                            "status_code": status_code,
+                            "headers": headers,
+                            "body": body.decode("utf-8", errors="replace"),
+                        }
+                    )
+                )
+
         async with httpx.AsyncClient() as client:
+
+            async def handle_request(data: dict):
+                request_id = data["request_id"]
+                method = data["method"]
+                path = data["path"]
+                url = f"http://localhost:{port}{path}"
+
+                print(f"  -> {method} {path}")
+
+                try:
+                    resp = await client.request(
+                        method=method,
+                        url=url,
+                        headers=data.get("headers"),
+                        content=data.get("body") or None,
+                        timeout=10.0,
+                    )
+                    await send_response(
+                        request_id,
+                        resp.status_code,
+                        dict(resp.headers),
+                        resp.content[:MAX_BODY_BYTES],
+                    )
+                    print(f"  <- {resp.status_code}")
+                except Exception as e:
+                    await send_response(
+                        request_id,
+                        502,
+                        {},
+                        f"Tunnel client error: {str(e)}".encode("utf-8"),
+                    )
+                    print(f"  <- ERROR: {e}")
+
+            # Requests are served concurrently (the server caps how many are in
+            # flight) so a slow endpoint never delays pings or other probes.
+            in_flight: set[asyncio.Task] = set()
             async for message in ws:
-                data = json.loads(message)
+                data = decode_frame(message) if isinstance(message, bytes) else json.loads(message)
 
                 if data.get("type") == "ping":
                     await ws.send(json.dumps({"type": "pong"}))
 
                 elif data.get("type") == "http_request":
-                    request_id = data["request_id"]
-                    method = data["method"]
-                    path = data["path"]
-                    url = f"http://localhost:{port}{path}"
-
-                    print(f"  -> {method} {path}")
-
-                    try:
-                        resp = await client.request(
-                            method=method,
-                            url=url,
-                            headers=data.get("headers"),
-                            content=data.get("body"),
-                            timeout=10.0,
-                        )
-                        body = resp.text[:5000]
-                        await ws.send(
-                            json.dumps(
-                                {
-                                    "type": "http_response",
-                                    "request_id": request_id,
-                                    "status_code": resp.status_code,
-                                    "headers": dict(resp.headers),
-                                    "body": body,
-                                }
-                            )
-                        )
-                        print(f"  <- {resp.status_code}")
-                    except Exception as e:
-                        await ws.send(
-                            json.dumps(
-                                {
-                                    "type": "http_response",
-                                    "request_id": request_id,
-                                    "status_code": 502,
-                                    "headers": {},
-                                    "body": f"Tunnel client error: {str(e)}",
-                                }
-                            )
-                        )
-                        print(f"  <- ERROR: {e}")
+                    task = asyncio.create_task(handle_request(data))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
 
 
 def main():
     if len(sys.argv) < 3 or sys.argv[1] != "connect":
-        print("Usage: vibecheck connect <port> [--server <ws_url>]")
+        print("Usage: vibecheck connect <port> [--server <ws_url>] [--compress]")
         sys.exit(1)
 
     port = int(sys.argv[2])
@@ -85,7 +121,7 @@ def main():
             server = sys.argv[idx + 1]
 
     print(f"Connecting to {server}...")
-    asyncio.run(run(port, server))
+    asyncio.run(run(port, server, "--compress" in sys.argv))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+"""
+Client side of the tunnel wire formats. Mirrors api/services/tunnel_protocol.py
+on the server; keep the two in sync.
+"""
+
+import json
+import struct
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "vcb1"
+
+FRAME_MAGIC = b"V"
+FLAG_ZLIB = 0x01
+FLAG_MSGPACK = 0x02
+
+COMPRESS_MIN_BYTES = 1024
+MAX_FRAME_BYTES = 1024 * 1024
+
+_HEADER = struct.Struct("!cBB")
+_META_LEN = struct.Struct("!I")
+
+_DECODE_ERRORS = (struct.error, zlib.error, ValueError, TypeError) + (
+    (msgpack.UnpackException,) if msgpack is not None else ()
+)
+
+
+def connect_message(port: int, compress: bool = False) -> dict:
+    # zlib only pays off on slow links; on localhost it costs more CPU than
+    # plain msgpack frames, so it is opt-in.
+    return {
+        "type": "connect",
+        "target_port": port,
+        "protocols": [PROTOCOL_BINARY, PROTOCOL_JSON],
+        "codecs": ["msgpack", "json"] if msgpack is not None else ["json"],
+        "compression": ["zlib"] if compress else [],
+    }
+
+
+def encode_frame(
+    request_id: str,
+    meta: dict,
+    body: bytes = b"",
+    use_msgpack: bool = True,
+    compress: bool = True,
+) -> bytes:
+    flags = 0
+    if use_msgpack and msgpack is not None:
+        meta_bytes = msgpack.packb(meta, use_bin_type=True)
+        flags |= FLAG_MSGPACK
+    else:
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+
+    payload = _META_LEN.pack(len(meta_bytes)) + meta_bytes + body
+    if compress and len(payload) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, 1)
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= FLAG_ZLIB
+
+    rid = request_id.encode("ascii")
+    return _HEADER.pack(FRAME_MAGIC, flags, len(rid)) + rid + payload
+
+
+def decode_frame(frame: bytes) -> dict:
+    try:
+        magic, flags, rid_len = _HEADER.unpack_from(frame)
+        if magic != FRAME_MAGIC:
+            raise ValueError("Unknown tunnel frame magic")
+
+        offset = _HEADER.size
+        request_id = bytes(frame[offset:offset + rid_len]).decode("ascii")
+        payload = memoryview(frame)[offset + rid_len:]
+        if flags & FLAG_ZLIB:
+            inflater = zlib.decompressobj()
+            payload = memoryview(inflater.decompress(payload, MAX_FRAME_BYTES))
+            if inflater.unconsumed_tail or not inflater.eof:
+                raise ValueError("Compressed tunnel frame is too large or truncated")
+
+        (meta_len,) = _META_LEN.unpack_from(payload)
+        meta_end = _META_LEN.size + meta_len
+        if meta_end > len(payload):
+            raise ValueError("Truncated tunnel frame metadata")
+        meta_bytes = payload[_META_LEN.size:meta_end]
+        if flags & FLAG_MSGPACK:
+            if msgpack is None:
+                raise ValueError("Received msgpack frame but msgpack is not installed")
+            meta = msgpack.unpackb(meta_bytes, raw=False)
+        else:
+            meta = json.loads(bytes(meta_bytes))
+        if not isinstance(meta, dict):
+            raise ValueError("Tunnel frame metadata is not an object")
+    except _DECODE_ERRORS as e:
+        raise ValueError(f"Malformed tunnel frame: {e}") from e
+
+    meta["request_id"] = request_id
+    meta["body"] = bytes(payload[meta_end:])
+    return meta